@@ -0,0 +1,224 @@
+"""Load-test the integration against the local fake API.
+
+Sets up `--entries` config entries of `--systems` systems each, spread over
+`--accounts` accounts, in a bare Home Assistant core pointed at `fake_api.py`.
+Entries of the same account share its API client and poller. It then
+refreshes every poller's live overview coordinator every `--interval` seconds
+for `--duration` seconds, starting the pollers at random offsets. Reports the
+update throughput, the wall time of each update, the requests and responses
+seen by the fake API, and the state of each API client's circuit breaker.
+
+The fake API options inject latency, errors, throttling and token expiry.
+Intervals below the live overview cache TTL are partly served from cache.
+
+Requires Home Assistant to be installed in the current environment:
+
+    python benchmarks/bench_load.py --entries 20 --systems 5 --latency 0.2
+    python benchmarks/bench_load.py --entries 5 --error-rate 0.2 --revoke-every 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+import importlib
+from pathlib import Path
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from homeassistant.config_entries import ConfigEntryState
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_startup import DOMAIN, async_setup_hass, make_entry  # noqa: E402
+from fake_api import FakeHeartbeatApi, add_arguments  # noqa: E402
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Return a percentile of sorted values."""
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+async def async_drive(
+    coordinator,
+    interval: float,
+    end: float,
+    durations: list[float],
+    system_updates: list[int],
+) -> int:
+    """Refresh a coordinator every `interval` seconds until `end`.
+
+    Records the number of systems each update returned. Returns the number
+    of failed updates.
+    """
+    failures = 0
+    await asyncio.sleep(random.uniform(0, interval))
+    while time.monotonic() < end:
+        start = time.perf_counter()
+        await coordinator.async_refresh()
+        durations.append(time.perf_counter() - start)
+        if not coordinator.last_update_success:
+            failures += 1
+        else:
+            system_updates.append(len(coordinator.data))
+        await asyncio.sleep(interval)
+    return failures
+
+
+async def async_measure_lag(end: float, lags: list[float]) -> None:
+    """Record how late the event loop wakes up from short sleeps."""
+    while time.monotonic() < end:
+        start = time.perf_counter()
+        await asyncio.sleep(0.05)
+        lags.append(time.perf_counter() - start - 0.05)
+
+
+async def async_revoke(fake_api: FakeHeartbeatApi, every: float, end: float) -> None:
+    """Revoke all access tokens every `every` seconds until `end`."""
+    while time.monotonic() + every < end:
+        await asyncio.sleep(every)
+        fake_api.revoke_tokens()
+
+
+async def async_main(args: argparse.Namespace) -> None:
+    """Run the load test."""
+    fake_api = FakeHeartbeatApi(
+        args.latency,
+        args.entries * args.systems,
+        jitter=args.jitter,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        token_lifetime=args.token_lifetime,
+    )
+    base_url = await fake_api.start()
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await async_setup_hass(config_dir)
+        api = importlib.import_module(f"custom_components.{DOMAIN}.api")
+        api.API_BASE_URL = base_url
+        api.OAUTH2_TOKEN = f"{base_url}/oauth/token"
+
+        entries = []
+        setup_start = time.perf_counter()
+        for index in range(args.entries):
+            system_ids = fake_api.system_ids[
+                index * args.systems : (index + 1) * args.systems
+            ]
+            entry = make_entry(*system_ids, account=f"account-{index % args.accounts}")
+            await hass.config_entries.async_add(entry)
+            if entry.state is not ConfigEntryState.LOADED:
+                raise RuntimeError(f"Setup failed: {entry.state}")
+            entries.append(entry)
+        await hass.async_block_till_done()
+        setup_time = time.perf_counter() - setup_start
+        runtime_data = [hass.data[DOMAIN][entry.entry_id] for entry in entries]
+        pollers = {id(data["poller"]): data["poller"] for data in runtime_data}
+
+        fake_api.requests.clear()
+        fake_api.responses.clear()
+        durations: list[float] = []
+        system_updates: list[int] = []
+        lags: list[float] = []
+        end = time.monotonic() + args.duration
+        tasks = [
+            asyncio.create_task(async_measure_lag(end, lags)),
+            *(
+                asyncio.create_task(
+                    async_drive(
+                        poller.coordinator,
+                        args.interval,
+                        end,
+                        durations,
+                        system_updates,
+                    )
+                )
+                for poller in pollers.values()
+            ),
+        ]
+        if args.revoke_every:
+            tasks.append(
+                asyncio.create_task(async_revoke(fake_api, args.revoke_every, end))
+            )
+        run_start = time.perf_counter()
+        results = await asyncio.gather(*tasks)
+        run_time = time.perf_counter() - run_start
+        failures = sum(result or 0 for result in results)
+        api_clients = {id(data["api"]): data["api"] for data in runtime_data}
+        circuits = Counter(api.circuit.state for api in api_clients.values())
+
+        for entry in entries:
+            await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_stop()
+
+    await fake_api.stop()
+
+    if not durations:
+        raise SystemExit("No updates ran, increase --duration")
+    durations.sort()
+    lags.sort()
+    updates = len(durations)
+    print(
+        f"entries: {args.entries}, systems per entry: {args.systems}, "
+        f"accounts: {args.accounts}, API clients: {len(api_clients)}, "
+        f"pollers: {len(pollers)}, "
+        f"interval: {args.interval:g} s, duration: {run_time:.1f} s"
+    )
+    print(f"setup wall time: {setup_time * 1000:.1f} ms")
+    print(
+        f"updates: {updates} ({failures} failed), "
+        f"{updates / run_time:.1f} updates/s, "
+        f"{sum(system_updates) / run_time:.1f} system updates/s"
+    )
+    print(
+        f"update wall time: mean {statistics.mean(durations) * 1000:.1f} ms, "
+        f"p50 {percentile(durations, 0.5) * 1000:.1f} ms, "
+        f"p95 {percentile(durations, 0.95) * 1000:.1f} ms, "
+        f"p99 {percentile(durations, 0.99) * 1000:.1f} ms, "
+        f"max {durations[-1] * 1000:.1f} ms"
+    )
+    if lags:
+        print(
+            f"event loop lag: p50 {percentile(lags, 0.5) * 1000:.1f} ms, "
+            f"p99 {percentile(lags, 0.99) * 1000:.1f} ms, "
+            f"max {lags[-1] * 1000:.1f} ms"
+        )
+    print(f"requests: {dict(sorted(fake_api.requests.items()))}")
+    print(f"responses: {dict(sorted(fake_api.responses.items()))}")
+    print(f"circuits: {dict(circuits)}")
+
+
+def main() -> None:
+    """Parse arguments and run the load test."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=10, help="config entries")
+    parser.add_argument(
+        "--systems", type=int, default=1, help="systems per config entry"
+    )
+    parser.add_argument(
+        "--accounts", type=int, default=1, help="accounts the entries belong to"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=30, help="seconds of load to apply"
+    )
+    parser.add_argument(
+        "--interval", type=float, default=5, help="seconds between entry updates"
+    )
+    parser.add_argument(
+        "--revoke-every", type=float, help="revoke all tokens every N seconds"
+    )
+    parser.add_argument("--seed", type=int, help="random seed")
+    add_arguments(parser)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    asyncio.run(async_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Measure payload decoding, parsing and sensor evaluation on recorded fixtures.
+
+Times the hot path of every update without network or event loop: decoding
+the recorded JSON bodies, projecting them to the fields the sensors read,
+parsing them into `LiveOverview` and `PriceTimeline`, selecting the current
+price slot, and evaluating the state, availability and attributes of every
+sensor of a system, as a state write does. Each case reports the best time
+per call over several runs.
+
+The fixtures only hold the fields the integration reads, so decoding and
+projection are also measured on full-size responses modelled by `fake_api.py`.
+For each payload, the compact JSON size and the memory held by the decoded
+objects are reported before and after the projection.
+
+Requires Home Assistant to be installed in the current environment:
+
+    python benchmarks/bench_parsing.py
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timezone
+import importlib
+import itertools
+import json
+from pathlib import Path
+import random
+import sys
+import time
+import timeit
+import types
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+# Make `custom_components` importable from the repository checkout.
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_api import full_live_overview_payload, full_market_price_payload  # noqa: E402
+from payloads import iter_replay, load_fixture, rebase_market_price  # noqa: E402
+
+DOMAIN = "1komma5grad"
+
+
+def integration_module(name: str) -> types.ModuleType:
+    """Import a module of the integration."""
+    return importlib.import_module(f"custom_components.{DOMAIN}.{name}")
+
+
+def measure(func, repeat: int) -> tuple[float, int]:
+    """Return the best seconds per call of `func` and the calls per run."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number, number
+
+
+def payloads() -> dict[str, tuple[str, bytes]]:
+    """Return the request name and body of each measured payload, by label."""
+    random.seed(1)
+    now = datetime.now(timezone.utc)
+    return {
+        "live_overview": ("live_overview", load_fixture("live_overview")),
+        "market_price": ("market_price", load_fixture("market_price")),
+        "systems": ("systems", load_fixture("systems")),
+        "live_overview (modelled full)": (
+            "live_overview",
+            json.dumps(full_live_overview_payload()).encode(),
+        ),
+        "market_price (modelled full)": (
+            "market_price",
+            json.dumps(full_market_price_payload(now)).encode(),
+        ),
+    }
+
+
+def decode_cases() -> dict:
+    """Return the JSON decoding cases of every payload."""
+    cases = {}
+    decoders = {"json": json.loads}
+    try:
+        import orjson
+    except ImportError:
+        pass
+    else:
+        decoders["orjson"] = orjson.loads
+    for label, (_, body) in payloads().items():
+        for decoder_name, decode in decoders.items():
+            cases[f"decode {label} ({decoder_name}, {len(body)} B)"] = (
+                lambda decode=decode, body=body: decode(body)
+            )
+    return cases
+
+
+def projection_cases() -> dict:
+    """Return the projection case of every payload with a projection."""
+    api = integration_module("api")
+    const = integration_module("const")
+    cases = {}
+    for label, (name, body) in payloads().items():
+        if (projection := const.API_PROJECTIONS.get(name)) is not None:
+            data = json.loads(body)
+            cases[f"project {label}"] = lambda data=data, projection=projection: (
+                api.project(data, projection)
+            )
+    return cases
+
+
+def held_size(data) -> int:
+    """Return the bytes held by decoded JSON, counting shared objects once."""
+    seen = set()
+    size = 0
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+    return size
+
+
+def print_sizes() -> None:
+    """Print the size of each payload before and after projection."""
+    api = integration_module("api")
+    const = integration_module("const")
+    rows = []
+    for label, (name, body) in payloads().items():
+        if (projection := const.API_PROJECTIONS.get(name)) is None:
+            continue
+        data = json.loads(body)
+        projected = api.project(data, projection)
+        rows.append(
+            (
+                label,
+                f"{len(json.dumps(data))} -> {len(json.dumps(projected))} B JSON",
+                f"{held_size(data)} -> {held_size(projected)} B held",
+            )
+        )
+    width = max(len(row[0]) for row in rows)
+    for label, size, held in rows:
+        print(f"{label:<{width}}  {size:>22}  {held:>22}")
+
+
+def parse_cases() -> dict:
+    """Return the parsing and price slot selection cases."""
+    const = integration_module("const")
+    models = integration_module("models")
+    price = integration_module("price")
+    battery_capacity = const.SENSOR_CONFIG["battery_energy"].get("battery_capacity")
+    live_overview = json.loads(load_fixture("live_overview"))
+    market_price = rebase_market_price(
+        json.loads(load_fixture("market_price")), datetime.now(timezone.utc)
+    )
+    timeline = price.PriceTimeline.from_chart(market_price)
+    now = time.time()
+    return {
+        "LiveOverview.from_payload": lambda: models.LiveOverview.from_payload(
+            live_overview, battery_capacity
+        ),
+        f"PriceTimeline.from_chart ({len(timeline)} slots)": (
+            lambda: price.PriceTimeline.from_chart(market_price)
+        ),
+        "PriceTimeline.price_at": lambda: timeline.price_at(now),
+        "PriceTimeline.next_change": lambda: timeline.next_change(now),
+    }
+
+
+def sensor_cases() -> dict:
+    """Return the case evaluating every sensor of a system.
+
+    The sensors read from stand-in coordinators whose data advances to the
+    next recorded live overview on every call, so per-update caches are
+    exercised like in Home Assistant.
+    """
+    const = integration_module("const")
+    energy = integration_module("energy")
+    models = integration_module("models")
+    price = integration_module("price")
+    resilience = integration_module("resilience")
+    sensor = integration_module("sensor")
+
+    battery_capacity = const.SENSOR_CONFIG["battery_energy"].get("battery_capacity")
+    overviews = [
+        models.LiveOverview.from_payload(record["payload"], battery_capacity)
+        for record in iter_replay()
+        if record["name"] == "live_overview" and record["system_id"] == "system-0"
+    ]
+    timeline = price.PriceTimeline.from_chart(
+        rebase_market_price(
+            json.loads(load_fixture("market_price")), datetime.now(timezone.utc)
+        )
+    )
+    coordinator = types.SimpleNamespace(
+        data={"system-0": overviews[0]}, restored_at={}, last_update_success=True
+    )
+    market_coordinator = types.SimpleNamespace(
+        data={"system-0": timeline}, restored_at={}, last_update_success=True
+    )
+    integrator = energy.EnergyIntegrator(
+        {key: conf["source"] for key, conf in const.ENERGY_SENSOR_CONFIG.items()},
+        const.ENERGY_MAX_GAP,
+    )
+    costs = energy.CostIntegrator(
+        {conf["source"]: conf["source"] for conf in const.COST_SENSOR_CONFIG.values()},
+        const.ENERGY_MAX_GAP,
+    )
+    entry = types.SimpleNamespace(entry_id="bench", data={"system_id": "system-0"})
+    system = sensor._system_info(entry, "system-0", "system-0")
+
+    sensors = [
+        *(
+            sensor.OneKomma5GradSensor(coordinator, system, description)
+            for description in sensor.LIVE_OVERVIEW_SENSORS
+        ),
+        *(
+            sensor.EnergyTotalSensor(coordinator, system, description, integrator)
+            for description in sensor.ENERGY_SENSORS
+        ),
+        *(
+            sensor.CostSensor(coordinator, system, description, costs)
+            for description in sensor.COST_SENSORS
+        ),
+        sensor.MarketPriceSensor(
+            market_coordinator, system, sensor.MARKET_PRICE_SENSOR
+        ),
+        sensor.MarketPriceForecastSensor(
+            market_coordinator, system, sensor.MARKET_PRICE_FORECAST_SENSOR
+        ),
+        sensor.ApiCircuitSensor(
+            resilience.CircuitBreaker(), system, sensor.API_CIRCUIT_SENSOR
+        ),
+    ]
+    next_overview = itertools.cycle(overviews).__next__
+
+    def evaluate() -> None:
+        """Advance to the next update and evaluate every sensor."""
+        coordinator.data = {"system-0": next_overview()}
+        for entity in sensors:
+            if entity.available:
+                entity.state  # noqa: B018
+                entity.extra_state_attributes  # noqa: B018
+
+    return {f"evaluate all sensors ({len(sensors)})": evaluate}
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case")
+    args = parser.parse_args()
+
+    print_sizes()
+    print()
+    cases = decode_cases()
+    cases.update(projection_cases())
+    cases.update(parse_cases())
+    cases.update(sensor_cases())
+
+    width = max(len(name) for name in cases)
+    for name, func in cases.items():
+        seconds, number = measure(func, args.repeat)
+        print(f"{name:<{width}}  {seconds * 1e6:10.2f} µs/call  ({number} calls/run)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Measure config entry setup wall time against the local fake API.
+
+Starts a bare Home Assistant core that loads the integration from this
+repository's `custom_components` directory, points it at `fake_api.py` with an
+injected per-request latency and times `async_setup_entry`.
+
+Requires Home Assistant to be installed in the current environment. The
+helpers are shared with `replay.py` and `bench_load.py` and run on Home
+Assistant 2024.3 up to 2025.4:
+
+    python benchmarks/bench_startup.py --latency 0.3 --runs 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import inspect
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+from types import MappingProxyType
+
+from homeassistant.bootstrap import async_load_base_functionality
+from homeassistant.config_entries import ConfigEntries, ConfigEntry, ConfigEntryState
+from homeassistant.core import HomeAssistant
+from homeassistant.loader import async_setup as async_setup_loader
+from homeassistant.setup import async_setup_component
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+# Make `custom_components` importable from the repository checkout.
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_api import (  # noqa: E402
+    DEFAULT_ACCOUNT,
+    FakeHeartbeatApi,
+    access_token,
+    refresh_token,
+)
+
+DOMAIN = "1komma5grad"
+
+
+def make_entry(
+    system_id: str, *other_system_ids: str, account: str = DEFAULT_ACCOUNT
+) -> ConfigEntry:
+    """Return a config entry of an account monitoring the given systems."""
+    kwargs = {
+        "version": 1,
+        "minor_version": 1,
+        "domain": DOMAIN,
+        "title": "1Komma5Grad Benchmark",
+        "data": {
+            "access_token": access_token(account=account),
+            "refresh_token": refresh_token(account),
+            "system_id": system_id,
+            "system_ids": [system_id, *other_system_ids],
+            "auth_implementation": DOMAIN,
+        },
+        "options": {},
+        "source": "user",
+        "unique_id": None,
+    }
+    # Newer Home Assistant releases added required constructor arguments.
+    parameters = inspect.signature(ConfigEntry).parameters
+    if "discovery_keys" in parameters:
+        kwargs["discovery_keys"] = MappingProxyType({})
+    if "subentries_data" in parameters:
+        kwargs["subentries_data"] = None
+    return ConfigEntry(**kwargs)
+
+
+async def async_setup_hass(config_dir: str) -> HomeAssistant:
+    """Start a bare Home Assistant core with the integration available."""
+    hass = HomeAssistant(config_dir)
+    hass.config.skip_pip = True
+    async_setup_loader(hass)
+    hass.config_entries = ConfigEntries(hass, {})
+    await async_load_base_functionality(hass)
+    # application_credentials is only used by the config flow. Marking it and
+    # its web stack as loaded keeps the HTTP server out of the measurement.
+    hass.config.components.update(
+        {"application_credentials", "auth", "http", "websocket_api"}
+    )
+    await hass.async_start()
+    # The shared aiohttp session looks up the network configuration.
+    for component in ("homeassistant", "network"):
+        if not await async_setup_component(hass, component, {}):
+            raise RuntimeError(f"Home Assistant failed to set up {component}")
+    return hass
+
+
+async def async_main(args: argparse.Namespace) -> None:
+    """Run the benchmark."""
+    fake_api = FakeHeartbeatApi(latency=args.latency, systems=args.systems)
+    base_url = await fake_api.start()
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await async_setup_hass(config_dir)
+        api = importlib.import_module(f"custom_components.{DOMAIN}.api")
+        api.API_BASE_URL = base_url
+        api.OAUTH2_TOKEN = f"{base_url}/oauth/token"
+
+        setup_times = []
+        for _ in range(args.runs):
+            fake_api.requests.clear()
+            entry = make_entry(*fake_api.system_ids)
+            start = time.perf_counter()
+            await hass.config_entries.async_add(entry)
+            setup_times.append(time.perf_counter() - start)
+            if entry.state is not ConfigEntryState.LOADED:
+                raise RuntimeError(f"Setup failed: {entry.state}")
+            requests_during_setup = dict(fake_api.requests)
+
+            await hass.async_block_till_done()
+            await hass.config_entries.async_remove(entry.entry_id)
+
+        await hass.async_stop()
+
+    await fake_api.stop()
+
+    print(f"latency per request: {args.latency * 1000:.0f} ms")
+    print(f"systems per entry: {args.systems}")
+    print(f"requests during setup: {requests_during_setup}")
+    print(
+        f"setup wall time over {args.runs} runs: "
+        f"mean {statistics.mean(setup_times) * 1000:.1f} ms, "
+        f"min {min(setup_times) * 1000:.1f} ms, "
+        f"max {max(setup_times) * 1000:.1f} ms"
+    )
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--latency", type=float, default=0.3, help="response latency in seconds"
+    )
+    parser.add_argument("--runs", type=int, default=5, help="number of setups")
+    parser.add_argument(
+        "--systems", type=int, default=1, help="systems monitored by the entry"
+    )
+    asyncio.run(async_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,549 @@
+"""Local stand-in for the 1Komma5Grad heartbeat and auth APIs.
+
+Serves the paths used by `api.py` with generated payloads, an injected
+response latency, errors, throttling and token expiry, so the integration can
+be exercised without the cloud. Can also be run on its own:
+
+    python benchmarks/fake_api.py --systems 50 --latency 0.2 --error-rate 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+import json
+import random
+import time
+
+from aiohttp import web
+
+
+DEFAULT_ACCOUNT = "account-0"
+
+
+def access_token(lifetime: int = 86400, account: str = DEFAULT_ACCOUNT) -> str:
+    """Return an unsigned JWT issued now that expires after `lifetime` seconds.
+
+    Its `sub` claim names the account, as the integration shares clients by it.
+    """
+
+    def encode(part: dict) -> str:
+        raw = json.dumps(part).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    now = int(time.time())
+    header = encode({"alg": "none", "typ": "JWT"})
+    payload = encode({"sub": account, "iat": now, "exp": now + lifetime})
+    return f"{header}.{payload}."
+
+
+def refresh_token(account: str = DEFAULT_ACCOUNT) -> str:
+    """Return the refresh token of an account."""
+    return f"fake-refresh-{account}"
+
+
+def live_overview_payload() -> dict:
+    """Return a live-overview payload with plausible random values."""
+    production = round(random.uniform(0, 8000), 1)
+    household = round(random.uniform(200, 3000), 1)
+    battery = round(random.uniform(-3000, 3000), 1)
+    grid = household + battery - production
+    return {
+        "summaryCards": {
+            "battery": {
+                "power": {"value": battery},
+                "stateOfCharge": round(random.uniform(0.05, 1.0), 3),
+            },
+            "household": {"power": {"value": household}},
+        },
+        "liveHeroView": {
+            "production": {"value": production},
+            "gridFeedIn": {"value": round(max(-grid, 0), 1)},
+            "gridConsumption": {"value": round(max(grid, 0), 1)},
+        },
+    }
+
+
+def market_price_payload(start: datetime, hours: int = 48) -> dict:
+    """Return a market price chart with hourly prices from `start`."""
+    start = start.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    data = {}
+    for hour in range(hours):
+        ts = start + timedelta(hours=hour)
+        data[ts.strftime("%Y-%m-%dT%H:%MZ")] = {
+            "price": round(20 + 10 * random.random(), 3)
+        }
+    return {"energyMarket": {"data": data}}
+
+
+def _power(value: float) -> dict:
+    """Return a power reading as the API nests it."""
+    return {"value": value, "unit": "W"}
+
+
+def full_live_overview_payload() -> dict:
+    """Return a live overview modelled on a full app response.
+
+    Modelled, not recorded: the fields the integration reads sit among the
+    kind of data a full response carries next to them (units, per-device
+    cards, inverter strings, energy flows, optimization plans and
+    notifications), so decoding and projection can be measured at a
+    realistic size.
+    """
+    payload = live_overview_payload()
+    now = datetime.now(timezone.utc).isoformat()
+    battery = payload["summaryCards"]["battery"]
+    household = payload["summaryCards"]["household"]
+    hero = payload["liveHeroView"]
+    production = hero["production"]["value"]
+    battery.update(
+        {
+            "capacity": {"value": 10.0, "unit": "kWh"},
+            "status": "CHARGING" if battery["power"]["value"] < 0 else "DISCHARGING",
+            "chargingPower": _power(max(-battery["power"]["value"], 0)),
+            "dischargingPower": _power(max(battery["power"]["value"], 0)),
+            "todayCharged": {"value": round(random.uniform(0, 10), 2), "unit": "kWh"},
+            "todayDischarged": {
+                "value": round(random.uniform(0, 10), 2),
+                "unit": "kWh",
+            },
+            "lastUpdated": now,
+        }
+    )
+    household.update(
+        {
+            "selfSufficiency": round(random.random(), 3),
+            "selfConsumption": round(random.random(), 3),
+            "todayEnergy": {"value": round(random.uniform(0, 30), 2), "unit": "kWh"},
+            "lastUpdated": now,
+        }
+    )
+    payload["summaryCards"].update(
+        {
+            "photovoltaics": {
+                "power": _power(production),
+                "peakPower": {"value": 9.8, "unit": "kWp"},
+                "todayEnergy": {
+                    "value": round(random.uniform(0, 40), 2),
+                    "unit": "kWh",
+                },
+                "inverters": [
+                    {
+                        "id": f"inverter-{inverter}",
+                        "name": f"Inverter {inverter + 1}",
+                        "status": "ONLINE",
+                        "power": _power(round(production / 2, 1)),
+                        "temperature": {"value": 41.5, "unit": "°C"},
+                        "strings": [
+                            {
+                                "id": f"string-{inverter}-{string}",
+                                "voltage": {"value": 612.3, "unit": "V"},
+                                "current": {"value": 3.4, "unit": "A"},
+                                "power": _power(round(production / 4, 1)),
+                            }
+                            for string in range(2)
+                        ],
+                        "lastUpdated": now,
+                    }
+                    for inverter in range(2)
+                ],
+            },
+            "grid": {
+                "power": _power(
+                    hero["gridConsumption"]["value"] - hero["gridFeedIn"]["value"]
+                ),
+                "feedInLimit": {"value": 0.7, "unit": "ratio"},
+                "todayImport": {
+                    "value": round(random.uniform(0, 20), 2),
+                    "unit": "kWh",
+                },
+                "todayExport": {
+                    "value": round(random.uniform(0, 20), 2),
+                    "unit": "kWh",
+                },
+            },
+            "evChargers": [
+                {
+                    "id": "wallbox-0",
+                    "name": "Wallbox",
+                    "status": "AVAILABLE",
+                    "power": _power(0.0),
+                    "sessionEnergy": {"value": 0.0, "unit": "kWh"},
+                    "mode": "SOLAR",
+                    "lastUpdated": now,
+                }
+            ],
+            "heatPumps": [
+                {
+                    "id": "heatpump-0",
+                    "name": "Heat pump",
+                    "status": "HEATING",
+                    "power": _power(round(random.uniform(0, 3000), 1)),
+                    "flowTemperature": {"value": 35.0, "unit": "°C"},
+                    "lastUpdated": now,
+                }
+            ],
+        }
+    )
+    hero.update(
+        {
+            "consumption": household["power"],
+            "batteryCharging": battery["chargingPower"],
+            "batteryDischarging": battery["dischargingPower"],
+            "selfSufficiencyQuota": household["selfSufficiency"],
+            "energyFlows": [
+                {"from": source, "to": target, "power": _power(0.0), "active": False}
+                for source in ("PV", "BATTERY", "GRID")
+                for target in ("HOUSEHOLD", "BATTERY", "GRID")
+                if source != target
+            ],
+            "weather": {
+                "condition": "PARTLY_CLOUDY",
+                "temperature": {"value": 18.5, "unit": "°C"},
+                "cloudCover": 0.4,
+            },
+        }
+    )
+    payload.update(
+        {
+            "timestamp": now,
+            "status": "ONLINE",
+            "optimization": {
+                "mode": "DYNAMIC_PULSE",
+                "active": True,
+                "nextActions": [
+                    {
+                        "device": "battery",
+                        "action": "CHARGE_FROM_GRID" if hour % 3 else "HOLD",
+                        "start": (
+                            datetime.now(timezone.utc) + timedelta(hours=hour)
+                        ).isoformat(),
+                        "power": _power(2500.0),
+                    }
+                    for hour in range(8)
+                ],
+            },
+            "notifications": [
+                {
+                    "id": f"notification-{index}",
+                    "severity": "INFO",
+                    "title": "Battery fully charged",
+                    "createdAt": now,
+                    "read": bool(index),
+                }
+                for index in range(3)
+            ],
+        }
+    )
+    return payload
+
+
+def full_market_price_payload(start: datetime, hours: int = 48) -> dict:
+    """Return a market price chart modelled on a full app response.
+
+    Modelled, not recorded: each slot carries a breakdown of the price next
+    to the `price` the integration reads, and the response holds summary
+    statistics and a second series including grid costs.
+    """
+    payload = market_price_payload(start, hours)
+    data = payload["energyMarket"]["data"]
+    for slot in data.values():
+        price = slot["price"]
+        slot.update(
+            {
+                "marketPrice": round(price / 1.19, 3),
+                "vat": round(price - price / 1.19, 3),
+                "gridCosts": 11.2,
+                "taxes": 2.05,
+                "priceWithGridCosts": round(price + 13.25, 3),
+                "unit": "ct/kWh",
+                "currency": "EUR",
+                "level": "LOW" if price < 25 else "HIGH",
+            }
+        )
+    prices = [slot["price"] for slot in data.values()]
+    payload["energyMarket"].update(
+        {
+            "resolution": "PT1H",
+            "averagePrice": round(sum(prices) / len(prices), 3),
+            "minPrice": min(prices),
+            "maxPrice": max(prices),
+        }
+    )
+    payload["energyMarketWithGridCosts"] = {
+        "data": {
+            ts: {"price": slot["priceWithGridCosts"], "unit": "ct/kWh"}
+            for ts, slot in data.items()
+        }
+    }
+    return payload
+
+
+# Power series of each historical chart.
+CHART_SERIES = {
+    "production": ("production",),
+    "consumption": ("consumption",),
+    "grid": ("consumption", "feedIn"),
+    "battery": ("charge", "discharge"),
+}
+
+
+def chart_payload(chart: str, start: datetime, end: datetime) -> dict:
+    """Return a historical chart with random 15 minute power samples."""
+    payload = {}
+    for series in CHART_SERIES.get(chart, ()):
+        data = {}
+        ts = start
+        while ts < end:
+            data[ts.isoformat()] = {"value": round(random.uniform(0, 5000), 1)}
+            ts += timedelta(minutes=15)
+        payload[series] = {"data": data}
+    return payload
+
+
+class FakeHeartbeatApi:
+    """aiohttp application serving the heartbeat and auth endpoints.
+
+    Every heartbeat response is delayed by `latency` plus up to `jitter`
+    seconds, and a `slow_rate` fraction by `slow_latency` instead. A
+    `throttle_rate` fraction is answered with 429 and `Retry-After`, and an
+    `error_rate` fraction with 500. Bearer tokens are JWTs whose `exp` claim
+    is checked; tokens issued before the last `revoke_tokens` call, or expired
+    ones, are answered with 401. Issued tokens live `token_lifetime` seconds.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        systems: int = 1,
+        *,
+        jitter: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_latency: float = 5.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: int = 1,
+        token_lifetime: int = 86400,
+    ) -> None:
+        """Initialize the fake API."""
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.token_lifetime = token_lifetime
+        self.system_ids = [f"system-{index}" for index in range(systems)]
+        self.requests: dict[str, int] = {}
+        self.responses: dict[int, int] = {}
+        self._revoked_before = 0
+        self._runner: web.AppRunner | None = None
+
+        self.app = web.Application()
+        self.app.router.add_get("/api/v2/systems", self._handle_systems)
+        self.app.router.add_get(
+            "/api/v3/systems/{system_id}/live-overview", self._handle_live_overview
+        )
+        self.app.router.add_get(
+            "/api/v1/systems/{system_id}/charts/market-prices",
+            self._handle_market_prices,
+        )
+        self.app.router.add_get(
+            "/api/v1/systems/{system_id}/charts/{chart}", self._handle_chart
+        )
+        self.app.router.add_post("/oauth/token", self._handle_token)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base URL."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def revoke_tokens(self) -> None:
+        """Reject every access token issued so far, as if they expired early."""
+        self._revoked_before = int(time.time())
+
+    def _token_valid(self, request: web.Request) -> bool:
+        """Return True if the request carries an unexpired, unrevoked token."""
+        header = request.headers.get("Authorization", "")
+        if not header.startswith("Bearer "):
+            return False
+        try:
+            payload = header[7:].split(".")[1]
+            payload += "=" * (-len(payload) % 4)
+            claims = json.loads(base64.urlsafe_b64decode(payload))
+        except (IndexError, TypeError, ValueError):
+            return False
+        now = time.time()
+        return (
+            claims.get("exp", 0) > now and claims.get("iat", 0) >= self._revoked_before
+        )
+
+    async def _respond(
+        self, request: web.Request, name: str, payload_fn: Callable[[], dict]
+    ) -> web.Response:
+        """Count the request and answer after the configured latency.
+
+        Failures are injected before the payload is built.
+        """
+        self.requests[name] = self.requests.get(name, 0) + 1
+        if random.random() < self.slow_rate:
+            await asyncio.sleep(self.slow_latency)
+        elif self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+        if not self._token_valid(request):
+            response = web.json_response({"error": "invalid_token"}, status=401)
+        elif random.random() < self.throttle_rate:
+            response = web.json_response(
+                {"error": "too_many_requests"},
+                status=429,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        elif random.random() < self.error_rate:
+            response = web.json_response({"error": "internal"}, status=500)
+        else:
+            response = web.json_response(payload_fn())
+        self.responses[response.status] = self.responses.get(response.status, 0) + 1
+        return response
+
+    async def _handle_systems(self, request: web.Request) -> web.Response:
+        """List the fake systems."""
+        return await self._respond(
+            request,
+            "systems",
+            lambda: {
+                "data": [
+                    {"id": system_id, "systemName": f"Fake {system_id}"}
+                    for system_id in self.system_ids
+                ]
+            },
+        )
+
+    async def _handle_live_overview(self, request: web.Request) -> web.Response:
+        """Return a random live overview."""
+        return await self._respond(request, "live_overview", live_overview_payload)
+
+    async def _handle_market_prices(self, request: web.Request) -> web.Response:
+        """Return hourly prices starting now."""
+        return await self._respond(
+            request,
+            "market_price",
+            lambda: market_price_payload(datetime.now(timezone.utc)),
+        )
+
+    async def _handle_chart(self, request: web.Request) -> web.Response:
+        """Return a historical chart for the requested range."""
+        chart = request.match_info["chart"]
+        start = datetime.fromisoformat(request.query["from"])
+        end = datetime.fromisoformat(request.query["to"])
+        return await self._respond(
+            request, f"chart_{chart}", lambda: chart_payload(chart, start, end)
+        )
+
+    async def _handle_token(self, request: web.Request) -> web.Response:
+        """Issue a new access token for the account of the refresh token."""
+        self.requests["token"] = self.requests.get("token", 0) + 1
+        self.responses[200] = self.responses.get(200, 0) + 1
+        try:
+            body = await request.json()
+        except ValueError:
+            body = {}
+        account = (
+            str(body.get("refresh_token", "")).removeprefix("fake-refresh-")
+            or DEFAULT_ACCOUNT
+        )
+        return web.json_response(
+            {
+                "access_token": access_token(self.token_lifetime, account),
+                "refresh_token": refresh_token(account),
+                "expires_in": self.token_lifetime,
+                "token_type": "Bearer",
+            }
+        )
+
+
+async def async_serve(args: argparse.Namespace) -> None:
+    """Serve the fake API until interrupted."""
+    fake_api = FakeHeartbeatApi(
+        args.latency,
+        args.systems,
+        jitter=args.jitter,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        token_lifetime=args.token_lifetime,
+    )
+    base_url = await fake_api.start(args.host, args.port)
+    print(f"Serving the fake API on {base_url}")
+    print(f"Access token: {access_token(args.token_lifetime)}")
+    try:
+        while True:
+            await asyncio.sleep(args.revoke_every or 3600)
+            if args.revoke_every:
+                fake_api.revoke_tokens()
+    finally:
+        await fake_api.stop()
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options of the fake API to a parser."""
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="response latency in seconds"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="random extra latency in seconds"
+    )
+    parser.add_argument(
+        "--slow-rate", type=float, default=0.0, help="fraction of slow responses"
+    )
+    parser.add_argument(
+        "--slow-latency", type=float, default=5.0, help="slow response latency"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="fraction of 500 responses"
+    )
+    parser.add_argument(
+        "--throttle-rate", type=float, default=0.0, help="fraction of 429 responses"
+    )
+    parser.add_argument(
+        "--retry-after", type=int, default=1, help="Retry-After of 429 responses"
+    )
+    parser.add_argument(
+        "--token-lifetime", type=int, default=86400, help="issued token lifetime"
+    )
+
+
+def main() -> None:
+    """Parse arguments and serve the fake API."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--systems", type=int, default=1, help="number of systems")
+    parser.add_argument(
+        "--revoke-every", type=float, help="revoke all tokens every N seconds"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="listen address")
+    parser.add_argument("--port", type=int, default=8080, help="listen port")
+    try:
+        asyncio.run(async_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
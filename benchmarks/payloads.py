@@ -0,0 +1,102 @@
+"""Recorded payload fixtures shared by the benchmarks.
+
+Fixtures live in `fixtures/` as one JSON file per request name, and replay
+streams as JSON lines of `{"time", "name", "system_id", "payload"}` records,
+`name` being the request name used by `api.py`.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+import json
+from pathlib import Path
+import re
+from typing import Any
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+REPLAY_FIXTURE = FIXTURES_DIR / "replay.jsonl"
+
+# Keys whose values identify the customer and are replaced when anonymizing.
+PERSONAL_KEYS = {
+    "address",
+    "city",
+    "customerId",
+    "email",
+    "firstName",
+    "lastName",
+    "latitude",
+    "longitude",
+    "phone",
+    "postalCode",
+    "serialNumber",
+    "street",
+    "zipCode",
+}
+
+
+def load_fixture(name: str) -> bytes:
+    """Return the raw body of the fixture recorded for a request name."""
+    return (FIXTURES_DIR / f"{name}.json").read_bytes()
+
+
+def iter_replay(path: Path = REPLAY_FIXTURE) -> Iterator[dict[str, Any]]:
+    """Yield the records of a replay stream in order."""
+    with path.open(encoding="utf-8") as stream:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+def rebase_market_price(payload: dict, start: datetime) -> dict:
+    """Shift a recorded market price chart so its first slot starts at `start`.
+
+    Recorded prices lie in the past, where the sensors would not show them.
+    """
+    data = (payload.get("energyMarket") or {}).get("data") or {}
+    if not data:
+        return payload
+    first = min(datetime.fromisoformat(ts.replace("Z", "+00:00")) for ts in data)
+    shift = (
+        start.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        - first
+    )
+    return {
+        **payload,
+        "energyMarket": {
+            **payload["energyMarket"],
+            "data": {_shift(ts, shift): value for ts, value in data.items()},
+        },
+    }
+
+
+def _shift(ts: str, shift: timedelta) -> str:
+    """Return an ISO8601 timestamp moved by `shift`, keeping a `Z` suffix."""
+    moved = datetime.fromisoformat(ts.replace("Z", "+00:00")) + shift
+    if ts.endswith("Z"):
+        return moved.strftime("%Y-%m-%dT%H:%MZ")
+    return moved.isoformat()
+
+
+def anonymize(payload: Any, system_ids: dict[str, str]) -> Any:
+    """Replace system ids and personal data in a recorded payload.
+
+    `system_ids` maps the real ids to their placeholders and is extended with
+    new ids found in `systems` listings.
+    """
+    if isinstance(payload, dict):
+        if "id" in payload and "systemName" in payload:
+            placeholder = system_ids.setdefault(
+                payload["id"], f"system-{len(system_ids)}"
+            )
+            payload = {**payload, "systemName": f"Anonymized {placeholder}"}
+        return {
+            key: "REDACTED" if key in PERSONAL_KEYS else anonymize(value, system_ids)
+            for key, value in payload.items()
+        }
+    if isinstance(payload, list):
+        return [anonymize(value, system_ids) for value in payload]
+    if isinstance(payload, str) and system_ids:
+        pattern = "|".join(re.escape(system_id) for system_id in system_ids)
+        return re.sub(pattern, lambda match: system_ids[match.group(0)], payload)
+    return payload
@@ -0,0 +1,178 @@
+"""Record anonymized API payloads as a replay stream and fixtures.
+
+Polls the live overview of every system of the account, and its market
+prices once, writing each response as a JSON line that `replay.py` can push
+through the integration offline. System ids, names and personal data are
+replaced. The token file is the one used by `exporter/fleet_exporter.py`.
+
+Without a token file, `--synthetic` writes a stream generated by
+`fake_api.py` instead, which is how the committed fixtures were made:
+
+    python benchmarks/record_payloads.py --token-file tokens.json --polls 120
+    python benchmarks/record_payloads.py --synthetic --polls 120 --fixtures
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+import json
+from pathlib import Path
+import random
+import sys
+from typing import Any
+
+from aiohttp import ClientSession
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "exporter"))
+
+from fake_api import live_overview_payload, market_price_payload  # noqa: E402
+from payloads import FIXTURES_DIR, REPLAY_FIXTURE, anonymize  # noqa: E402
+
+
+def record(time: datetime, name: str, system_id: str | None, payload: Any) -> dict:
+    """Return one replay record."""
+    return {
+        "time": time.isoformat(),
+        "name": name,
+        "system_id": system_id,
+        "payload": payload,
+    }
+
+
+def synthetic_records(polls: int, systems: int, interval: float) -> list[dict]:
+    """Return a stream of payloads generated like the fake API does."""
+    start = datetime(2025, 6, 1, 12, tzinfo=timezone.utc)
+    system_ids = [f"system-{index}" for index in range(systems)]
+    records = [
+        record(
+            start,
+            "systems",
+            None,
+            {
+                "data": [
+                    {"id": system_id, "systemName": f"Anonymized {system_id}"}
+                    for system_id in system_ids
+                ]
+            },
+        )
+    ]
+    records.extend(
+        record(start, "market_price", system_id, market_price_payload(start))
+        for system_id in system_ids
+    )
+    for poll in range(polls):
+        time = start + timedelta(seconds=poll * interval)
+        records.extend(
+            record(time, "live_overview", system_id, live_overview_payload())
+            for system_id in system_ids
+        )
+    return records
+
+
+async def async_recorded_records(args: argparse.Namespace) -> list[dict]:
+    """Poll the real API and return the anonymized responses."""
+    from fleet_exporter import load_integration
+
+    integration = load_integration()
+    token_data = json.loads(Path(args.token_file).read_text())
+    base_url = integration.api.API_BASE_URL
+    system_ids: dict[str, str] = {}
+    records = []
+    async with ClientSession() as session:
+        api_client = integration.api.OneKomma5GradApi(
+            session, token_data["access_token"]
+        )
+        api_client.token_manager = integration.auth.TokenManager(
+            token_data, api_client.async_token_refresh
+        )
+
+        now = datetime.now(timezone.utc)
+        systems = await api_client.async_get_systems()
+        records.append(record(now, "systems", None, anonymize(systems, system_ids)))
+        today = now.astimezone().strftime("%Y-%m-%d")
+        for system_id, placeholder in list(system_ids.items()):
+            prices = await api_client.async_get_data(
+                f"{base_url}/api/v1/systems/{system_id}/charts/market-prices"
+                f"?from={today}&resolution=1h"
+            )
+            records.append(
+                record(now, "market_price", placeholder, anonymize(prices, system_ids))
+            )
+
+        for poll in range(args.polls):
+            if poll:
+                await asyncio.sleep(args.interval)
+            now = datetime.now(timezone.utc)
+            for system_id, placeholder in system_ids.items():
+                # Bypass the response cache, every poll is recorded.
+                payload = await api_client.async_get_data(
+                    f"{base_url}/api/v3/systems/{system_id}/live-overview"
+                )
+                records.append(
+                    record(
+                        now,
+                        "live_overview",
+                        placeholder,
+                        anonymize(payload, system_ids),
+                    )
+                )
+            print(f"poll {poll + 1}/{args.polls}", file=sys.stderr)
+    return records
+
+
+def write_fixtures(records: list[dict]) -> None:
+    """Write the first payload of each request name as a JSON fixture."""
+    written = set()
+    for entry in records:
+        if entry["name"] in written:
+            continue
+        written.add(entry["name"])
+        (FIXTURES_DIR / f"{entry['name']}.json").write_text(
+            json.dumps(entry["payload"], indent=2) + "\n", encoding="utf-8"
+        )
+
+
+def main() -> None:
+    """Parse arguments and record."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--token-file", help="JSON file with tokens")
+    source.add_argument(
+        "--synthetic", action="store_true", help="generate payloads offline"
+    )
+    parser.add_argument("--polls", type=int, default=120, help="live overview polls")
+    parser.add_argument(
+        "--interval", type=float, default=30, help="seconds between polls"
+    )
+    parser.add_argument(
+        "--systems", type=int, default=1, help="systems of a synthetic stream"
+    )
+    parser.add_argument("--seed", type=int, default=1, help="synthetic random seed")
+    parser.add_argument(
+        "--output", type=Path, default=REPLAY_FIXTURE, help="replay stream to write"
+    )
+    parser.add_argument(
+        "--fixtures", action="store_true", help="also write the JSON fixtures"
+    )
+    args = parser.parse_args()
+
+    if args.synthetic:
+        random.seed(args.seed)
+        records = synthetic_records(args.polls, args.systems, args.interval)
+    else:
+        records = asyncio.run(async_recorded_records(args))
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with args.output.open("w", encoding="utf-8") as stream:
+        for entry in records:
+            stream.write(json.dumps(entry, separators=(",", ":")) + "\n")
+    if args.fixtures:
+        write_fixtures(records)
+    print(f"wrote {len(records)} records to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
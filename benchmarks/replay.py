@@ -0,0 +1,153 @@
+"""Replay a recorded payload stream through the coordinator and entities.
+
+Sets up a config entry in a bare Home Assistant core whose API client
+answers from a replay stream instead of the network, then runs one live
+overview update per recorded poll back to back. Reports the wall time of
+each update, including the state writes of the entities, and how many
+states were written. The recorded timestamps only order the stream; the
+updates run on the wall clock.
+
+Requires Home Assistant to be installed in the current environment:
+
+    python benchmarks/replay.py
+    python benchmarks/replay.py --stream recorded.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import datetime, timezone
+import importlib
+from itertools import groupby
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import EVENT_STATE_CHANGED
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_startup import DOMAIN, async_setup_hass, make_entry  # noqa: E402
+from payloads import REPLAY_FIXTURE, iter_replay, rebase_market_price  # noqa: E402
+
+
+class ReplaySource:
+    """Serve the API client's requests from a recorded stream."""
+
+    def __init__(self, records: list[dict]) -> None:
+        """Split the stream into static responses and live overview polls."""
+        self.systems: dict = {"data": []}
+        self.market_prices: dict[str, dict] = {}
+        live_overviews = []
+        for record in records:
+            if record["name"] == "systems":
+                self.systems = record["payload"]
+            elif record["name"] == "market_price":
+                self.market_prices[record["system_id"]] = rebase_market_price(
+                    record["payload"], datetime.now(timezone.utc)
+                )
+            elif record["name"] == "live_overview":
+                live_overviews.append(record)
+        # One poll holds the live overview of every system recorded at once.
+        self.polls = [
+            {record["system_id"]: record["payload"] for record in poll}
+            for _, poll in groupby(live_overviews, key=lambda record: record["time"])
+        ]
+        self.system_ids = list(self.polls[0]) if self.polls else []
+        self.current = self.polls[0] if self.polls else {}
+
+    def patch(self, api_client_class, price_timeline_class) -> None:
+        """Replace the request methods of the API client class."""
+        source = self
+
+        async def async_get_live_overview(client, system_id: str) -> dict:
+            return source.current[system_id]
+
+        async def async_get_systems(client) -> dict:
+            return source.systems
+
+        async def async_get_market_price(client, system_id: str):
+            payload = source.market_prices.get(system_id)
+            return price_timeline_class.from_chart(payload) if payload else None
+
+        async def async_get_chart(client, *args, **kwargs) -> dict:
+            return {}
+
+        api_client_class.async_get_live_overview = async_get_live_overview
+        api_client_class.async_get_systems = async_get_systems
+        api_client_class.async_get_market_price = async_get_market_price
+        api_client_class.async_get_chart = async_get_chart
+
+
+async def async_main(args: argparse.Namespace) -> None:
+    """Run the replay."""
+    source = ReplaySource(list(iter_replay(args.stream)))
+    if not source.polls:
+        raise SystemExit(f"No live overview records in {args.stream}")
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await async_setup_hass(config_dir)
+        api = importlib.import_module(f"custom_components.{DOMAIN}.api")
+        price = importlib.import_module(f"custom_components.{DOMAIN}.price")
+        source.patch(api.OneKomma5GradApi, price.PriceTimeline)
+
+        entry = make_entry(*source.system_ids)
+        await hass.config_entries.async_add(entry)
+        if entry.state is not ConfigEntryState.LOADED:
+            raise RuntimeError(f"Setup failed: {entry.state}")
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+        entities = len(hass.states.async_entity_ids("sensor"))
+
+        state_writes = 0
+
+        def count_state_write(event) -> None:
+            nonlocal state_writes
+            state_writes += 1
+
+        hass.bus.async_listen(EVENT_STATE_CHANGED, count_state_write)
+
+        durations = []
+        for _ in range(args.loops):
+            for poll in source.polls[1:]:
+                source.current = poll
+                start = time.perf_counter()
+                await coordinator.async_refresh()
+                await hass.async_block_till_done()
+                durations.append(time.perf_counter() - start)
+
+        await hass.async_stop()
+
+    durations.sort()
+    print(f"stream: {args.stream}")
+    print(f"systems: {len(source.system_ids)}, sensors: {entities}")
+    print(f"updates replayed: {len(durations)}")
+    print(
+        f"update wall time: mean {statistics.mean(durations) * 1000:.3f} ms, "
+        f"p50 {durations[len(durations) // 2] * 1000:.3f} ms, "
+        f"p95 {durations[int(len(durations) * 0.95)] * 1000:.3f} ms, "
+        f"max {durations[-1] * 1000:.3f} ms"
+    )
+    print(
+        f"state writes: {state_writes} ({state_writes / len(durations):.1f} per update)"
+    )
+
+
+def main() -> None:
+    """Parse arguments and run the replay."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--stream", type=Path, default=REPLAY_FIXTURE, help="JSONL replay stream"
+    )
+    parser.add_argument(
+        "--loops", type=int, default=1, help="times the stream is replayed"
+    )
+    asyncio.run(async_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
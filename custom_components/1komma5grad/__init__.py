@@ -2,106 +2,236 @@
 
 from __future__ import annotations
 
+import asyncio
 from datetime import timedelta
+from functools import partial
 import logging
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.event import async_track_time_interval
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.helpers.typing import ConfigType
 
 from . import api
-from .const import DOMAIN
+from .auth import TokenManager, account_id
+from .const import (
+    CONF_COMBINED_UPDATES,
+    CONF_ENERGY_HISTORY,
+    CONF_MAX_POLL_INTERVAL,
+    CONF_MIN_POLL_INTERVAL,
+    CONF_SYSTEM_IDS,
+    CONF_SYSTEMS,
+    DEFAULT_COMBINED_UPDATES,
+    DEFAULT_ENERGY_HISTORY,
+    DEFAULT_MAX_POLL_INTERVAL,
+    DEFAULT_MIN_POLL_INTERVAL,
+    DOMAIN,
+    ENERGY_HISTORY_AVAILABLE,
+    HISTORY_UPDATE_INTERVAL,
+)
+from .history import HistoryBackfill, async_remove_history
+from .poller import SystemsPoller, async_fetch_system_names
+from .registry import async_get_registry
+from .services import async_setup_services
+from .store import async_get_snapshot_store, async_remove_snapshot
 
 # Define supported platforms.
 _PLATFORMS: list[Platform] = [Platform.SENSOR]
 
-# Define a type alias for our ConfigEntry if desired.
-# type OneKommaFive_NameConfigEntry = ConfigEntry[api.AsyncConfigEntryAuth]
-
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the 1Komma5Grad services."""
+    async_setup_services(hass)
+    return True
+
+
+def entry_system_ids(entry: ConfigEntry) -> list[str]:
+    """Return the ids of the systems monitored by a config entry.
+
+    Entries created before several systems were supported only hold the
+    system picked in the config flow.
+    """
+    system_ids = (
+        entry.options.get(CONF_SYSTEMS)
+        or entry.data.get(CONF_SYSTEM_IDS)
+        or [entry.data.get("system_id")]
+    )
+    return [system_id for system_id in system_ids if system_id]
+
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Set up 1Komma5Grad from a config entry."""
     # --- Extract required data ---
     access_token = config_entry.data.get("access_token")
     refresh_token = config_entry.data.get("refresh_token")
-    system_id = config_entry.options.get(
-        "system_id", config_entry.data.get("system_id")
-    )
-    if not access_token or not system_id or not refresh_token:
+    system_ids = entry_system_ids(config_entry)
+    if not access_token or not system_ids or not refresh_token:
         _LOGGER.error(
             "Missing access token, refresh token or system id or in config entry"
         )
         return False
 
-    async def async_refresh_tokens():
-        """Call API to refresh tokens and update the config entry."""
-        new_token_data = await api_client.async_token_refresh(refresh_token)
-        if new_token_data:
-            hass.config_entries.async_update_entry(
-                config_entry,
-                data={**config_entry.data, **new_token_data},
-            )
-            api_client.access_token = new_token_data.get("access_token")
-        return new_token_data
-
-    # --- Create the API client ---
-    api_client = api.OneKomma5GradApi(hass, access_token)
-
-    # Check if the token is still valid.
-    try:
-        await api_client.async_get_live_overview(system_id)
-    except Exception as err:
-        _LOGGER.info("Access token invalid or expired, refreshing tokens: %s", err)
-        new_token_data = await api_client.async_token_refresh(refresh_token)
-        # Update the config entry with the new token data.
-        hass.config_entries.async_update_entry(
-            config_entry,
-            data={**config_entry.data, **new_token_data},
+    entry_id = config_entry.entry_id
+    shared = async_get_registry(hass)
+
+    # --- Get the API client of the account ---
+    # All systems and entries of an account share one client, token manager
+    # and connection pool. The token manager refreshes the access token
+    # shortly before it expires and retries requests rejected with 401, so no
+    # probe request is needed. Tokens without an account are not shared.
+    account = account_id(config_entry.data) or entry_id
+    account_key = ("account", account)
+
+    @callback
+    def async_save_tokens(token_data: dict) -> None:
+        """Persist refreshed tokens in every config entry of the account."""
+        for account_entry_id in shared.entry_ids(account_key):
+            if entry := hass.config_entries.async_get_entry(account_entry_id):
+                hass.config_entries.async_update_entry(
+                    entry, data={**entry.data, **token_data}
+                )
+
+    api_client = shared.acquire(account_key, entry_id)
+    if api_client is None:
+        api_client = api.OneKomma5GradApi(async_get_clientsession(hass), access_token)
+        api_client.token_manager = TokenManager(
+            config_entry.data, api_client.async_token_refresh, async_save_tokens
         )
-        # Update the API client’s access token.
-        api_client.access_token = new_token_data.get("access_token")
+        shared.add(account_key, entry_id, api_client)
+    config_entry.async_on_unload(partial(shared.async_release, account_key, entry_id))
 
-    # --- Create DataUpdateCoordinator for Live Overview ---
-    coordinator = DataUpdateCoordinator(
-        hass,
-        logger=_LOGGER,
-        name="1Komma5Grad Live Overview",
-        update_method=lambda: api_client.async_get_live_overview(system_id),
-        update_interval=timedelta(seconds=30),
+    # --- Get the poller of the account ---
+    # The systems of all entries of an account with the same poll settings
+    # are polled together, in one cycle. Systems new to the poller are
+    # restored from the entry's snapshot, and the entry only waits for a
+    # first refresh if none of its systems has data yet.
+    min_interval = timedelta(
+        seconds=config_entry.options.get(
+            CONF_MIN_POLL_INTERVAL, DEFAULT_MIN_POLL_INTERVAL
+        )
     )
-    await coordinator.async_config_entry_first_refresh()
-
-    # --- Create DataUpdateCoordinator for Market Price ---
-    market_price_coordinator = DataUpdateCoordinator(
-        hass,
-        _LOGGER,
-        name="1Komma5Grad Market Price",
-        update_method=lambda: api_client.async_get_market_price(system_id),
-        update_interval=timedelta(seconds=30),  # adjust as needed
+    max_interval = timedelta(
+        seconds=config_entry.options.get(
+            CONF_MAX_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL
+        )
     )
-    await market_price_coordinator.async_config_entry_first_refresh()
+    combined = config_entry.options.get(CONF_COMBINED_UPDATES, DEFAULT_COMBINED_UPDATES)
+    poller_key = ("poller", account, min_interval, max_interval, combined)
+    snapshot_store = async_get_snapshot_store(hass, entry_id)
+    # Unload callbacks run last to first: the entry unsubscribes, the poller
+    # is released, then the store's pending write is flushed so a reload
+    # reads it back.
+    config_entry.async_on_unload(snapshot_store.async_flush)
+    async with shared.lock(poller_key):
+        poller: SystemsPoller | None = shared.acquire(poller_key, entry_id)
+        if poller is None:
+            poller = SystemsPoller(
+                hass, api_client, min_interval, max_interval, combined
+            )
+            shared.add(poller_key, entry_id, poller, poller.async_shutdown)
+        config_entry.async_on_unload(
+            partial(shared.async_release, poller_key, entry_id)
+        )
+        added = poller.async_subscribe(entry_id, system_ids, snapshot_store)
+        config_entry.async_on_unload(partial(poller.async_unsubscribe, entry_id))
+
+        # --- First refreshes ---
+        # Only the live overview is required to set up the entities. The
+        # market price is fetched in the background, or with the live
+        # overview for combined updates; its sensor stays unavailable until
+        # a timeline is known.
+        if added:
+            poller.restore(await snapshot_store.async_load(), added)
+            if not combined:
+                config_entry.async_create_background_task(
+                    hass,
+                    poller.market_price_coordinator.async_refresh(),
+                    f"{DOMAIN} market price first refresh",
+                )
+        first_refreshes = []
+        data = poller.coordinator.data or {}
+        if not any(system_id in data for system_id in system_ids):
+            # Nothing was restored, or the entry that added the systems
+            # failed to set up.
+            first_refreshes.append(poller.coordinator.async_refresh())
+        elif added:
+            config_entry.async_create_background_task(
+                hass,
+                poller.coordinator.async_refresh(),
+                f"{DOMAIN} live overview refresh",
+            )
+        system_names, *_ = await asyncio.gather(
+            async_fetch_system_names(api_client, system_ids), *first_refreshes
+        )
+        # A system that fails stays unavailable until its next update, the
+        # entry is only retried if none of its systems has data.
+        data = poller.coordinator.data or {}
+        if not any(system_id in data for system_id in system_ids):
+            error = poller.coordinator.last_exception
+            raise ConfigEntryNotReady(
+                f"Error fetching live overview: {error}"
+            ) from error
 
-    # --- Create Token Refresh via Manually Scheduled Task ---
-    async def token_refresh_task(now):
-        try:
-            await async_refresh_tokens()  # your async refresh function
-        except Exception as err:
-            _LOGGER.error("Error in scheduled token refresh: %s", err)
+    # --- Import energy history ---
+    # Statistics for the hours before the integration was set up, and for
+    # any hours missed while it was not running, come from the history charts.
+    # Entries monitoring the same system share its backfill, whose lock and
+    # watermarks make a run started by another entry a no-op. Entries that
+    # enabled it before the option was withdrawn do not import either.
+    if ENERGY_HISTORY_AVAILABLE and config_entry.options.get(
+        CONF_ENERGY_HISTORY, DEFAULT_ENERGY_HISTORY
+    ):
+        histories = []
+        for system_id in system_ids:
+            history_key = ("history", system_id)
+            history = shared.acquire(history_key, entry_id)
+            if history is None:
+                history = HistoryBackfill(hass, api_client, system_id)
+                shared.add(history_key, entry_id, history)
+            config_entry.async_on_unload(
+                partial(shared.async_release, history_key, entry_id)
+            )
+            histories.append(history)
+
+        async def async_import_history(now=None) -> None:
+            """Import the energy history of one system after the other."""
+            for history in histories:
+                await history.async_run()
 
-    async_track_time_interval(hass, token_refresh_task, timedelta(seconds=43200))
+        config_entry.async_create_background_task(
+            hass, async_import_history(), f"{DOMAIN} history backfill"
+        )
+        config_entry.async_on_unload(
+            async_track_time_interval(
+                hass, async_import_history, HISTORY_UPDATE_INTERVAL
+            )
+        )
 
     # --- Store integration data ---
-    hass.data.setdefault(DOMAIN, {})[config_entry.entry_id] = {
-        "coordinator": coordinator,
-        "market_price_coordinator": market_price_coordinator,
-        "token_refresh_task": token_refresh_task,
+    hass.data.setdefault(DOMAIN, {})[entry_id] = {
+        "coordinator": poller.coordinator,
+        "market_price_coordinator": poller.market_price_coordinator,
+        "system_ids": system_ids,
+        "system_names": system_names,
+        "energy": {system_id: poller.energy[system_id] for system_id in system_ids},
+        "costs": {system_id: poller.costs[system_id] for system_id in system_ids},
+        "token_manager": api_client.token_manager,
+        "snapshot_store": snapshot_store,
         "api": api_client,
-        # You can add additional coordinators here later
+        "poller": poller,
+        "options": dict(config_entry.options),
     }
+    config_entry.async_on_unload(
+        config_entry.add_update_listener(async_reload_on_options_change)
+    )
 
     # --- Forward setup to sensor platform ---
     await hass.config_entries.async_forward_entry_setups(config_entry, ["sensor"])
@@ -109,9 +239,42 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
     return True
 
 
+async def async_reload_on_options_change(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> None:
+    """Reload the entry when its options change.
+
+    Token refreshes also update the entry, but only touch its data.
+    """
+    runtime_data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if runtime_data is None or runtime_data["options"] == dict(entry.options):
+        return
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, _PLATFORMS)
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id, None)
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the last-known data of a deleted config entry."""
+    await async_remove_snapshot(hass, entry.entry_id)
+    # The history of a system belongs to every entry monitoring it.
+    monitored = {
+        system_id
+        for other_entry in hass.config_entries.async_entries(DOMAIN)
+        if other_entry.entry_id != entry.entry_id
+        for system_id in entry_system_ids(other_entry)
+    }
+    await async_remove_history(
+        hass,
+        [
+            system_id
+            for system_id in entry_system_ids(entry)
+            if system_id not in monitored
+        ],
+    )
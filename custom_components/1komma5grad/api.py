@@ -1,86 +1,436 @@
-"""API for 1Komma5Grad bound to Home Assistant OAuth."""
+"""API client for 1Komma5Grad.
 
-from asyncio import run_coroutine_threadsafe
+Only depends on aiohttp, so it can be used outside Home Assistant.
+"""
+
+import asyncio
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from http import HTTPStatus
 import logging
+import time
+from typing import Any
 
-from aiohttp import ClientSession
-
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import config_entry_oauth2_flow
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from aiohttp import ClientResponseError, ClientSession, ClientTimeout
 
-from .const import API_BASE_URL, OAUTH2_TOKEN
+from .auth import TokenManager
+from .const import (
+    API_BASE_URL,
+    API_CACHE_TTL,
+    API_DEFAULT_TIMEOUT,
+    API_HEDGE_MIN_DELAY,
+    API_HEDGE_MIN_SAMPLES,
+    API_HEDGE_PERCENTILE,
+    API_HEDGED_REQUESTS,
+    API_PROJECTIONS,
+    API_RETRY_ATTEMPTS,
+    API_RETRY_MAX_DELAY,
+    API_TIMEOUT,
+    OAUTH2_TOKEN,
+)
+from .metrics import EndpointMetrics
+from .price import PriceTimeline
+from .resilience import (
+    STATE_CLOSED,
+    CircuitBreaker,
+    backoff_delay,
+    is_transient,
+    retry_after,
+)
 
-# TODO the following two API examples are based on our suggested best practices
-# for libraries using OAuth2 with requests or aiohttp. Delete the one you won't use.
-# For more info see the docs at https://developers.home-assistant.io/docs/api_lib_auth/#oauth2.
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class ConfigEntryAuth:
-    """Provide 1Komma5Grad authentication tied to an OAuth2 based config entry."""
+def project(data: Any, projection: Any) -> Any:
+    """Return only the fields of decoded JSON named by a projection.
+
+    See `API_PROJECTIONS` for the format.
+    """
+    if projection is True:
+        return data
+    if isinstance(data, list):
+        return [project(item, projection) for item in data]
+    if not isinstance(data, dict):
+        return data
+    if "*" in projection:
+        return {key: project(value, projection["*"]) for key, value in data.items()}
+    # Kept fields are copied inline, most of a projection's leaves are True.
+    return {
+        key: data[key]
+        if field_projection is True
+        else project(data[key], field_projection)
+        for key, field_projection in projection.items()
+        if key in data
+    }
+
+
+@dataclass(slots=True)
+class ApiResponse:
+    """Decoded response body with timing and size metadata."""
+
+    data: Any
+    status: int
+    size: int
+    elapsed: float
+    decode_time: float
+
+
+class OneKomma5GradApi:
+    """Client for the 1Komma5Grad API on a caller-provided aiohttp session.
+
+    GET responses are shared: concurrent requests for the same URL wait for
+    one in-flight request, and responses are reused for the endpoint's TTL
+    in `API_CACHE_TTL`. Callers must not modify the returned data.
+
+    Every call has a deadline from `API_TIMEOUT` that bounds its retries.
+    Transient failures of GET requests are retried, and all API requests go
+    through a circuit breaker shared by every system of the client, unless
+    the caller passes its own. Slow
+    requests listed in `API_HEDGED_REQUESTS` are hedged with a second one.
+    Responses are trimmed to the fields in `API_PROJECTIONS` once decoded.
+    Counters and latencies are kept per request name in `metrics`.
+    """
 
     def __init__(
         self,
-        hass: HomeAssistant,
-        oauth_session: config_entry_oauth2_flow.OAuth2Session,
-    ) -> None:
-        """Initialize 1Komma5Grad Auth."""
-        self.hass = hass
-        self.session = oauth_session
-        super().__init__(self.session.token)
+        session: ClientSession,
+        access_token: str,
+        token_manager: TokenManager | None = None,
+    ):
+        self.session = session
+        self.access_token = access_token
+        self.token_manager = token_manager
+        self._cache: dict[tuple, tuple[float, ApiResponse]] = {}
+        self._in_flight: dict[tuple, asyncio.Future[ApiResponse]] = {}
+        self.circuit = CircuitBreaker()
+        self.metrics: dict[str, EndpointMetrics] = {}
+
+    def _metrics(self, name: str) -> EndpointMetrics:
+        """Return the metrics of a request name."""
+        metrics = self.metrics.get(name)
+        if metrics is None:
+            metrics = self.metrics[name] = EndpointMetrics()
+        return metrics
 
-    def refresh_tokens(self) -> str:
-        """Refresh and return new 1Komma5Grad tokens using Home Assistant OAuth2 session."""
-        run_coroutine_threadsafe(
-            self.session.async_ensure_token_valid(), self.hass.loop
-        ).result()
+    async def _async_get_access_token(self) -> str:
+        """Return the access token, letting the token manager refresh it first."""
+        if self.token_manager is not None:
+            self.access_token = await self.token_manager.async_get_access_token()
+        return self.access_token
 
-        return self.session.token["access_token"]
+    async def _async_request(
+        self,
+        method: str,
+        url: str,
+        *,
+        name: str,
+        params: dict | None = None,
+        json: dict | None = None,
+        auth: bool = True,
+        circuit: CircuitBreaker | None = None,
+    ) -> ApiResponse:
+        """Send a request and decode its JSON body exactly once.
 
+        Injects the bearer token unless `auth` is False and retries once with
+        a refreshed token if the API answers 401. Authenticated requests are
+        rejected while `circuit`, or the client's circuit, is open. The raw body is only written to
+        the log, and the decoded body only kept whole rather than projected,
+        when debug logging is enabled.
+        """
+        metrics = self._metrics(name)
+        circuit = circuit or self.circuit
+        if auth:
+            circuit.before_call()
+        try:
+            result = await self._async_exchange(
+                method, url, name, params, json, auth, circuit
+            )
+        except Exception as err:
+            metrics.record_failure(err)
+            if not auth:
+                raise
+            if is_transient(err):
+                circuit.record_failure(err)
+            else:
+                # The API answered, it just did not like the request.
+                circuit.record_success()
+            raise
+        except BaseException:
+            if auth:
+                circuit.release()
+            raise
+        metrics.record_response(result.size, result.decode_time)
+        if auth:
+            circuit.record_success()
+        return result
 
-class AsyncConfigEntryAuth:
-    """Provide 1Komma5Grad authentication tied to an OAuth2 based config entry."""
+    async def _async_exchange(
+        self,
+        method: str,
+        url: str,
+        name: str,
+        params: dict | None,
+        json: dict | None,
+        auth: bool,
+        circuit: CircuitBreaker,
+    ) -> ApiResponse:
+        """Send a request, refreshing the token on 401, and decode the body."""
+        headers = None
+        if auth:
+            token = await self._async_get_access_token()
+            headers = {"Authorization": f"Bearer {token}"}
+        start = time.perf_counter()
+        try:
+            body, status = await self._async_send_retrying(
+                method, url, name, params, json, headers, circuit
+            )
+        except ClientResponseError as err:
+            if err.status != HTTPStatus.UNAUTHORIZED or self.token_manager is None:
+                raise
+            _LOGGER.debug("%s %s: token rejected, refreshing", method, name)
+            self.access_token = await self.token_manager.async_refresh(token)
+            headers = {"Authorization": f"Bearer {self.access_token}"}
+            start = time.perf_counter()
+            body, status = await self._async_send_retrying(
+                method, url, name, params, json, headers, circuit
+            )
+        received = time.perf_counter()
+        data = json_loads(body) if body else None
+        projection = API_PROJECTIONS.get(name)
+        if projection is not None and not _LOGGER.isEnabledFor(logging.DEBUG):
+            data = project(data, projection)
+        decoded = time.perf_counter()
 
-    def __init__(
+        result = ApiResponse(
+            data=data,
+            status=status,
+            size=len(body),
+            elapsed=received - start,
+            decode_time=decoded - received,
+        )
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "%s %s: HTTP %s, %d bytes in %.1f ms (decode %.2f ms): %s",
+                method,
+                name,
+                status,
+                result.size,
+                result.elapsed * 1000,
+                result.decode_time * 1000,
+                body.decode("utf-8", "replace"),
+            )
+        return result
+
+    async def _async_get(
         self,
-        websession: ClientSession,
-        oauth_session: config_entry_oauth2_flow.OAuth2Session,
+        url: str,
+        *,
+        name: str,
+        params: dict | None = None,
+        circuit: CircuitBreaker | None = None,
+    ) -> ApiResponse:
+        """Send a GET request, or share a cached or in-flight response."""
+        key = (url, tuple(sorted(params.items())) if params else ())
+        cached = self._cache.get(key)
+        if cached is not None:
+            if cached[0] > time.monotonic():
+                self._metrics(name).cache_hits += 1
+                return cached[1]
+            del self._cache[key]
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is None:
+            in_flight = asyncio.ensure_future(
+                self._async_request(
+                    "GET", url, name=name, params=params, circuit=circuit
+                )
+            )
+            self._in_flight[key] = in_flight
+            in_flight.add_done_callback(
+                lambda future: self._async_store(key, name, future)
+            )
+        else:
+            _LOGGER.debug("GET %s: joining in-flight request", name)
+            self._metrics(name).shared += 1
+        # Shielded, so a cancelled caller does not cancel the other waiters.
+        return await asyncio.shield(in_flight)
+
+    def _async_store(
+        self, key: tuple, name: str, future: asyncio.Future[ApiResponse]
     ) -> None:
-        """Initialize 1Komma5Grad auth."""
-        super().__init__(websession)
-        self._oauth_session = oauth_session
+        """Cache a finished response for the endpoint's TTL.
+
+        Expired responses are dropped here too, as keys like the market
+        prices of a past day are never read again.
+        """
+        self._in_flight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        ttl = API_CACHE_TTL.get(name)
+        if ttl:
+            now = time.monotonic()
+            for expired in [
+                cache_key
+                for cache_key, (expires_at, _) in self._cache.items()
+                if expires_at <= now
+            ]:
+                del self._cache[expired]
+            self._cache[key] = (now + ttl.total_seconds(), future.result())
 
-    async def async_get_access_token(self) -> str:
-        """Return a valid access token."""
-        await self._oauth_session.async_ensure_token_valid()
+    async def _async_send_retrying(
+        self,
+        method: str,
+        url: str,
+        name: str,
+        params: dict | None,
+        json: dict | None,
+        headers: dict | None,
+        circuit: CircuitBreaker,
+    ) -> tuple[bytes, int]:
+        """Send a request, retrying transient failures of GET requests.
 
-        return self._oauth_session.token["access_token"]
+        Waits for the `Retry-After` the API asks for, or an exponential
+        backoff with jitter. Longer waits than `API_RETRY_MAX_DELAY`, or than
+        what is left of the request's deadline, are not retried.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = (
+            loop.time() + API_TIMEOUT.get(name, API_DEFAULT_TIMEOUT).total_seconds()
+        )
+        attempts = API_RETRY_ATTEMPTS if method == "GET" else 1
+        attempt = 0
+        while True:
+            try:
+                return await self._async_send_hedged(
+                    method, url, name, params, json, headers, deadline - loop.time()
+                )
+            except Exception as err:
+                if attempt + 1 >= attempts or not is_transient(err):
+                    raise
+                delay = retry_after(err)
+                if delay is None:
+                    delay = backoff_delay(attempt)
+                elif delay > API_RETRY_MAX_DELAY.total_seconds():
+                    raise
+                if loop.time() + delay >= deadline:
+                    raise
+                _LOGGER.debug(
+                    "%s %s failed (%s), retrying in %.1f s", method, name, err, delay
+                )
+            attempt += 1
+            circuit.retries += 1
+            await asyncio.sleep(delay)
 
+    async def _async_send_hedged(
+        self,
+        method: str,
+        url: str,
+        name: str,
+        params: dict | None,
+        json: dict | None,
+        headers: dict | None,
+        timeout: float,
+    ) -> tuple[bytes, int]:
+        """Send a request, and a second one if the first is unusually slow.
 
-class OneKomma5GradApi:
-    """Client for the 1Komma5Grad API."""
+        Only requests in `API_HEDGED_REQUESTS` are hedged, and only while the
+        circuit is closed, so an unhealthy API does not get twice the load.
+        The first successful response wins and the other request is cancelled.
+        """
+        metrics = self._metrics(name)
+        latency = metrics.latency
+        hedge_delay = None
+        if name in API_HEDGED_REQUESTS and self.circuit.state == STATE_CLOSED:
+            percentile = latency.percentile(API_HEDGE_PERCENTILE, API_HEDGE_MIN_SAMPLES)
+            if percentile is not None:
+                hedge_delay = max(percentile, API_HEDGE_MIN_DELAY.total_seconds())
 
-    def __init__(self, hass, access_token: str):
-        self.hass = hass
-        self.access_token = access_token
-        self.session = async_get_clientsession(hass)
+        start = time.perf_counter()
+        if hedge_delay is None or hedge_delay >= timeout:
+            result = await self._async_send(method, url, params, json, headers, timeout)
+            latency.add(time.perf_counter() - start)
+            return result
+
+        primary = asyncio.ensure_future(
+            self._async_send(method, url, params, json, headers, timeout)
+        )
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            if done:
+                result = primary.result()
+                latency.add(time.perf_counter() - start)
+                return result
+
+            _LOGGER.debug(
+                "%s %s: no response after %.0f ms, sending a hedged request",
+                method,
+                name,
+                hedge_delay * 1000,
+            )
+            metrics.hedged += 1
+            hedge_start = time.perf_counter()
+            hedge = asyncio.ensure_future(
+                self._async_send(
+                    method, url, params, json, headers, timeout - hedge_delay
+                )
+            )
+            pending.add(hedge)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # Check every finished request, so no exception goes unretrieved.
+                winners = [task for task in done if task.exception() is None]
+                if winners:
+                    winner = winners[0]
+                    if winner is hedge:
+                        metrics.hedge_wins += 1
+                    latency.add(
+                        time.perf_counter()
+                        - (hedge_start if winner is hedge else start)
+                    )
+                    return winner.result()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise primary.exception()
+
+    async def _async_send(
+        self,
+        method: str,
+        url: str,
+        params: dict | None,
+        json: dict | None,
+        headers: dict | None,
+        timeout: float,
+    ) -> tuple[bytes, int]:
+        """Send a single request and return the raw body and status."""
+        async with self.session.request(
+            method,
+            url,
+            params=params,
+            json=json,
+            headers=headers,
+            timeout=ClientTimeout(total=timeout),
+        ) as response:
+            response.raise_for_status()
+            return await response.read(), response.status
 
     async def async_get_data(self, endpoint: str) -> dict:
         """Make an authenticated GET request to the API."""
-        headers = {"Authorization": f"Bearer {self.access_token}"}
-        async with self.session.get(endpoint, headers=headers) as response:
-            response.raise_for_status()
-            return await response.json()
+        response = await self._async_request("GET", endpoint, name=endpoint)
+        return response.data
 
     async def async_post_data(self, endpoint: str, data: dict) -> dict:
         """Make an authenticated POST request to the API."""
-        headers = {"Authorization": f"Bearer {self.access_token}"}
-        async with self.session.post(endpoint, json=data, headers=headers) as response:
-            response.raise_for_status()
-            return await response.json()
+        response = await self._async_request("POST", endpoint, name=endpoint, json=data)
+        return response.data
 
     async def async_token_refresh(self, refresh_token: str) -> dict:
         """Refresh token using the refresh token and update the config entry with new token data."""
@@ -89,68 +439,64 @@ class OneKomma5GradApi:
             "refresh_token": refresh_token,
             "client_id": "zJTm6GFGM5zHcmpl07xTsi6MP0TwRAw6",
         }
-        async with self.session.post(OAUTH2_TOKEN, json=payload) as response:
-            response.raise_for_status()
-            token_data = await response.json()
-            _LOGGER.debug("Token refresh response: %s", token_data)
-
-            # Update the config entry with the new token data.
-            # This requires that self._config_entry was saved during __init__.
-            return token_data
+        response = await self._async_request(
+            "POST", OAUTH2_TOKEN, name="token_refresh", json=payload, auth=False
+        )
+        return response.data
 
     async def async_get_live_overview(self, system_id: str) -> dict:
         """Fetch live overview data from the API."""
-        headers = {"Authorization": f"Bearer {self.access_token}"}
-        async with self.session.get(
-            f"{API_BASE_URL}/api/v3/systems/{system_id}/live-overview", headers=headers
-        ) as response:
-            response.raise_for_status()
-            _LOGGER.debug("Get Liveoverview - Response JSON: %s", await response.json())
-            return await response.json()
+        response = await self._async_get(
+            f"{API_BASE_URL}/api/v3/systems/{system_id}/live-overview",
+            name="live_overview",
+        )
+        return response.data
 
     async def async_get_systems(self) -> dict:
         """Fetch all systems."""
-        headers = {"Authorization": f"Bearer {self.access_token}"}
-        async with self.session.get(
-            f"{API_BASE_URL}/api/v2/systems", headers=headers
-        ) as response:
-            response.raise_for_status()
-            _LOGGER.debug("Get System - Response JSON: %s", await response.json())
-            return await response.json()
+        response = await self._async_get(
+            f"{API_BASE_URL}/api/v2/systems", name="systems"
+        )
+        return response.data
 
     # TODO I don't know if this is the correct value, can only check later.
-    async def async_get_market_price(self, system_id: str) -> dict:
-        """Fetch market prices for the system."""
-        headers = {"Authorization": f"Bearer {self.access_token}"}
-        async with self.session.get(
-            f"{API_BASE_URL}/api/v1/systems/{system_id}/charts/market-prices?from={datetime.now().strftime('%Y-%m-%d')}&resolution=1h",
-            headers=headers,
-        ) as response:
-            response.raise_for_status()
-            _LOGGER.debug("Get Market Price - Response JSON: %s", await response.json())
-            data = await response.json()
-            energy_market = data.get("energyMarket", {})
-            data_dict = energy_market.get("data", {})
-            if not data_dict:
-                return None
-            # Timestamps are ISO8601 strings that sort lexicographically.
-
-            sorted_keys = sorted(data_dict.keys())
-            now = datetime.now(
-                timezone.utc
-            )  # .strftime("%Y-%m-%dT%H:%MZ")  # Make now timezone-aware in UTC
-
-            for i, ts in enumerate(sorted_keys):
-                # Convert timestamp string to a timezone-aware datetime object.
-                ts_dt = datetime.fromisoformat(ts)
-                if now < ts_dt:
-                    # If this timestamp is in the future, choose the previous one if it exists.
-                    if ts_dt > now:
-                        # If now is before the first timestamp, return the first price.
-                        _LOGGER.debug("Current Price: %s", data_dict[ts].get("price"))
-                        return data_dict[sorted_keys[0]].get("price")
-            # If now is later than all timestamps, return the last one.
+    async def async_get_market_price(self, system_id: str) -> PriceTimeline | None:
+        """Fetch the day-ahead market price series for the system."""
+        response = await self._async_get(
+            f"{API_BASE_URL}/api/v1/systems/{system_id}/charts/market-prices",
+            name="market_price",
+            params={"from": datetime.now().strftime("%Y-%m-%d"), "resolution": "1h"},
+        )
+        timeline = PriceTimeline.from_chart(response.data)
+        if timeline is not None:
             _LOGGER.debug(
-                "Current Price 00:00: %s", {data_dict[sorted_keys[-1]].get("price")}
+                "Market price timeline with %s slots until %s",
+                len(timeline),
+                datetime.fromtimestamp(timeline.end, timezone.utc),
             )
-            return data_dict[sorted_keys[-1]].get("price")
+        return timeline
+
+    async def async_get_chart(
+        self,
+        system_id: str,
+        chart: str,
+        start: datetime,
+        end: datetime,
+        resolution: str,
+        circuit: CircuitBreaker | None = None,
+    ) -> dict:
+        """Fetch a historical chart of the system between `start` and `end`.
+
+        The path and parameters follow `charts/market-prices`.
+        """
+        response = await self._async_get(
+            f"{API_BASE_URL}/api/v1/systems/{system_id}/charts/{chart}",
+            name=f"chart_{chart}",
+            params={
+                "from": start.isoformat(),
+                "to": end.isoformat(),
+                "resolution": resolution,
+            },
+            circuit=circuit,
+        )
+        return response.data
@@ -0,0 +1,117 @@
+"""Access token handling for the 1Komma5Grad integration."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+from collections.abc import Awaitable, Callable
+import json
+import logging
+import time
+
+from .const import TOKEN_REFRESH_MARGIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def jwt_claims(token: str) -> dict:
+    """Return the claims of a JWT without verifying its signature."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+    except (AttributeError, IndexError, TypeError, ValueError):
+        return {}
+    return claims if isinstance(claims, dict) else {}
+
+
+def jwt_expiry(token: str) -> float | None:
+    """Return the `exp` claim of a JWT without verifying its signature."""
+    exp = jwt_claims(token).get("exp")
+    try:
+        return float(exp) if exp is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def account_id(token_data: dict) -> str | None:
+    """Return the account an access token was issued to, from its `sub` claim."""
+    subject = jwt_claims(token_data.get("access_token")).get("sub")
+    return str(subject) if subject else None
+
+
+def token_expiry(token_data: dict, issued_at: float | None = None) -> float | None:
+    """Return the expiry of an access token as epoch seconds.
+
+    Prefers a stored `expires_at`, then `expires_in` relative to `issued_at`
+    for freshly issued tokens, then the JWT `exp` claim.
+    """
+    if token_data.get("expires_at") is not None:
+        return float(token_data["expires_at"])
+    if issued_at is not None and token_data.get("expires_in") is not None:
+        return issued_at + float(token_data["expires_in"])
+    return jwt_expiry(token_data.get("access_token"))
+
+
+class TokenManager:
+    """Keep the access token valid and refresh it at most once at a time.
+
+    Callers share a lock, so concurrent requests hitting an expiring token
+    wait for one in-flight refresh instead of each refreshing on their own.
+    """
+
+    def __init__(
+        self,
+        token_data: dict,
+        refresh_method: Callable[[str], Awaitable[dict]],
+        on_refresh: Callable[[dict], None] | None = None,
+    ) -> None:
+        """Initialize the manager from stored token data."""
+        self.access_token: str = token_data["access_token"]
+        self.refresh_token: str = token_data["refresh_token"]
+        self.expires_at = token_expiry(token_data)
+        self._refresh_method = refresh_method
+        self._on_refresh = on_refresh
+        self._lock = asyncio.Lock()
+
+    def expires_soon(self) -> bool:
+        """Return True if the token expires within the refresh margin.
+
+        Tokens with an unknown lifetime are used until the API rejects them.
+        """
+        if self.expires_at is None:
+            return False
+        return time.time() + TOKEN_REFRESH_MARGIN.total_seconds() >= self.expires_at
+
+    async def async_get_access_token(self) -> str:
+        """Return a valid access token, refreshing it shortly before expiry."""
+        if not self.expires_soon():
+            return self.access_token
+        return await self.async_refresh(self.access_token)
+
+    async def async_refresh(self, failed_token: str | None = None) -> str:
+        """Refresh the access token and return the new one.
+
+        If `failed_token` is given and another caller already replaced it,
+        the current token is returned without a second refresh.
+        """
+        async with self._lock:
+            if failed_token is not None and failed_token != self.access_token:
+                return self.access_token
+
+            issued_at = time.time()
+            token_data = await self._refresh_method(self.refresh_token)
+            self.access_token = token_data["access_token"]
+            self.refresh_token = token_data.get("refresh_token", self.refresh_token)
+            self.expires_at = token_expiry(token_data, issued_at)
+            _LOGGER.debug("Access token refreshed, expires at %s", self.expires_at)
+
+            if self._on_refresh is not None:
+                self._on_refresh(
+                    {
+                        **token_data,
+                        "refresh_token": self.refresh_token,
+                        "expires_at": self.expires_at,
+                    }
+                )
+            return self.access_token
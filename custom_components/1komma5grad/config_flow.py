@@ -4,6 +4,7 @@ import base64
 import hashlib
 import logging
 import secrets
+import time
 from urllib.parse import urlencode
 
 import voluptuous as vol
@@ -12,9 +13,17 @@ from homeassistant import config_entries
 from homeassistant.components import persistent_notification
 from homeassistant.helpers import config_entry_oauth2_flow
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+import homeassistant.helpers.config_validation as cv
 
 from .api import OneKomma5GradApi
-from .const import DOMAIN, OAUTH2_AUTHORIZE, OAUTH2_TOKEN
+from .auth import token_expiry
+from .const import (
+    CONF_SYSTEM_IDS,
+    CONF_SYSTEMS,
+    DOMAIN,
+    OAUTH2_AUTHORIZE,
+    OAUTH2_TOKEN,
+)
 from .options_flow import OneKomma5GradOptionsFlowHandler
 
 
@@ -123,12 +132,16 @@ class OAuth2FlowHandler(
         persistent_notification.async_dismiss(self.hass, "1komma5grad_oauth")
         self.logger.debug(user_input)
         code = user_input["Authorization Code"]
+        issued_at = time.time()
         token_data = await self._exchange_code_for_token(code)
         token_data["auth_implementation"] = DOMAIN
 
         # Now that you have a valid token, create an API client.
-        self.api = OneKomma5GradApi(self.hass, token_data["access_token"])
+        self.api = OneKomma5GradApi(
+            async_get_clientsession(self.hass), token_data["access_token"]
+        )
         self._refresh_token = token_data["refresh_token"]
+        self._expires_at = token_expiry(token_data, issued_at)
 
         # Move to the system selection step.
         return await self.async_step_system()
@@ -157,8 +170,8 @@ class OAuth2FlowHandler(
         return self.async_create_entry(title="1Komma5Grad Account", data=data)
 
     async def async_step_system(self, user_input=None):
-        """Step to select a system to monitor."""
-        if user_input is None:
+        """Step to select the systems to monitor."""
+        if user_input is None or not user_input.get(CONF_SYSTEMS):
             # Fetch available systems from the API.
             try:
                 response = await self.api.async_get_systems()  # See API client below.
@@ -175,22 +188,34 @@ class OAuth2FlowHandler(
 
             schema = vol.Schema(
                 {
-                    vol.Required("System ID"): vol.In(self.system_options),
+                    vol.Required(
+                        CONF_SYSTEMS, default=list(self.system_options)
+                    ): cv.multi_select(self.system_options),
                 }
             )
-            return self.async_show_form(step_id="system", data_schema=schema)
+            return self.async_show_form(
+                step_id="system",
+                data_schema=schema,
+                errors={"base": "no_systems"} if user_input is not None else None,
+            )
 
-        # User has selected a system.
-        selected_system = user_input["System ID"]
+        # User has selected the systems.
+        selected_systems = user_input[CONF_SYSTEMS]
+        selected_system = selected_systems[0]
         # You can add the system id to your token data or separate config data.
         token_data = {
             "access_token": self.api.access_token,
             "refresh_token": self._refresh_token,
             "system_id": selected_system,
+            CONF_SYSTEM_IDS: selected_systems,
+            "expires_at": self._expires_at,
             "auth_implementation": DOMAIN,
         }
+        system_names = ", ".join(
+            self.system_options[system_id] for system_id in selected_systems
+        )
         return self.async_create_entry(
             title="1Komma5Grad Account",
-            description=f"Connected as {self.system_options[selected_system]}",
+            description=f"Connected as {system_names}",
             data=token_data,
         )
@@ -1,39 +1,183 @@
 """Constants for the 1Komma5Grad integration."""
 
+from datetime import timedelta
+
 DOMAIN = "1komma5grad"
 
+# hass.data key of the API clients and pollers shared by config entries.
+# hass.data[DOMAIN] maps entry ids to their runtime data.
+DATA_SHARED = f"{DOMAIN}_shared"
+# hass.data key of the snapshot store of each config entry, kept across
+# reloads so only one instance ever writes an entry's snapshot.
+DATA_SNAPSHOT_STORES = f"{DOMAIN}_snapshot_stores"
+
 # TODO Update with your own urls
 OAUTH2_AUTHORIZE = "https://auth.1komma5grad.com/authorize"
 OAUTH2_TOKEN = "https://auth.1komma5grad.com/oauth/token"
 
 API_BASE_URL = "https://heartbeat.1komma5grad.com"
 
+# How long GET responses are reused, by request name. Requests without an
+# entry are only shared while in flight.
+API_CACHE_TTL = {
+    "systems": timedelta(hours=1),
+    "live_overview": timedelta(seconds=5),
+    "market_price": timedelta(minutes=5),
+}
+
+# Fields of a response kept after decoding, by request name, so cached and
+# stored responses only hold what the sensors read. A projection maps keys to
+# the projection of their value, True keeps a value whole and "*" stands for
+# every key. Lists are projected item by item. Full responses are kept while
+# debug logging is enabled.
+API_PROJECTIONS = {
+    "live_overview": {
+        "summaryCards": {
+            "battery": {"power": True, "stateOfCharge": True},
+            "household": {"power": True},
+        },
+        "liveHeroView": {
+            "production": True,
+            "gridFeedIn": True,
+            "gridConsumption": True,
+        },
+    },
+    "market_price": {"energyMarket": {"data": {"*": {"price": True}}}},
+}
+
+# GET requests failing with a 5xx, 429, timeout or connection error are
+# retried up to API_RETRY_ATTEMPTS times in total, after an exponential backoff
+# with jitter or the Retry-After the API asks for. Longer waits are not
+# retried but open the circuit.
+API_RETRY_ATTEMPTS = 3
+API_RETRY_BACKOFF = timedelta(seconds=1)
+API_RETRY_MAX_DELAY = timedelta(seconds=30)
+# After this many failed requests in a row, requests are skipped for the
+# recovery time, which doubles with every failed probe up to the maximum.
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RECOVERY_TIME = timedelta(minutes=1)
+CIRCUIT_MAX_RECOVERY_TIME = timedelta(minutes=30)
+
+# Deadline of one API call, including its retries, by request name.
+API_TIMEOUT = {
+    "live_overview": timedelta(seconds=10),
+    "systems": timedelta(seconds=20),
+    "market_price": timedelta(seconds=20),
+}
+API_DEFAULT_TIMEOUT = timedelta(seconds=30)
+# Idempotent requests that send a second, hedged request once the first one
+# is slower than API_HEDGE_PERCENTILE of the endpoint's recent requests,
+# taking whichever answers first. Hedging starts after API_HEDGE_MIN_SAMPLES.
+API_HEDGED_REQUESTS = {"live_overview"}
+API_HEDGE_PERCENTILE = 0.95
+API_HEDGE_MIN_SAMPLES = 20
+API_HEDGE_MIN_DELAY = timedelta(milliseconds=200)
+
+# Latency and update duration percentiles cover this many recent samples.
+METRICS_WINDOW = 100
+
+SERVICE_FIND_CHEAPEST_WINDOW = "find_cheapest_window"
+
+# Systems monitored by an entry. The config flow stores the selection under
+# CONF_SYSTEM_IDS in the entry data, the options flow under CONF_SYSTEMS.
+CONF_SYSTEM_IDS = "system_ids"
+CONF_SYSTEMS = "System IDs"
+# At most this many systems are fetched at the same time.
+MAX_PARALLEL_REQUESTS = 4
+
+# Live overview polling adapts between these bounds (seconds), which can be
+# changed in the options flow. Power below the idle threshold (W) counts as
+# idle, changes above the activity threshold (W) switch to fast polling.
+CONF_MIN_POLL_INTERVAL = "Minimum Poll Interval"
+CONF_MAX_POLL_INTERVAL = "Maximum Poll Interval"
+DEFAULT_MIN_POLL_INTERVAL = 30
+DEFAULT_MAX_POLL_INTERVAL = 300
+POLL_IDLE_THRESHOLD = 10
+POLL_ACTIVITY_THRESHOLD = 50
+
+# With combined updates, market prices have no poll timer of their own but are
+# fetched in the same update as the live overview once they are due.
+CONF_COMBINED_UPDATES = "Combined Updates"
+DEFAULT_COMBINED_UPDATES = False
+
+# The energy history backfill is opt-in, as its chart endpoints are modelled on
+# the market price chart and not confirmed against the app. Until they are,
+# the option is not offered and the backfill does not run.
+CONF_ENERGY_HISTORY = "Import Energy History"
+DEFAULT_ENERGY_HISTORY = False
+ENERGY_HISTORY_AVAILABLE = False
+
+# Last-known data storage. Writes are delayed by this many seconds and
+# coalesced, with a final write on shutdown.
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 300
+
+# Refresh the access token this long before it expires.
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+# Day-ahead prices change at most once a day, so the cached series is only
+# refetched when it runs out or once the next day's auction results (published
+# around noon CET) should be available. The update interval is used before the
+# first timeline is known and to retry failed fetches.
+MARKET_PRICE_UPDATE_INTERVAL = timedelta(minutes=15)
+MARKET_PRICE_MIN_UPDATE_INTERVAL = timedelta(minutes=1)
+MARKET_PRICE_REFRESH_MARGIN = timedelta(hours=1)
+MARKET_PRICE_RETRY_INTERVAL = timedelta(minutes=30)
+MARKET_PRICE_AUCTION_HOUR = 14
+
+# Devices that group the sensors of a config entry.
+DEVICE_CONFIG = {
+    "battery": {"name": "1Komma5Grad Battery", "model": "Battery"},
+    "solarpanel": {"name": "1Komma5Grad Solar Panel", "model": "Solar Panel"},
+    "grid": {"name": "1Komma5Grad Grid", "model": "Grid"},
+    "house": {"name": "1Komma5Grad House", "model": "House Consumption"},
+    "heartbeat": {"name": "1Komma5Grad Heartbeat", "model": "Heartbeat Device"},
+}
+
+# Sensor states are only written when the value moved by at least
+# max(deadband, deadband_relative * |last value|), when it returns to zero, or
+# when nothing was written for DEADBAND_MAX_SILENCE.
+DEADBAND_MAX_SILENCE = timedelta(minutes=5)
+
+# Sensors keyed by the LiveOverview field they report, except the market price
+# sensors.
 SENSOR_CONFIG = {
     "solar_production": {
+        "device": "solarpanel",
         "name": "1k5 Solar Production",
         "unit": "W",
         "device_class": "power",
         "state_class": "measurement",
+        "deadband": 5,
+        "deadband_relative": 0.01,
     },
     "battery_in": {
+        "device": "battery",
         "name": "1k5 Battery In",
         "unit": "W",
         "device_class": "power",
         "state_class": "measurement",
+        "deadband": 5,
+        "deadband_relative": 0.01,
     },
     "battery_out": {
+        "device": "battery",
         "name": "1k5 Battery Out",
         "unit": "W",
         "device_class": "power",
         "state_class": "measurement",
+        "deadband": 5,
+        "deadband_relative": 0.01,
     },
     "battery_charge": {
+        "device": "battery",
         "name": "1k5 Battery Charge",
         "unit": "%",
         "device_class": "battery",
         "state_class": "measurement",
     },
     "battery_energy": {
+        "device": "battery",
         "name": "1k5 Battery Energy",
         "unit": "kWh",
         "device_class": "energy",
@@ -41,26 +185,226 @@ SENSOR_CONFIG = {
         "battery_capacity": 15.52,  # Example capacity in kWh.
     },
     "grid_feed_in": {
+        "device": "grid",
         "name": "1k5 Grid Feed-In",
         "unit": "W",
         "device_class": "power",
         "state_class": "measurement",
+        "deadband": 5,
+        "deadband_relative": 0.01,
     },
     "grid_consumption": {
+        "device": "grid",
         "name": "1k5 Grid Consumption",
         "unit": "W",
         "device_class": "power",
         "state_class": "measurement",
+        "deadband": 5,
+        "deadband_relative": 0.01,
     },
     "house_consumption": {
+        "device": "house",
         "name": "1k5 House Consumption",
         "unit": "W",
         "device_class": "power",
         "state_class": "measurement",
+        "deadband": 5,
+        "deadband_relative": 0.01,
     },
     "market_price": {
+        "device": "heartbeat",
         "name": "1k5 Market Price",
         "unit": "EUR/kWh",  # Value is converted from ct/kWh in the sensor.
         "state_class": "measurement",
     },
+    "market_price_forecast": {
+        "device": "heartbeat",
+        "name": "1k5 Market Price Forecast",
+        "unit": "EUR/kWh",
+        "state_class": "measurement",
+    },
+}
+
+# Readings further apart than this are not integrated into energy totals,
+# unless the maximum poll interval is longer.
+ENERGY_MAX_GAP = timedelta(minutes=15)
+
+# Energy totals keyed by name, each integrating the LiveOverview power field
+# given as "source". They replace `integration` sensors set up in YAML.
+ENERGY_SENSOR_CONFIG = {
+    "solar_production_total": {
+        "source": "solar_production",
+        "device": "solarpanel",
+        "name": "1k5 Total Solar Production",
+        "unit": "kWh",
+        "device_class": "energy",
+        "state_class": "total_increasing",
+        "deadband": 0.01,
+    },
+    "battery_in_total": {
+        "source": "battery_in",
+        "device": "battery",
+        "name": "1k5 Total Battery In",
+        "unit": "kWh",
+        "device_class": "energy",
+        "state_class": "total_increasing",
+        "deadband": 0.01,
+    },
+    "battery_out_total": {
+        "source": "battery_out",
+        "device": "battery",
+        "name": "1k5 Total Battery Out",
+        "unit": "kWh",
+        "device_class": "energy",
+        "state_class": "total_increasing",
+        "deadband": 0.01,
+    },
+    "grid_feed_in_total": {
+        "source": "grid_feed_in",
+        "device": "grid",
+        "name": "1k5 Total Grid Feed-In",
+        "unit": "kWh",
+        "device_class": "energy",
+        "state_class": "total_increasing",
+        "deadband": 0.01,
+    },
+    "grid_consumption_total": {
+        "source": "grid_consumption",
+        "device": "grid",
+        "name": "1k5 Total Grid Consumption",
+        "unit": "kWh",
+        "device_class": "energy",
+        "state_class": "total_increasing",
+        "deadband": 0.01,
+    },
+    "house_consumption_total": {
+        "source": "house_consumption",
+        "device": "house",
+        "name": "1k5 Total House Consumption",
+        "unit": "kWh",
+        "device_class": "energy",
+        "state_class": "total_increasing",
+        "deadband": 0.01,
+    },
+}
+
+# Grid cost and feed-in revenue in EUR keyed by name, each integrating the
+# LiveOverview power field given as "source" weighted by the market price.
+# "daily" totals restart at local midnight. They replace template and
+# utility_meter sensors multiplying the power sensors by the market price.
+COST_SENSOR_CONFIG = {
+    "grid_cost_total": {
+        "source": "grid_consumption",
+        "device": "grid",
+        "name": "1k5 Total Grid Cost",
+        "unit": "EUR",
+        "device_class": "monetary",
+        "state_class": "total",
+        "deadband": 0.01,
+    },
+    "grid_cost_daily": {
+        "source": "grid_consumption",
+        "daily": True,
+        "device": "grid",
+        "name": "1k5 Daily Grid Cost",
+        "unit": "EUR",
+        "device_class": "monetary",
+        "state_class": "total",
+        "deadband": 0.01,
+    },
+    "feed_in_revenue_total": {
+        "source": "grid_feed_in",
+        "device": "grid",
+        "name": "1k5 Total Feed-In Revenue",
+        "unit": "EUR",
+        "device_class": "monetary",
+        "state_class": "total",
+        "deadband": 0.01,
+    },
+    "feed_in_revenue_daily": {
+        "source": "grid_feed_in",
+        "daily": True,
+        "device": "grid",
+        "name": "1k5 Daily Feed-In Revenue",
+        "unit": "EUR",
+        "device_class": "monetary",
+        "state_class": "total",
+        "deadband": 0.01,
+    },
+}
+
+# Diagnostic sensors of a config entry, shown on its first system's devices.
+# The latency sensors report the 95th percentile of the endpoint named like
+# their key, and are disabled by default like the update duration.
+DIAGNOSTIC_SENSOR_CONFIG = {
+    "api_circuit": {
+        "device": "heartbeat",
+        "name": "1k5 API Circuit",
+        "device_class": "enum",
+    },
+    "live_overview_latency": {
+        "device": "heartbeat",
+        "name": "1k5 Live Overview Latency",
+        "unit": "ms",
+        "device_class": "duration",
+        "state_class": "measurement",
+    },
+    "market_price_latency": {
+        "device": "heartbeat",
+        "name": "1k5 Market Price Latency",
+        "unit": "ms",
+        "device_class": "duration",
+        "state_class": "measurement",
+    },
+    "live_overview_update_duration": {
+        "device": "heartbeat",
+        "name": "1k5 Live Overview Update Duration",
+        "unit": "ms",
+        "device_class": "duration",
+        "state_class": "measurement",
+    },
+}
+
+HISTORY_STORAGE_VERSION = 1
+# How far back a new entry imports history, how much one request covers and
+# how often newly completed hours are imported afterwards.
+HISTORY_BACKFILL_DAYS = 180
+HISTORY_PAGE_DAYS = 7
+HISTORY_RESOLUTION = "15m"
+HISTORY_UPDATE_INTERVAL = timedelta(hours=6)
+
+# Hourly kWh statistics imported from the historical charts, keyed by the
+# statistic name. "chart" is the chart endpoint and "series" the power
+# series of its response, both following `charts/market-prices`.
+HISTORY_CONFIG = {
+    "solar_production": {
+        "chart": "production",
+        "series": "production",
+        "name": "1k5 Solar Production",
+    },
+    "house_consumption": {
+        "chart": "consumption",
+        "series": "consumption",
+        "name": "1k5 House Consumption",
+    },
+    "grid_consumption": {
+        "chart": "grid",
+        "series": "consumption",
+        "name": "1k5 Grid Consumption",
+    },
+    "grid_feed_in": {
+        "chart": "grid",
+        "series": "feedIn",
+        "name": "1k5 Grid Feed-In",
+    },
+    "battery_in": {
+        "chart": "battery",
+        "series": "charge",
+        "name": "1k5 Battery In",
+    },
+    "battery_out": {
+        "chart": "battery",
+        "series": "discharge",
+        "name": "1k5 Battery Out",
+    },
 }
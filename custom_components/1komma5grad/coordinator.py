@@ -0,0 +1,162 @@
+"""Data update coordinators for the 1Komma5Grad integration."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+from datetime import datetime, timedelta
+import time
+from typing import Any, TypeVar
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import MAX_PARALLEL_REQUESTS, POLL_ACTIVITY_THRESHOLD, POLL_IDLE_THRESHOLD
+from .metrics import DurationWindow
+from .models import LiveOverview
+
+_DataT = TypeVar("_DataT")
+
+# Power flows compared between two polls to detect activity.
+_POWER_FIELDS = (
+    "solar_production",
+    "battery_power",
+    "grid_feed_in",
+    "grid_consumption",
+    "house_consumption",
+)
+
+
+def _power(overview: LiveOverview, field: str) -> float:
+    """Return a power field as float, treating missing values as 0."""
+    try:
+        return float(getattr(overview, field) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+async def async_fetch_systems(
+    system_ids: Iterable[str], fetch: Callable[[str], Awaitable[Any]]
+) -> dict[str, Any]:
+    """Call `fetch` for all systems concurrently, a few at a time.
+
+    Returns the result of each system, or the exception it raised.
+    """
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_REQUESTS)
+
+    async def async_fetch(system_id: str) -> Any:
+        async with semaphore:
+            return await fetch(system_id)
+
+    system_ids = list(system_ids)
+    results = await asyncio.gather(
+        *(async_fetch(system_id) for system_id in system_ids),
+        return_exceptions=True,
+    )
+    return dict(zip(system_ids, results))
+
+
+class AdaptivePollInterval:
+    """Choose the live overview poll interval from the system's activity.
+
+    Polls at the minimum interval while power flows change. Steady flows
+    back off gradually, and an idle system (no solar production, battery
+    neither charging nor discharging, e.g. at night) backs off to the
+    maximum interval.
+    """
+
+    def __init__(self, min_interval: timedelta, max_interval: timedelta) -> None:
+        """Initialize the scheduler with its bounds."""
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.interval = min_interval
+        self._previous: LiveOverview | None = None
+
+    def update(self, overview: LiveOverview) -> timedelta:
+        """Return the interval until the next poll after `overview`."""
+        previous, self._previous = self._previous, overview
+        idle = (
+            abs(_power(overview, "solar_production")) <= POLL_IDLE_THRESHOLD
+            and abs(_power(overview, "battery_power")) <= POLL_IDLE_THRESHOLD
+        )
+        changing = previous is not None and any(
+            abs(_power(overview, field) - _power(previous, field))
+            > POLL_ACTIVITY_THRESHOLD
+            for field in _POWER_FIELDS
+        )
+
+        if changing and not idle:
+            self.interval = self.min_interval
+        elif idle:
+            self.interval = min(self.interval * 2, self.max_interval)
+        else:
+            # Steady but active: back off slowly, to at most a quarter of the
+            # maximum interval, so changes are still picked up quickly.
+            self.interval = min(
+                self.interval * 1.5, max(self.min_interval, self.max_interval / 4)
+            )
+        return self.interval
+
+
+class OneKomma5GradCoordinator(DataUpdateCoordinator[_DataT]):
+    """Coordinator that can be primed with data restored from disk.
+
+    The data maps system ids to their data. `fetched_at` is the timestamp
+    of the update cycle that fetched the data. `restored_at` holds the time
+    the restored data of each system was fetched, and is cleared by the
+    first successful live update. The duration of recent updates and the
+    number of failed ones are kept for diagnostics.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize the coordinator and its update metrics."""
+        super().__init__(*args, **kwargs)
+        self.restored_at: dict[str, datetime] = {}
+        self.fetched_at: datetime | None = None
+        self.update_durations = DurationWindow()
+        self.last_update_duration: float | None = None
+        self.updates = 0
+        self.update_failures = 0
+
+    @callback
+    def async_set_restored_data(
+        self, data: _DataT, restored_at: dict[str, datetime]
+    ) -> None:
+        """Publish restored data without waiting for the network.
+
+        The restored systems are added to the data of the other systems.
+        """
+        self.restored_at = {**self.restored_at, **restored_at}
+        self.async_set_updated_data({**(self.data or {}), **data})
+
+    async def _async_update_data(self) -> _DataT:
+        """Fetch the latest data and drop the restored marker."""
+        start = time.perf_counter()
+        self.updates += 1
+        try:
+            data = await super()._async_update_data()
+        except Exception:
+            self.update_failures += 1
+            raise
+        finally:
+            self.last_update_duration = time.perf_counter() - start
+            self.update_durations.add(self.last_update_duration)
+        self.restored_at = {}
+        return data
+
+    def metrics_as_dict(self) -> dict[str, Any]:
+        """Return the update metrics for diagnostics."""
+        return {
+            "update_interval": (
+                self.update_interval.total_seconds()
+                if self.update_interval is not None
+                else None
+            ),
+            "last_update_success": self.last_update_success,
+            "fetched_at": (
+                self.fetched_at.isoformat() if self.fetched_at is not None else None
+            ),
+            "updates": self.updates,
+            "update_failures": self.update_failures,
+            "update_duration": self.update_durations.as_dict(),
+        }
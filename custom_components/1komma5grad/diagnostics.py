@@ -0,0 +1,40 @@
+"""Diagnostics support for the 1Komma5Grad integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+TO_REDACT = {"access_token", "refresh_token", "id_token"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the entry, API request metrics and coordinator update metrics."""
+    runtime_data = hass.data[DOMAIN][entry.entry_id]
+    api_client = runtime_data["api"]
+    expires_at = runtime_data["token_manager"].expires_at
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "token_expires_at": (
+            dt_util.utc_from_timestamp(expires_at).isoformat()
+            if expires_at is not None
+            else None
+        ),
+        "circuit": api_client.circuit.as_dict(),
+        "endpoints": {
+            name: metrics.as_dict()
+            for name, metrics in sorted(api_client.metrics.items())
+        },
+        "coordinators": {
+            "live_overview": runtime_data["coordinator"].metrics_as_dict(),
+            "market_price": runtime_data["market_price_coordinator"].metrics_as_dict(),
+        },
+    }
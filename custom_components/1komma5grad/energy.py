@@ -0,0 +1,184 @@
+"""Energy totals accumulated from live power readings."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+import logging
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .models import LiveOverview
+from .price import PriceTimeline
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _number(value: Any) -> float | None:
+    """Return a value as float, or None if it is missing or invalid."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class EnergyIntegrator:
+    """Integrate power readings in W into energy totals in kWh.
+
+    Each pair of successive readings adds the trapezoid between them. An
+    interval longer than `max_gap` (e.g. an outage or a long restart) adds
+    nothing, as the power in between is unknown.
+    """
+
+    def __init__(self, sources: Mapping[str, str], max_gap: timedelta) -> None:
+        """Initialize the integrator.
+
+        `sources` maps each total to the LiveOverview field it integrates.
+        """
+        self.sources = dict(sources)
+        self.max_gap = max_gap.total_seconds()
+        self.totals: dict[str, float] = dict.fromkeys(self.sources, 0.0)
+        self._last_at: float | None = None
+        self._last_power: dict[str, float | None] = {}
+
+    def update(self, overview: LiveOverview, at: datetime) -> None:
+        """Add the energy since the previous reading."""
+        for key, energy in self._integrate(overview, at).items():
+            self.totals[key] += energy
+
+    def _integrate(self, overview: LiveOverview, at: datetime) -> dict[str, float]:
+        """Return the energy in kWh since the previous reading and remember this one."""
+        timestamp = at.timestamp()
+        power = {
+            key: _number(getattr(overview, field))
+            for key, field in self.sources.items()
+        }
+        energy = {}
+        if self._last_at is not None:
+            elapsed = timestamp - self._last_at
+            if 0 < elapsed <= self.max_gap:
+                hours = elapsed / 3600
+                for key, value in power.items():
+                    last_value = self._last_power.get(key)
+                    if value is None or last_value is None:
+                        continue
+                    # Power flows are reported as magnitudes, so clamp any
+                    # negative noise instead of letting a total decrease.
+                    energy[key] = max((value + last_value) / 2, 0) * hours / 1000
+            elif elapsed > self.max_gap:
+                _LOGGER.debug(
+                    "Skipping %.0f s without power readings in energy totals",
+                    elapsed,
+                )
+        self._last_at = timestamp
+        self._last_power = power
+        return energy
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON serializable representation."""
+        return {
+            "totals": self.totals,
+            "last_at": (
+                dt_util.utc_from_timestamp(self._last_at).isoformat()
+                if self._last_at is not None
+                else None
+            ),
+            "last_power": self._last_power,
+        }
+
+    def restore(self, data: Mapping[str, Any] | None) -> None:
+        """Continue from a state saved with `as_dict`."""
+        if not data:
+            return
+        for key, total in (data.get("totals") or {}).items():
+            if key in self.totals and (total := _number(total)) is not None:
+                self.totals[key] = total
+        last_at = (
+            dt_util.parse_datetime(data["last_at"]) if data.get("last_at") else None
+        )
+        if last_at is not None:
+            self._last_at = last_at.timestamp()
+            self._last_power = {
+                key: _number(value)
+                for key, value in (data.get("last_power") or {}).items()
+                if key in self.sources
+            }
+
+
+class CostIntegrator(EnergyIntegrator):
+    """Integrate power readings in W, weighted by the market price, into EUR.
+
+    The energy between two readings is priced at the market price in the
+    middle of the interval; intervals without a known price add nothing.
+    Besides the running totals, daily totals restart at local midnight, and
+    an interval spanning midnight is split between the two days.
+    """
+
+    def __init__(self, sources: Mapping[str, str], max_gap: timedelta) -> None:
+        """Initialize the integrator.
+
+        `sources` maps each total to the LiveOverview field it integrates.
+        """
+        super().__init__(sources, max_gap)
+        self.daily: dict[str, float] = dict.fromkeys(self.sources, 0.0)
+        self.day_start: datetime | None = None
+
+    def update(
+        self,
+        overview: LiveOverview,
+        at: datetime,
+        timeline: PriceTimeline | None = None,
+    ) -> None:
+        """Add the cost of the energy since the previous reading.
+
+        `timeline` holds the market prices in ct/kWh.
+        """
+        last_at = self._last_at
+        energy = self._integrate(overview, at)
+        day_start = dt_util.start_of_local_day(dt_util.as_local(at))
+        if day_start != self.day_start:
+            self.day_start = day_start
+            self.daily = dict.fromkeys(self.sources, 0.0)
+        if not energy or timeline is None or last_at is None:
+            return
+        # An interval spanning local midnight is split there in proportion to
+        # its duration. The part before midnight only counts towards the
+        # running totals, as the daily ones just restarted.
+        timestamp = at.timestamp()
+        midnight = max(last_at, day_start.timestamp())
+        for start, end, daily in (
+            (last_at, midnight, False),
+            (midnight, timestamp, True),
+        ):
+            if end <= start:
+                continue
+            price = timeline.price_at((start + end) / 2)
+            if price is None:
+                continue
+            share = (end - start) / (timestamp - last_at)
+            for key, kwh in energy.items():
+                cost = kwh * share * price / 100
+                self.totals[key] += cost
+                if daily:
+                    self.daily[key] += cost
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON serializable representation."""
+        return {
+            **super().as_dict(),
+            "daily": self.daily,
+            "day_start": (
+                self.day_start.isoformat() if self.day_start is not None else None
+            ),
+        }
+
+    def restore(self, data: Mapping[str, Any] | None) -> None:
+        """Continue from a state saved with `as_dict`."""
+        super().restore(data)
+        if not data or not data.get("day_start"):
+            return
+        self.day_start = dt_util.parse_datetime(data["day_start"])
+        for key, total in (data.get("daily") or {}).items():
+            if key in self.daily and (total := _number(total)) is not None:
+                self.daily[key] = total
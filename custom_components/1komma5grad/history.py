@@ -0,0 +1,249 @@
+"""Historical energy imported into long-term statistics."""
+
+from __future__ import annotations
+
+from array import array
+import asyncio
+from datetime import datetime, timedelta
+import logging
+from typing import Any
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import (
+    DOMAIN,
+    HISTORY_BACKFILL_DAYS,
+    HISTORY_CONFIG,
+    HISTORY_PAGE_DAYS,
+    HISTORY_RESOLUTION,
+    HISTORY_STORAGE_VERSION,
+)
+from .resilience import CircuitBreaker
+
+_LOGGER = logging.getLogger(__name__)
+
+# Slot length used when a series has a single sample.
+DEFAULT_RESOLUTION = 3600.0
+
+
+def hourly_energy(series: dict | None) -> dict[float, float]:
+    """Aggregate a power series into kWh per hour.
+
+    `series` maps ISO8601 timestamps to `{"value": W}`, each value being the
+    mean power of its slot. Returns the energy keyed by the epoch second each
+    hour starts at.
+    """
+    points = []
+    for ts, entry in (series or {}).items():
+        value = entry.get("value") if isinstance(entry, dict) else entry
+        if value is None:
+            continue
+        try:
+            points.append((datetime.fromisoformat(ts).timestamp(), float(value)))
+        except (TypeError, ValueError):
+            _LOGGER.debug("Skipping invalid history entry %s: %s", ts, entry)
+    if not points:
+        return {}
+    points.sort()
+
+    timestamps = array("d", (point[0] for point in points))
+    values = array("d", (point[1] for point in points))
+    resolution = min(
+        (b - a for a, b in zip(timestamps, timestamps[1:]) if b > a),
+        default=DEFAULT_RESOLUTION,
+    )
+    # W over one slot to kWh.
+    factor = resolution / 3_600_000
+    energy: dict[float, float] = {}
+    for ts, value in zip(timestamps, values):
+        hour = ts - ts % 3600
+        energy[hour] = energy.get(hour, 0.0) + max(value, 0.0) * factor
+    return energy
+
+
+def _storage_key(system_id: str) -> str:
+    """Return the storage key for the history of a system."""
+    return f"{DOMAIN}.{slugify(system_id)}.history"
+
+
+class HistoryBackfill:
+    """Import hourly energy statistics from the historical charts.
+
+    A persisted watermark per statistic marks its first hour that is not
+    imported yet, next to its running sum. A new entry pages through
+    `HISTORY_BACKFILL_DAYS` of history, later runs only fetch the hours that
+    completed since the earliest watermark, and every page is added to the
+    recorder in one batch per statistic. A series published later than the
+    others is fetched again on the next run rather than skipped.
+
+    The chart requests go through the backfill's own circuit breaker, so a
+    failing history endpoint does not pause the live updates of the account.
+
+    The statistics, watermarks and sums belong to the system, so config
+    entries monitoring the same system share one backfill.
+    """
+
+    def __init__(self, hass: HomeAssistant, api_client, system_id: str) -> None:
+        """Initialize the backfill."""
+        self.hass = hass
+        self.api_client = api_client
+        self.system_id = system_id
+        self._store: Store[dict[str, Any]] = Store(
+            hass, HISTORY_STORAGE_VERSION, _storage_key(system_id)
+        )
+        self._lock = asyncio.Lock()
+        self.circuit = CircuitBreaker()
+
+    def statistic_id(self, key: str) -> str:
+        """Return the external statistic id of a history series."""
+        return f"{DOMAIN}:{slugify(self.system_id)}_{key}"
+
+    async def async_run(self, now: datetime | None = None) -> None:
+        """Import all hours completed since the watermark."""
+        if "recorder" not in self.hass.config.components:
+            _LOGGER.debug("Recorder not loaded, skipping history backfill")
+            return
+        if self._lock.locked():
+            return
+        async with self._lock:
+            await self._async_backfill()
+
+    async def _async_backfill(self) -> None:
+        """Page through the charts from the earliest watermark to the current hour."""
+        stored = await self._store.async_load() or {}
+        end = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+        # Older versions kept one watermark for all statistics.
+        default = stored.get("watermark")
+        stored_watermarks = stored.get("watermarks") or {}
+        watermarks: dict[str, datetime] = {}
+        for key in HISTORY_CONFIG:
+            value = stored_watermarks.get(key, default)
+            watermarks[key] = (value and dt_util.parse_datetime(value)) or (
+                end - timedelta(days=HISTORY_BACKFILL_DAYS)
+            )
+        sums: dict[str, float] = dict(stored.get("sums") or {})
+
+        page_start = min(watermarks.values())
+        while page_start < end:
+            page_end = min(page_start + timedelta(days=HISTORY_PAGE_DAYS), end)
+            # Only charts with a statistic still missing hours of this page.
+            charts = list(
+                dict.fromkeys(
+                    conf["chart"]
+                    for key, conf in HISTORY_CONFIG.items()
+                    if watermarks[key] < page_end
+                )
+            )
+            try:
+                responses = await asyncio.gather(
+                    *(
+                        self.api_client.async_get_chart(
+                            self.system_id,
+                            chart,
+                            page_start,
+                            page_end,
+                            HISTORY_RESOLUTION,
+                            circuit=self.circuit,
+                        )
+                        for chart in charts
+                    )
+                )
+            except Exception as err:
+                _LOGGER.warning(
+                    "Error fetching energy history from %s: %s", page_start, err
+                )
+                return
+            data = dict(zip(charts, responses))
+
+            last_hours = self._add_statistics(data, watermarks, page_end, sums)
+            for key, watermark in watermarks.items():
+                if watermark >= page_end:
+                    continue
+                if page_end < end:
+                    watermarks[key] = page_end
+                elif (last_hour := last_hours.get(key)) is not None:
+                    # The latest hours may not be published yet, so the last
+                    # page only moves a watermark past hours that had data.
+                    watermarks[key] = dt_util.utc_from_timestamp(last_hour + 3600)
+            await self._store.async_save(
+                {
+                    "watermarks": {
+                        key: watermark.isoformat()
+                        for key, watermark in watermarks.items()
+                    },
+                    "sums": sums,
+                }
+            )
+            if page_end >= end:
+                break
+            page_start = page_end
+
+    def _add_statistics(
+        self,
+        data: dict[str, Any],
+        watermarks: dict[str, datetime],
+        end: datetime,
+        sums: dict[str, float],
+    ) -> dict[str, float]:
+        """Add the hours of one page after each watermark.
+
+        Returns the last hour with data of each statistic that had any.
+        """
+        end_ts = end.timestamp()
+        last_hours = {}
+        for key, conf in HISTORY_CONFIG.items():
+            if conf["chart"] not in data:
+                continue
+            start_ts = watermarks[key].timestamp()
+            chart = data[conf["chart"]] or {}
+            energy = hourly_energy((chart.get(conf["series"]) or {}).get("data"))
+            total = sums.get(key, 0.0)
+            statistics = []
+            for hour in sorted(energy):
+                if not start_ts <= hour < end_ts:
+                    continue
+                total += energy[hour]
+                statistics.append(
+                    StatisticData(
+                        start=dt_util.utc_from_timestamp(hour),
+                        state=energy[hour],
+                        sum=total,
+                    )
+                )
+            if not statistics:
+                continue
+            async_add_external_statistics(
+                self.hass,
+                StatisticMetaData(
+                    has_mean=False,
+                    has_sum=True,
+                    name=conf["name"],
+                    source=DOMAIN,
+                    statistic_id=self.statistic_id(key),
+                    unit_of_measurement="kWh",
+                ),
+                statistics,
+            )
+            sums[key] = total
+            last_hours[key] = statistics[-1]["start"].timestamp()
+            _LOGGER.debug(
+                "Imported %s hours of %s history until %s",
+                len(statistics),
+                key,
+                statistics[-1]["start"],
+            )
+        return last_hours
+
+
+async def async_remove_history(hass: HomeAssistant, system_ids: list[str]) -> None:
+    """Remove the history watermarks of systems no config entry monitors."""
+    for system_id in system_ids:
+        await Store(
+            hass, HISTORY_STORAGE_VERSION, _storage_key(system_id)
+        ).async_remove()
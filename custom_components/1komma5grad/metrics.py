@@ -0,0 +1,99 @@
+"""Request and update metrics of the 1Komma5Grad integration."""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Any
+
+from .const import METRICS_WINDOW
+
+PERCENTILES = {"p50": 0.5, "p95": 0.95, "p99": 0.99}
+
+
+class DurationWindow:
+    """Keep the most recent durations and summarize them as percentiles."""
+
+    def __init__(self) -> None:
+        """Initialize an empty window."""
+        self._samples: deque[float] = deque(maxlen=METRICS_WINDOW)
+
+    def __len__(self) -> int:
+        """Return the number of samples in the window."""
+        return len(self._samples)
+
+    def add(self, duration: float) -> None:
+        """Add a duration in seconds."""
+        self._samples.append(duration)
+
+    def percentile(self, fraction: float, min_samples: int = 1) -> float | None:
+        """Return a percentile of the window, or None with too few samples."""
+        if len(self._samples) < max(min_samples, 1):
+            return None
+        samples = sorted(self._samples)
+        return samples[min(int(fraction * len(samples)), len(samples) - 1)]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the sample count, mean and percentiles in milliseconds."""
+        if not self._samples:
+            return {"samples": 0}
+        return {
+            "samples": len(self._samples),
+            "mean_ms": round(sum(self._samples) / len(self._samples) * 1000, 2),
+            **{
+                f"{name}_ms": round(self.percentile(fraction) * 1000, 2)
+                for name, fraction in PERCENTILES.items()
+            },
+            "max_ms": round(max(self._samples) * 1000, 2),
+        }
+
+
+class EndpointMetrics:
+    """Counters and durations of the requests to one API endpoint.
+
+    `latency` holds the round trip of each successful HTTP request, retries
+    and hedged requests included, while `requests` and `failures` count the
+    calls made by the integration.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty metrics."""
+        self.requests = 0
+        self.failures = 0
+        self.cache_hits = 0
+        self.shared = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.bytes_received = 0
+        self.last_size: int | None = None
+        self.last_error: str | None = None
+        self.latency = DurationWindow()
+        self.decode_time = DurationWindow()
+
+    def record_response(self, size: int, decode_time: float) -> None:
+        """Count a successful call and its payload."""
+        self.requests += 1
+        self.bytes_received += size
+        self.last_size = size
+        self.decode_time.add(decode_time)
+
+    def record_failure(self, err: BaseException) -> None:
+        """Count a failed call."""
+        self.requests += 1
+        self.failures += 1
+        self.last_error = str(err) or type(err).__name__
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics for diagnostics."""
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "cache_hits": self.cache_hits,
+            "shared_in_flight": self.shared,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "bytes_received": self.bytes_received,
+            "last_size": self.last_size,
+            "last_error": self.last_error,
+            "latency": self.latency.as_dict(),
+            "decode_time": self.decode_time.as_dict(),
+        }
@@ -0,0 +1,80 @@
+"""Parsed data models for the 1Komma5Grad integration."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+
+def _value(data: Any) -> Any:
+    """Return the `value` of a `{"value": ...}` field, or the field itself."""
+    if isinstance(data, dict):
+        return data.get("value")
+    return data
+
+
+def _float(data: Any) -> float | None:
+    """Return a field as float, or None if it is missing or invalid."""
+    try:
+        return float(_value(data))
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True, slots=True)
+class LiveOverview:
+    """Every value derived from one live-overview payload.
+
+    The payload is parsed once per update, so sensors only read attributes
+    instead of walking the response and converting values on each access.
+    """
+
+    solar_production: Any = None
+    battery_power: float | None = None
+    battery_in: float | None = None
+    battery_out: float | None = None
+    battery_charge: float | None = None
+    battery_energy: float | None = None
+    grid_feed_in: Any = None
+    grid_consumption: Any = None
+    house_consumption: float | None = None
+
+    @classmethod
+    def from_payload(
+        cls, data: dict, battery_capacity: float | None = None
+    ) -> LiveOverview:
+        """Parse a `live-overview` response.
+
+        Negative battery power means the battery is charging. The state of
+        charge is reported as a fraction and converted to percent and, given
+        the battery capacity, to kWh.
+        """
+        summary = data.get("summaryCards") or {}
+        battery = summary.get("battery") or {}
+        household = summary.get("household") or {}
+        live_data = data.get("liveHeroView") or {}
+
+        battery_power = _float(battery.get("power"))
+        battery_in = battery_out = None
+        if battery_power is not None:
+            battery_in = -battery_power if battery_power < 0 else 0
+            battery_out = battery_power if battery_power > 0 else 0
+
+        soc = _float(battery.get("stateOfCharge"))
+        battery_charge = battery_energy = None
+        if soc is not None:
+            battery_charge = round(soc * 100, 1)
+            if battery_capacity is not None:
+                battery_energy = round(soc * battery_capacity, 2)
+
+        return cls(
+            solar_production=_value(live_data.get("production")),
+            battery_power=battery_power,
+            battery_in=battery_in,
+            battery_out=battery_out,
+            battery_charge=battery_charge,
+            battery_energy=battery_energy,
+            grid_feed_in=_value(live_data.get("gridFeedIn")),
+            grid_consumption=_value(live_data.get("gridConsumption")),
+            house_consumption=_float(household.get("power")),
+        )
@@ -3,9 +3,23 @@ import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+import homeassistant.helpers.config_validation as cv
 
+from . import entry_system_ids
 from .api import OneKomma5GradApi
-from .const import DOMAIN
+from .const import (
+    CONF_COMBINED_UPDATES,
+    CONF_ENERGY_HISTORY,
+    CONF_MAX_POLL_INTERVAL,
+    CONF_MIN_POLL_INTERVAL,
+    CONF_SYSTEMS,
+    DEFAULT_COMBINED_UPDATES,
+    DEFAULT_ENERGY_HISTORY,
+    DEFAULT_MAX_POLL_INTERVAL,
+    DEFAULT_MIN_POLL_INTERVAL,
+    DOMAIN,
+    ENERGY_HISTORY_AVAILABLE,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,14 +39,20 @@ class OneKomma5GradOptionsFlowHandler(config_entries.OptionsFlow):
         # Create an API client to fetch available systems.
         access_token = self._config_entry_data.get("access_token")
         refresh_token = self._config_entry_data.get("refresh_token")
-        api_client = OneKomma5GradApi(self.hass, access_token)
+        runtime_data = self.hass.data.get(DOMAIN, {}).get(self.config_entry.entry_id)
+        if runtime_data is not None:
+            # Reuse the running client, which has the systems cached.
+            api_client = runtime_data["api"]
+        else:
+            api_client = OneKomma5GradApi(
+                async_get_clientsession(self.hass), access_token
+            )
 
         # First, fetch available systems from the API.
         try:
             systems_response = await api_client.async_get_systems()
         except Exception as err:
             _LOGGER.error("Error fetching systems: %s", err)
-            # Fallback: allow a free-text input.
             available_systems = None
         else:
             systems_list = systems_response.get("data", [])
@@ -43,39 +63,85 @@ class OneKomma5GradOptionsFlowHandler(config_entries.OptionsFlow):
                 if system_id:
                     available_systems[system_id] = system_name
 
-        # Build a schema that always includes the system_id and a refresh_tokens checkbox.
-        # If available_systems is set, use vol.In to create a dropdown.
-        if available_systems:
-            system_schema = vol.In(available_systems)
-        else:
-            system_schema = str
-
-        # Use the current system id from options or config data as the default.
-        current_system_id = self._config_entry_options.get(
-            "System ID", self._config_entry_data.get("System ID", "")
-        )
-
-        schema = vol.Schema(
-            {
-                vol.Required("System ID", default=current_system_id): system_schema,
-                vol.Optional("Refresh Token", default=False): bool,
+        # Build a schema that always includes the systems and a refresh_tokens checkbox.
+        # If the systems could not be fetched, offer the current ones.
+        current_system_ids = entry_system_ids(self.config_entry)
+        if not available_systems:
+            available_systems = {
+                system_id: system_id for system_id in current_system_ids
             }
-        )
+
+        fields = {
+            vol.Required(CONF_SYSTEMS, default=current_system_ids): cv.multi_select(
+                available_systems
+            ),
+            vol.Optional(
+                CONF_MIN_POLL_INTERVAL,
+                default=self._config_entry_options.get(
+                    CONF_MIN_POLL_INTERVAL, DEFAULT_MIN_POLL_INTERVAL
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=10, max=3600)),
+            vol.Optional(
+                CONF_MAX_POLL_INTERVAL,
+                default=self._config_entry_options.get(
+                    CONF_MAX_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=10, max=3600)),
+            vol.Optional(
+                CONF_COMBINED_UPDATES,
+                default=self._config_entry_options.get(
+                    CONF_COMBINED_UPDATES, DEFAULT_COMBINED_UPDATES
+                ),
+            ): bool,
+        }
+        if ENERGY_HISTORY_AVAILABLE:
+            fields[
+                vol.Optional(
+                    CONF_ENERGY_HISTORY,
+                    default=self._config_entry_options.get(
+                        CONF_ENERGY_HISTORY, DEFAULT_ENERGY_HISTORY
+                    ),
+                )
+            ] = bool
+        fields[vol.Optional("Refresh Token", default=False)] = bool
+        schema = vol.Schema(fields)
 
         if user_input is not None:
+            if not user_input.get(CONF_SYSTEMS):
+                return self.async_show_form(
+                    step_id="init",
+                    data_schema=schema,
+                    errors={"base": "no_systems"},
+                )
+            if user_input.get(
+                CONF_MIN_POLL_INTERVAL, DEFAULT_MIN_POLL_INTERVAL
+            ) > user_input.get(CONF_MAX_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL):
+                return self.async_show_form(
+                    step_id="init",
+                    data_schema=schema,
+                    errors={"base": "invalid_poll_bounds"},
+                )
             # If refresh is requested, refresh the tokens.
             if user_input.get("Refresh Token"):
                 try:
-                    new_token_data = await api_client.async_token_refresh(refresh_token)
-                    _LOGGER.debug("Token refreshed successfully")
-                    # Update the config entry using the helper method to get the actual entry.
-                    if self.config_entry is not None:
-                        self.hass.config_entries.async_update_entry(
-                            self.config_entry,
-                            data={**self._config_entry_data, **new_token_data},
-                        )
+                    if runtime_data is not None:
+                        # Let the running token manager refresh, so it keeps
+                        # the rotated refresh token and saves the entry itself.
+                        await runtime_data["token_manager"].async_refresh()
+                        _LOGGER.debug("Token refreshed successfully")
                     else:
-                        _LOGGER.error("Config entry not found for updating tokens")
+                        new_token_data = await api_client.async_token_refresh(
+                            refresh_token
+                        )
+                        _LOGGER.debug("Token refreshed successfully")
+                        # Update the config entry using the helper method to get the actual entry.
+                        if self.config_entry is not None:
+                            self.hass.config_entries.async_update_entry(
+                                self.config_entry,
+                                data={**self._config_entry_data, **new_token_data},
+                            )
+                        else:
+                            _LOGGER.error("Config entry not found for updating tokens")
                 except Exception as err:
                     _LOGGER.error("Error refreshing tokens: %s", err)
                     return self.async_show_form(
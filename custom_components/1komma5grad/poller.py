@@ -0,0 +1,415 @@
+"""Polling of the systems monitored by the 1Komma5Grad integration."""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from datetime import datetime, timedelta
+from functools import partial
+import logging
+
+from homeassistant import config_entries
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .api import OneKomma5GradApi
+from .const import (
+    COST_SENSOR_CONFIG,
+    ENERGY_MAX_GAP,
+    ENERGY_SENSOR_CONFIG,
+    MARKET_PRICE_MIN_UPDATE_INTERVAL,
+    MARKET_PRICE_UPDATE_INTERVAL,
+    SENSOR_CONFIG,
+)
+from .coordinator import (
+    AdaptivePollInterval,
+    OneKomma5GradCoordinator,
+    async_fetch_systems,
+)
+from .energy import CostIntegrator, EnergyIntegrator
+from .models import LiveOverview
+from .price import PriceTimeline, PriceTimelineCache
+from .store import Snapshot, SnapshotStore
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_fetch_system_names(
+    api_client: OneKomma5GradApi, system_ids: list[str]
+) -> dict[str, str]:
+    """Return the name of each system, used to name additional systems' entities.
+
+    Systems whose name is unknown are named by their id.
+    """
+    system_names = {system_id: system_id for system_id in system_ids}
+    if len(system_ids) == 1:
+        return system_names
+    try:
+        systems = await api_client.async_get_systems()
+    except Exception as err:
+        _LOGGER.warning("Error fetching system names: %s", err)
+        return system_names
+    for system in systems.get("data", []):
+        if system.get("id") in system_names and system.get("systemName"):
+            system_names[system["id"]] = system["systemName"]
+    return system_names
+
+
+class SystemsPoller:
+    """Poll the live overview and market prices of the systems of an account.
+
+    Config entries of an account with the same poll settings share one
+    poller, which polls the union of the systems they subscribed to in one
+    cycle, so a system costs one request per cycle however many entries show
+    it. The coordinators are not linked to the entry that created them, which
+    may unload first, and are shut down once the last entry released the
+    poller. Every update is saved to the snapshot store of each entry, with
+    the systems that entry monitors.
+
+    Each update cycle takes one timestamp when it starts. The energy and
+    cost totals, the price caches and the snapshots of that cycle all use it,
+    and the coordinators expose it as `fetched_at`. With `combined` updates
+    the market prices have no timer of their own: each live overview update
+    also refreshes the prices that are due, in the same gather and with the
+    same timestamp, and the price sensors are only notified when that yields
+    new timelines.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api_client: OneKomma5GradApi,
+        min_interval: timedelta,
+        max_interval: timedelta,
+        combined: bool = False,
+    ) -> None:
+        """Initialize the poller and its coordinators."""
+        self.api_client = api_client
+        self.combined = combined
+        self.system_ids: list[str] = []
+        self.snapshot_stores: dict[str, SnapshotStore] = {}
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._subscriptions: dict[str, list[str]] = {}
+        self._battery_capacity = SENSOR_CONFIG["battery_energy"].get("battery_capacity")
+        self._poll_intervals: dict[str, AdaptivePollInterval] = {}
+        self.energy: dict[str, EnergyIntegrator] = {}
+        # Grid cost and feed-in revenue, keyed by the power field they price.
+        self.costs: dict[str, CostIntegrator] = {}
+        self._price_caches: dict[str, PriceTimelineCache] = {}
+        self._market_price_interval = MARKET_PRICE_UPDATE_INTERVAL
+        self._market_price_due = dt_util.utcnow()
+
+        # Coordinators pick up the entry being set up from a context variable
+        # and shut down when it unloads, so they are created without one.
+        context = contextvars.copy_context()
+        context.run(config_entries.current_entry.set, None)
+        # One coordinator fetches every system concurrently, its data maps
+        # each system id to its parsed live overview.
+        self.coordinator: OneKomma5GradCoordinator[dict[str, LiveOverview]] = (
+            context.run(
+                OneKomma5GradCoordinator,
+                hass,
+                logger=_LOGGER,
+                name="1Komma5Grad Live Overview",
+                update_method=self._async_update_live_overview,
+                update_interval=min_interval,
+            )
+        )
+        # The sensor switches slots on its own timer, so listeners are only
+        # notified when a new timeline was actually fetched.
+        self.market_price_coordinator: OneKomma5GradCoordinator[
+            dict[str, PriceTimeline]
+        ] = context.run(
+            OneKomma5GradCoordinator,
+            hass,
+            _LOGGER,
+            name="1Komma5Grad Market Price",
+            update_method=self._async_update_market_price,
+            update_interval=None if combined else MARKET_PRICE_UPDATE_INTERVAL,
+            always_update=False,
+        )
+
+    @callback
+    def async_subscribe(
+        self, entry_id: str, system_ids: list[str], snapshot_store: SnapshotStore
+    ) -> list[str]:
+        """Poll the systems of a config entry and save them to its store.
+
+        Returns the systems that were not polled before.
+        """
+        added = [system_id for system_id in system_ids if system_id not in self.energy]
+        max_gap = max(ENERGY_MAX_GAP, 2 * self._max_interval)
+        for system_id in added:
+            self._poll_intervals[system_id] = AdaptivePollInterval(
+                self._min_interval, self._max_interval
+            )
+            self.energy[system_id] = EnergyIntegrator(
+                {key: conf["source"] for key, conf in ENERGY_SENSOR_CONFIG.items()},
+                max_gap,
+            )
+            self.costs[system_id] = CostIntegrator(
+                {
+                    conf["source"]: conf["source"]
+                    for conf in COST_SENSOR_CONFIG.values()
+                },
+                max_gap,
+            )
+            self._price_caches[system_id] = PriceTimelineCache()
+        if added:
+            # Fetch the prices of the new systems with the next update.
+            self._market_price_due = dt_util.utcnow()
+        self._subscriptions[entry_id] = list(system_ids)
+        self.snapshot_stores[entry_id] = snapshot_store
+        self.system_ids = list(self.energy)
+        return added
+
+    @callback
+    def async_unsubscribe(self, entry_id: str) -> None:
+        """Stop polling the systems no other config entry monitors."""
+        self._subscriptions.pop(entry_id, None)
+        self.snapshot_stores.pop(entry_id, None)
+        monitored = {
+            system_id
+            for system_ids in self._subscriptions.values()
+            for system_id in system_ids
+        }
+        for system_id in self.system_ids:
+            if system_id not in monitored:
+                del self._poll_intervals[system_id]
+                del self.energy[system_id]
+                del self.costs[system_id]
+                del self._price_caches[system_id]
+        self.system_ids = list(self.energy)
+
+    def restore(self, snapshot: Snapshot, system_ids: list[str]) -> bool:
+        """Publish the last-known data of systems without waiting for the network.
+
+        Entities get their last-known state right away and are marked as
+        restored until the first live update replaces it. Returns True if a
+        live overview was restored.
+        """
+        for system_id in system_ids:
+            self.energy[system_id].restore(snapshot.energy.get(system_id))
+            self.costs[system_id].restore(snapshot.costs.get(system_id))
+
+        now = dt_util.now()
+        restored_timelines = {}
+        for system_id in system_ids:
+            if system_id not in snapshot.timelines:
+                continue
+            price_cache = self._price_caches[system_id]
+            price_cache.update(
+                snapshot.timelines[system_id], snapshot.timelines_fetched_at[system_id]
+            )
+            if price_cache.covers(now):
+                restored_timelines[system_id] = price_cache.timeline
+        if restored_timelines:
+            self.market_price_coordinator.async_set_restored_data(
+                restored_timelines,
+                {
+                    system_id: snapshot.timelines_fetched_at[system_id]
+                    for system_id in restored_timelines
+                },
+            )
+
+        restored_overviews = {
+            system_id: LiveOverview.from_payload(
+                snapshot.live_overview[system_id], self._battery_capacity
+            )
+            for system_id in system_ids
+            if system_id in snapshot.live_overview
+        }
+        if restored_overviews:
+            self.coordinator.async_set_restored_data(
+                restored_overviews,
+                {
+                    system_id: snapshot.live_overview_updated_at[system_id]
+                    for system_id in restored_overviews
+                },
+            )
+        return bool(restored_overviews)
+
+    async def async_shutdown(self) -> None:
+        """Stop polling."""
+        await self.coordinator.async_shutdown()
+        await self.market_price_coordinator.async_shutdown()
+
+    def _at_least_until_recovery(self, interval: timedelta) -> timedelta:
+        """Return `interval`, extended while the API circuit is open."""
+        return max(interval, timedelta(seconds=self.api_client.circuit.retry_in))
+
+    async def _async_update_live_overview(self) -> dict[str, LiveOverview]:
+        """Fetch the live overview of every system and parse it for the sensors.
+
+        Systems that fail to update or return a malformed payload are left
+        out, so only their sensors become unavailable. Combined updates also
+        refresh the market prices if they are due.
+        """
+        now = dt_util.now()
+        live_overviews = async_fetch_systems(
+            self.system_ids, self.api_client.async_get_live_overview
+        )
+        if self.combined and now >= self._market_price_due:
+            results, market_prices = await asyncio.gather(
+                live_overviews,
+                self._async_fetch_market_prices(now),
+                return_exceptions=True,
+            )
+            if isinstance(results, BaseException):
+                raise results
+            self._async_publish_market_prices(market_prices)
+        else:
+            results = await live_overviews
+        payloads = {}
+        overviews = {}
+        for system_id, result in results.items():
+            if system_id not in self.energy:
+                # No entry monitors the system any more.
+                continue
+            if isinstance(result, Exception):
+                _LOGGER.warning(
+                    "Error fetching live overview of %s: %s", system_id, result
+                )
+                continue
+            try:
+                overview = LiveOverview.from_payload(result, self._battery_capacity)
+                self.energy[system_id].update(overview, now)
+                self.costs[system_id].update(
+                    overview, now, self._price_caches[system_id].timeline
+                )
+                self._poll_intervals[system_id].update(overview)
+            except (AttributeError, TypeError, ValueError) as err:
+                _LOGGER.warning("Invalid live overview of %s: %s", system_id, err)
+                results[system_id] = UpdateFailed(f"Invalid live overview: {err}")
+                continue
+            payloads[system_id] = result
+            overviews[system_id] = overview
+        # Poll as fast as the most active system needs.
+        self.coordinator.update_interval = min(
+            (poll_interval.interval for poll_interval in self._poll_intervals.values()),
+            default=self._min_interval,
+        )
+        if not overviews:
+            self.coordinator.update_interval = self._at_least_until_recovery(
+                self.coordinator.update_interval
+            )
+            raise UpdateFailed(
+                f"Error fetching live overview: {next(iter(results.values()), None)}"
+            )
+
+        for entry_id, system_ids in self._subscriptions.items():
+            snapshot_store = self.snapshot_stores[entry_id]
+            snapshot_store.async_update_live_overview(
+                {
+                    system_id: payloads[system_id]
+                    for system_id in system_ids
+                    if system_id in payloads
+                },
+                now,
+            )
+            snapshot_store.async_update_energy(
+                {
+                    system_id: self.energy[system_id].as_dict()
+                    for system_id in system_ids
+                }
+            )
+            snapshot_store.async_update_costs(
+                {system_id: self.costs[system_id].as_dict() for system_id in system_ids}
+            )
+        self.coordinator.fetched_at = now
+        return overviews
+
+    async def _async_update_system_market_price(
+        self, system_id: str, now: datetime
+    ) -> PriceTimeline | None:
+        """Return the cached price timeline of a system, refetching it if stale."""
+        if (price_cache := self._price_caches.get(system_id)) is None:
+            # No entry monitors the system any more.
+            return None
+        if price_cache.is_stale(now):
+            try:
+                timeline = await self.api_client.async_get_market_price(system_id)
+            except Exception as err:
+                if not price_cache.covers(now):
+                    raise
+                _LOGGER.warning(
+                    "Error refreshing market prices of %s, keeping cache: %s",
+                    system_id,
+                    err,
+                )
+                return price_cache.timeline
+            price_cache.update(timeline, now)
+            for entry_id, system_ids in self._subscriptions.items():
+                if system_id in system_ids:
+                    self.snapshot_stores[entry_id].async_update_timeline(
+                        system_id, timeline, now
+                    )
+        return price_cache.timeline
+
+    async def _async_fetch_market_prices(
+        self, now: datetime
+    ) -> dict[str, PriceTimeline]:
+        """Return the price timeline of every system that has one.
+
+        Also decides when the prices are due again.
+        """
+        results = await async_fetch_systems(
+            self.system_ids,
+            partial(self._async_update_system_market_price, now=now),
+        )
+        timelines = {}
+        errors = []
+        for system_id, result in results.items():
+            if isinstance(result, Exception):
+                errors.append(result)
+                _LOGGER.warning(
+                    "Error fetching market prices of %s: %s", system_id, result
+                )
+            elif result is not None:
+                timelines[system_id] = result
+
+        # Sleep until the first cached series runs out or the next auction is
+        # due, and retry failed systems at the regular interval.
+        next_refreshes = [
+            price_cache.next_refresh(now) for price_cache in self._price_caches.values()
+        ]
+        self._market_price_interval = (
+            max(min(next_refreshes) - now, MARKET_PRICE_MIN_UPDATE_INTERVAL)
+            if not errors and next_refreshes and None not in next_refreshes
+            else self._at_least_until_recovery(MARKET_PRICE_UPDATE_INTERVAL)
+        )
+        self._market_price_due = now + self._market_price_interval
+        if errors and not timelines:
+            raise UpdateFailed(f"Error fetching market prices: {errors[0]}")
+        self.market_price_coordinator.fetched_at = now
+        return timelines
+
+    async def _async_update_market_price(self) -> dict[str, PriceTimeline]:
+        """Fetch the market prices on the coordinator's own timer."""
+        try:
+            return await self._async_fetch_market_prices(dt_util.now())
+        finally:
+            if not self.combined:
+                self.market_price_coordinator.update_interval = (
+                    self._market_price_interval
+                )
+
+    @callback
+    def _async_publish_market_prices(
+        self, result: dict[str, PriceTimeline] | BaseException
+    ) -> None:
+        """Publish the market prices of a combined update if anything changed."""
+        coordinator = self.market_price_coordinator
+        if isinstance(result, Exception):
+            coordinator.async_set_update_error(result)
+        elif isinstance(result, BaseException):
+            raise result
+        elif (
+            result != coordinator.data
+            or coordinator.restored_at
+            or not coordinator.last_update_success
+        ):
+            coordinator.restored_at = {}
+            coordinator.async_set_updated_data(result)
@@ -0,0 +1,254 @@
+"""Day-ahead market price timeline for the 1Komma5Grad integration."""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+import heapq
+import logging
+
+from .const import (
+    MARKET_PRICE_AUCTION_HOUR,
+    MARKET_PRICE_REFRESH_MARGIN,
+    MARKET_PRICE_RETRY_INTERVAL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Slot length used when the series has a single entry.
+DEFAULT_RESOLUTION = 3600.0
+
+
+class PriceTimeline:
+    """Sorted price series stored as parallel arrays of epoch seconds and prices.
+
+    The chart endpoint returns a dict keyed by ISO8601 timestamps. Parsing it
+    once into two flat arrays lets the current slot be found with a binary
+    search instead of re-sorting and re-parsing every timestamp on each read.
+    """
+
+    __slots__ = ("timestamps", "prices", "resolution", "_solutions")
+
+    def __init__(
+        self, timestamps: array, prices: array, resolution: float = DEFAULT_RESOLUTION
+    ) -> None:
+        """Initialize the timeline from already sorted arrays."""
+        self.timestamps = timestamps
+        self.prices = prices
+        self.resolution = resolution
+        # Solver results, valid as long as this timeline is the current one.
+        self._solutions: dict[tuple, tuple[int, ...] | None] = {}
+
+    @classmethod
+    def from_chart(cls, data: dict) -> PriceTimeline | None:
+        """Build a timeline from a `charts/market-prices` response.
+
+        Returns None if the response holds no usable price.
+        """
+        data_dict = (data or {}).get("energyMarket", {}).get("data", {})
+        points = []
+        for ts, entry in data_dict.items():
+            price = entry.get("price") if isinstance(entry, dict) else None
+            if price is None:
+                continue
+            try:
+                points.append((datetime.fromisoformat(ts).timestamp(), float(price)))
+            except (TypeError, ValueError):
+                _LOGGER.debug("Skipping invalid market price entry %s: %s", ts, entry)
+        if not points:
+            return None
+        points.sort()
+
+        timestamps = array("d", (point[0] for point in points))
+        prices = array("d", (point[1] for point in points))
+        resolution = min(
+            (b - a for a, b in zip(timestamps, timestamps[1:]) if b > a),
+            default=DEFAULT_RESOLUTION,
+        )
+        return cls(timestamps, prices, resolution)
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> PriceTimeline | None:
+        """Restore a timeline saved with `as_dict`."""
+        if not data or not data.get("timestamps"):
+            return None
+        return cls(
+            array("d", data["timestamps"]),
+            array("d", data["prices"]),
+            data.get("resolution", DEFAULT_RESOLUTION),
+        )
+
+    def as_dict(self) -> dict:
+        """Return a JSON serializable representation."""
+        return {
+            "timestamps": self.timestamps.tolist(),
+            "prices": self.prices.tolist(),
+            "resolution": self.resolution,
+        }
+
+    def __len__(self) -> int:
+        """Return the number of price slots."""
+        return len(self.timestamps)
+
+    @property
+    def start(self) -> float:
+        """Return the start of the first slot as epoch seconds."""
+        return self.timestamps[0]
+
+    @property
+    def end(self) -> float:
+        """Return the end of the last slot as epoch seconds."""
+        return self.timestamps[-1] + self.resolution
+
+    def index_at(self, ts: float) -> int | None:
+        """Return the index of the slot containing `ts`, or None if outside."""
+        if ts < self.start or ts >= self.end:
+            return None
+        return bisect_right(self.timestamps, ts) - 1
+
+    def price_at(self, ts: float) -> float | None:
+        """Return the price of the slot containing `ts`."""
+        index = self.index_at(ts)
+        if index is None:
+            return None
+        return self.prices[index]
+
+    def next_change(self, ts: float) -> float | None:
+        """Return the epoch time of the next slot boundary after `ts`."""
+        if ts >= self.end:
+            return None
+        index = bisect_right(self.timestamps, ts)
+        if index < len(self.timestamps):
+            return self.timestamps[index]
+        return self.end
+
+    def slot_range(self, start: float, end: float, *, whole: bool = False) -> range:
+        """Return the indices of the slots from `start` until `end`.
+
+        The slot containing `start` is included unless `whole` asks for
+        slots starting at or after it. Slots ending after `end` are not.
+        """
+        if whole:
+            first = bisect_left(self.timestamps, start)
+        elif start >= self.end:
+            first = len(self.timestamps)
+        else:
+            first = max(bisect_right(self.timestamps, start) - 1, 0)
+        last = bisect_right(self.timestamps, end - self.resolution)
+        return range(first, max(first, last))
+
+    def cheapest_window(self, start: float, end: float, slots: int) -> int | None:
+        """Return the first index of the cheapest `slots` consecutive slots.
+
+        Only whole slots between `start` and `end` are considered. Returns
+        None if fewer slots are available.
+        """
+        candidates = self.slot_range(start, end, whole=True)
+        key = ("window", candidates.start, candidates.stop, slots)
+        if key not in self._solutions:
+            self._solutions[key] = self._solve_window(candidates, slots)
+        solution = self._solutions[key]
+        return solution[0] if solution is not None else None
+
+    def cheapest_slots(
+        self, start: float, end: float, slots: int
+    ) -> tuple[int, ...] | None:
+        """Return the indices of the cheapest `slots` slots in time order.
+
+        Only whole slots between `start` and `end` are considered. Returns
+        None if fewer slots are available.
+        """
+        candidates = self.slot_range(start, end, whole=True)
+        key = ("slots", candidates.start, candidates.stop, slots)
+        if key not in self._solutions:
+            if len(candidates) < slots:
+                self._solutions[key] = None
+            else:
+                self._solutions[key] = tuple(
+                    sorted(
+                        heapq.nsmallest(slots, candidates, key=self.prices.__getitem__)
+                    )
+                )
+        return self._solutions[key]
+
+    def _solve_window(self, candidates: range, slots: int) -> tuple[int] | None:
+        """Slide a window of `slots` over the candidates in one pass."""
+        if slots < 1 or len(candidates) < slots:
+            return None
+        prices = self.prices
+        first = candidates.start
+        total = best_total = sum(prices[first : first + slots])
+        best = first
+        for index in range(first + 1, candidates.stop - slots + 1):
+            total += prices[index + slots - 1] - prices[index - 1]
+            if total < best_total:
+                best_total = total
+                best = index
+        return (best,)
+
+
+class PriceTimelineCache:
+    """Hold the last fetched timeline and decide when it must be refetched."""
+
+    def __init__(self) -> None:
+        """Initialize an empty cache."""
+        self.timeline: PriceTimeline | None = None
+        self.fetched_at: datetime | None = None
+
+    def update(self, timeline: PriceTimeline | None, now: datetime) -> None:
+        """Store a freshly fetched timeline.
+
+        An empty response keeps the previous timeline, but still counts as a
+        fetch so the retry interval applies.
+        """
+        if timeline is not None:
+            self.timeline = timeline
+        self.fetched_at = now
+
+    def covers(self, now: datetime) -> bool:
+        """Return True if the cached timeline has a price for `now`."""
+        return (
+            self.timeline is not None
+            and self.timeline.index_at(now.timestamp()) is not None
+        )
+
+    def next_refresh(self, now: datetime) -> datetime | None:
+        """Return when `is_stale` will next become True, None if unknown."""
+        if self.timeline is None or self.fetched_at is None:
+            return None
+        candidates = [
+            datetime.fromtimestamp(self.timeline.end, now.tzinfo)
+            - MARKET_PRICE_REFRESH_MARGIN
+        ]
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        if self.timeline.end < (midnight + timedelta(days=2)).timestamp():
+            candidates.append(
+                max(
+                    midnight.replace(hour=MARKET_PRICE_AUCTION_HOUR),
+                    self.fetched_at + MARKET_PRICE_RETRY_INTERVAL,
+                )
+            )
+        return min(candidates)
+
+    def is_stale(self, now: datetime) -> bool:
+        """Return True if the timeline must be refetched.
+
+        This is the case when nothing is cached, when the cached horizon is
+        about to run out, or when the next day's auction results should be
+        published but are not part of the cached series yet.
+        """
+        if self.timeline is None or self.fetched_at is None:
+            return True
+        if now.timestamp() + MARKET_PRICE_REFRESH_MARGIN.total_seconds() >= (
+            self.timeline.end
+        ):
+            return True
+        if now.hour < MARKET_PRICE_AUCTION_HOUR:
+            return False
+        end_of_tomorrow = now.replace(
+            hour=0, minute=0, second=0, microsecond=0
+        ) + timedelta(days=2)
+        if self.timeline.end >= end_of_tomorrow.timestamp():
+            return False
+        return now - self.fetched_at >= MARKET_PRICE_RETRY_INTERVAL
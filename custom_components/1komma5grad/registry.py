@@ -0,0 +1,90 @@
+"""Objects shared by the config entries of the 1Komma5Grad integration."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass, field
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_SHARED
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class _Shared:
+    """A shared object and the config entries using it."""
+
+    value: Any
+    release: Callable[[], Awaitable[None]] | None
+    entry_ids: set[str] = field(default_factory=set)
+
+
+class SharedRegistry:
+    """Reference-count objects shared by config entries.
+
+    An object is created by the first entry acquiring its key and released
+    once the last entry using it unloads. Entries set up concurrently hold the
+    key's lock while creating, so they do not create the same object twice.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._shared: dict[Hashable, _Shared] = {}
+        self._locks: dict[Hashable, asyncio.Lock] = {}
+
+    def lock(self, key: Hashable) -> asyncio.Lock:
+        """Return the lock serializing the creation of the object of a key."""
+        return self._locks.setdefault(key, asyncio.Lock())
+
+    def acquire(self, key: Hashable, entry_id: str) -> Any | None:
+        """Return the object shared under a key, counting the entry as a user."""
+        if (shared := self._shared.get(key)) is None:
+            return None
+        shared.entry_ids.add(entry_id)
+        return shared.value
+
+    def add(
+        self,
+        key: Hashable,
+        entry_id: str,
+        value: Any,
+        release: Callable[[], Awaitable[None]] | None = None,
+    ) -> None:
+        """Share a new object under a key, used by the entry that created it.
+
+        `release` is awaited once the last entry released the object.
+        """
+        self._shared[key] = _Shared(value, release, {entry_id})
+
+    def entry_ids(self, key: Hashable) -> set[str]:
+        """Return the ids of the entries using the object of a key."""
+        shared = self._shared.get(key)
+        return set(shared.entry_ids) if shared is not None else set()
+
+    async def async_release(self, key: Hashable, entry_id: str) -> None:
+        """Stop counting the entry as a user, releasing the object after the last."""
+        shared = self._shared.get(key)
+        if shared is None:
+            return
+        shared.entry_ids.discard(entry_id)
+        if shared.entry_ids:
+            return
+        del self._shared[key]
+        if (lock := self._locks.get(key)) is not None and not lock.locked():
+            del self._locks[key]
+        _LOGGER.debug("Releasing %s, no entry uses it anymore", key)
+        if shared.release is not None:
+            await shared.release()
+
+
+@callback
+def async_get_registry(hass: HomeAssistant) -> SharedRegistry:
+    """Return the registry of shared objects."""
+    if (registry := hass.data.get(DATA_SHARED)) is None:
+        registry = hass.data[DATA_SHARED] = SharedRegistry()
+    return registry
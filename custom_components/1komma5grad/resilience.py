@@ -0,0 +1,189 @@
+"""Retry and circuit breaker helpers for the 1Komma5Grad API client."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Mapping
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+import logging
+import random
+import time
+from typing import Any
+
+from aiohttp import ClientConnectionError, ClientResponseError
+
+from .const import (
+    API_RETRY_BACKOFF,
+    API_RETRY_MAX_DELAY,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_MAX_RECOVERY_TIME,
+    CIRCUIT_RECOVERY_TIME,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+CIRCUIT_STATES = [STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN]
+
+# Responses worth retrying: throttling and server side errors.
+_TRANSIENT_STATUSES = {
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit is open."""
+
+    def __init__(self, retry_in: float) -> None:
+        """Initialize the error with the seconds until the next probe."""
+        super().__init__(f"API circuit open, next attempt in {retry_in:.0f} s")
+        self.retry_in = retry_in
+
+
+def is_transient(err: BaseException) -> bool:
+    """Return True for errors that may go away when the request is repeated."""
+    if isinstance(err, ClientResponseError):
+        return err.status in _TRANSIENT_STATUSES
+    return isinstance(err, (ClientConnectionError, asyncio.TimeoutError))
+
+
+def retry_after(err: BaseException) -> float | None:
+    """Return the seconds a `Retry-After` header of an error response asks for."""
+    headers: Mapping[str, str] | None = getattr(err, "headers", None)
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int) -> float:
+    """Return the delay before retry `attempt`, with full jitter."""
+    ceiling = min(
+        API_RETRY_BACKOFF.total_seconds() * 2**attempt,
+        API_RETRY_MAX_DELAY.total_seconds(),
+    )
+    return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """Stop calling the API after repeated transient failures.
+
+    After `CIRCUIT_FAILURE_THRESHOLD` failed requests in a row, or a
+    `Retry-After` longer than the client is willing to wait, the circuit
+    opens and requests fail fast. Once the recovery time has passed, a single
+    probe request is let through (half open). If it succeeds the circuit
+    closes, otherwise it opens again for twice as long, up to
+    `CIRCUIT_MAX_RECOVERY_TIME`.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a closed circuit."""
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.retries = 0
+        self.rejected = 0
+        self.last_error: str | None = None
+        self._recovery_time = CIRCUIT_RECOVERY_TIME.total_seconds()
+        self._open_until = 0.0
+        self._probing = False
+        self._listeners: list[Callable[[], None]] = []
+
+    def add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call `listener` when the state or failure count changes."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def _notify(self) -> None:
+        """Call the listeners."""
+        for listener in list(self._listeners):
+            listener()
+
+    @property
+    def retry_in(self) -> float:
+        """Return the seconds until requests are let through again."""
+        if self.state != STATE_OPEN:
+            return 0.0
+        return max(self._open_until - time.monotonic(), 0.0)
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a request may be sent now."""
+        if self.state == STATE_CLOSED:
+            return
+        if self.state == STATE_OPEN and time.monotonic() >= self._open_until:
+            self.state = STATE_HALF_OPEN
+            self._notify()
+        if self.state == STATE_HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(self.retry_in)
+
+    def record_success(self) -> None:
+        """Close the circuit after a request reached the API."""
+        self._probing = False
+        if self.state == STATE_CLOSED and not self.failures:
+            return
+        if self.state != STATE_CLOSED:
+            _LOGGER.info("API reachable again, closing the circuit")
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self._recovery_time = CIRCUIT_RECOVERY_TIME.total_seconds()
+        self._notify()
+
+    def record_failure(self, err: BaseException) -> None:
+        """Count a transient failure and open the circuit if needed."""
+        self._probing = False
+        self.failures += 1
+        self.last_error = str(err) or type(err).__name__
+        requested = retry_after(err)
+        if self.state == STATE_HALF_OPEN:
+            # The probe failed, so the API needs longer to recover.
+            self._recovery_time = min(
+                self._recovery_time * 2, CIRCUIT_MAX_RECOVERY_TIME.total_seconds()
+            )
+            self._open(max(self._recovery_time, requested or 0))
+        elif requested is not None and requested > API_RETRY_MAX_DELAY.total_seconds():
+            self._open(requested)
+        elif self.failures >= CIRCUIT_FAILURE_THRESHOLD:
+            self._open(self._recovery_time)
+        self._notify()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state and counters for diagnostics."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retries": self.retries,
+            "rejected_requests": self.rejected,
+            "last_error": self.last_error,
+            "retry_in": round(self.retry_in, 1),
+        }
+
+    def release(self) -> None:
+        """Let the next request probe again after a cancelled probe."""
+        self._probing = False
+
+    def _open(self, duration: float) -> None:
+        """Reject requests for `duration` seconds."""
+        if self.state != STATE_OPEN:
+            _LOGGER.warning(
+                "API failing (%s), pausing requests for %.0f s",
+                self.last_error,
+                duration,
+            )
+        self.state = STATE_OPEN
+        self._open_until = time.monotonic() + duration
@@ -1,462 +1,595 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
 import logging
-
-from homeassistant.components.sensor import SensorEntity
+from operator import attrgetter, itemgetter
+import time
+from typing import Any
+
+from homeassistant.components.sensor import SensorEntity, SensorEntityDescription
+from homeassistant.const import EntityCategory
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.event import async_track_point_in_utc_time
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-
-from .const import DOMAIN, SENSOR_CONFIG
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import (
+    COST_SENSOR_CONFIG,
+    DEADBAND_MAX_SILENCE,
+    DEVICE_CONFIG,
+    DIAGNOSTIC_SENSOR_CONFIG,
+    DOMAIN,
+    ENERGY_SENSOR_CONFIG,
+    SENSOR_CONFIG,
+)
+from .resilience import CIRCUIT_STATES
 
 _LOGGER = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True, kw_only=True)
+class OneKomma5GradSensorEntityDescription(SensorEntityDescription):
+    """Describe a 1Komma5Grad sensor."""
+
+    device: str
+    value_fn: Callable[[Any], Any] | None = None
+    deadband: float = 0
+    deadband_relative: float = 0
+    daily: bool = False
+
+
+def _description(
+    key: str, config: dict = SENSOR_CONFIG, **kwargs
+) -> OneKomma5GradSensorEntityDescription:
+    """Build a sensor description from its row in `config`."""
+    conf = config[key]
+    return OneKomma5GradSensorEntityDescription(
+        key=key,
+        device=conf["device"],
+        name=conf.get("name"),
+        native_unit_of_measurement=conf.get("unit"),
+        device_class=conf.get("device_class"),
+        state_class=conf.get("state_class"),
+        deadband=conf.get("deadband", 0),
+        deadband_relative=conf.get("deadband_relative", 0),
+        **kwargs,
+    )
+
+
+# Live overview sensors read the LiveOverview field named like their key.
+LIVE_OVERVIEW_SENSORS: tuple[OneKomma5GradSensorEntityDescription, ...] = tuple(
+    _description(key, value_fn=attrgetter(key))
+    for key in SENSOR_CONFIG
+    if key not in ("market_price", "market_price_forecast")
+)
+
+MARKET_PRICE_SENSOR = _description("market_price")
+MARKET_PRICE_FORECAST_SENSOR = _description("market_price_forecast")
+
+ENERGY_SENSORS: tuple[OneKomma5GradSensorEntityDescription, ...] = tuple(
+    _description(key, ENERGY_SENSOR_CONFIG) for key in ENERGY_SENSOR_CONFIG
+)
+
+# Cost sensors read the total of the power field given as their source.
+COST_SENSORS: tuple[OneKomma5GradSensorEntityDescription, ...] = tuple(
+    _description(
+        key,
+        COST_SENSOR_CONFIG,
+        value_fn=itemgetter(conf["source"]),
+        daily=conf.get("daily", False),
+    )
+    for key, conf in COST_SENSOR_CONFIG.items()
+)
+
+API_CIRCUIT_SENSOR = _description(
+    "api_circuit",
+    DIAGNOSTIC_SENSOR_CONFIG,
+    entity_category=EntityCategory.DIAGNOSTIC,
+    options=CIRCUIT_STATES,
+)
+
+API_LATENCY_SENSORS: tuple[OneKomma5GradSensorEntityDescription, ...] = tuple(
+    _description(
+        key,
+        DIAGNOSTIC_SENSOR_CONFIG,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    )
+    for key in ("live_overview_latency", "market_price_latency")
+)
+
+UPDATE_DURATION_SENSOR = _description(
+    "live_overview_update_duration",
+    DIAGNOSTIC_SENSOR_CONFIG,
+    entity_category=EntityCategory.DIAGNOSTIC,
+    entity_registry_enabled_default=False,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class SystemInfo:
+    """How the entities of one system are identified and named."""
+
+    system_id: str
+    unique_id_prefix: str
+    name_suffix: str | None
+    devices: dict[str, DeviceInfo]
+
+
+def _system_info(config_entry, system_id: str, system_name: str) -> SystemInfo:
+    """Build the ids, names and shared device info of a system's entities.
+
+    The system picked in the config flow keeps the unique ids and devices
+    used before an entry could monitor several systems.
+    """
+    if system_id == config_entry.data.get("system_id"):
+        prefix = config_entry.entry_id
+        name_suffix = None
+    else:
+        prefix = f"{config_entry.entry_id}_{slugify(system_id)}"
+        name_suffix = system_name
+    devices = {
+        key: DeviceInfo(
+            identifiers={(DOMAIN, prefix, key)},
+            name=f"{conf['name']} {name_suffix}" if name_suffix else conf["name"],
+            manufacturer="1Komma5Grad",
+            model=conf["model"],
+        )
+        for key, conf in DEVICE_CONFIG.items()
+    }
+    return SystemInfo(system_id, prefix, name_suffix, devices)
+
+
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up sensor platform for 1Komma5Grad."""
-    entry_id = config_entry.entry_id
-    coordinator = hass.data[DOMAIN][entry_id]["coordinator"]
-    market_coordinator = hass.data[DOMAIN][entry_id]["market_price_coordinator"]
+    runtime_data = hass.data[DOMAIN][config_entry.entry_id]
+    coordinator = runtime_data["coordinator"]
+    market_coordinator = runtime_data["market_price_coordinator"]
 
     sensors = []
-
-    # Create Battery Sensors.
-    sensors.append(BatteryInSensor(coordinator, entry_id))
-    sensors.append(BatteryOutSensor(coordinator, entry_id))
-    sensors.append(BatteryChargeSensor(coordinator, entry_id))
-    sensors.append(BatteryEnergySensor(coordinator, entry_id))
-
-    # Create solar panel sensors.
-    sensors.append(SolarPanelSensor(coordinator, entry_id))
-
-    # Create grid sensors.
-    sensors.append(GridFeedInSensor(coordinator, entry_id))
-    sensors.append(GridConsumptionSensor(coordinator, entry_id))
-
-    # House Sensors.
-    sensors.append(HouseConsumptionSensor(coordinator, entry_id))
-
-    # Create Market Price sensors.
-    sensors.append(MarketPriceSensor(market_coordinator, entry_id))
-
-    async_add_entities(sensors, update_before_add=True)
-
-
-class BatteryInSensor(CoordinatorEntity, SensorEntity):
-    """Sensor for Battery In (charging).
-
-    Reports the charging power (W) when the battery is receiving power.
+    systems = []
+    for system_id in runtime_data["system_ids"]:
+        # Device info is built once per device group and shared by its sensors.
+        system = _system_info(
+            config_entry, system_id, runtime_data["system_names"][system_id]
+        )
+        systems.append(system)
+        energy = runtime_data["energy"][system_id]
+        sensors.extend(
+            OneKomma5GradSensor(coordinator, system, description)
+            for description in LIVE_OVERVIEW_SENSORS
+        )
+        sensors.extend(
+            EnergyTotalSensor(coordinator, system, description, energy)
+            for description in ENERGY_SENSORS
+        )
+        costs = runtime_data["costs"][system_id]
+        sensors.extend(
+            CostSensor(coordinator, system, description, costs)
+            for description in COST_SENSORS
+        )
+        sensors.append(
+            MarketPriceSensor(market_coordinator, system, MARKET_PRICE_SENSOR)
+        )
+        sensors.append(
+            MarketPriceForecastSensor(
+                market_coordinator, system, MARKET_PRICE_FORECAST_SENSOR
+            )
+        )
+
+    # The API client is shared by all systems of the entry.
+    api_client = runtime_data["api"]
+    sensors.append(ApiCircuitSensor(api_client.circuit, systems[0], API_CIRCUIT_SENSOR))
+    sensors.extend(
+        ApiLatencySensor(coordinator, api_client, systems[0], description)
+        for description in API_LATENCY_SENSORS
+    )
+    sensors.append(
+        UpdateDurationSensor(coordinator, systems[0], UPDATE_DURATION_SENSOR)
+    )
+
+    # The coordinators already hold fresh data, so no extra update is needed.
+    async_add_entities(sensors)
+
+
+class OneKomma5GradSensor(CoordinatorEntity, SensorEntity):
+    """Sensor reporting one value of a system in a coordinator's data.
+
+    Coordinator updates only write a new state if the value left the
+    description's deadband, so small fluctuations do not add recorder rows.
+    While the coordinator holds data restored from disk, the sensor exposes
+    when that data was fetched, so stale values can be told apart.
     """
 
-    def __init__(self, coordinator, entry_id):
-        """Initialize the Battery In sensor."""
+    entity_description: OneKomma5GradSensorEntityDescription
+
+    def __init__(self, coordinator, system: SystemInfo, description):
+        """Initialize the sensor from its description."""
         super().__init__(coordinator)
-        conf = SENSOR_CONFIG.get("battery_in", {})
-        self._entry_id = entry_id
-        self._attr_name = conf.get("name")
-        self._attr_unique_id = f"{entry_id}_battery_in"
-        self._attr_device_class = conf.get("device_class")
-        self._attr_state_class = conf.get("state_class")
-        self._attr_unit_of_measurement = conf.get("unit")
+        self.entity_description = description
+        self.system_id = system.system_id
+        self._attr_unique_id = f"{system.unique_id_prefix}_{description.key}"
+        self._attr_device_info = system.devices[description.device]
+        if system.name_suffix:
+            self._attr_name = f"{description.name} {system.name_suffix}"
+        self._written: tuple | None = None
+        self._written_at = 0.0
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state unless the value stayed within the deadband."""
+        written = (self.available, self.restored_at, self.native_value)
+        now = time.monotonic()
+        if (
+            self._written is not None
+            and written[:2] == self._written[:2]
+            and now - self._written_at < DEADBAND_MAX_SILENCE.total_seconds()
+            and self._within_deadband(written[2], self._written[2])
+        ):
+            return
+        self._written = written
+        self._written_at = now
+        self.async_write_ha_state()
+
+    def _within_deadband(self, value, last_value) -> bool:
+        """Return True if `value` did not move meaningfully from `last_value`."""
+        if value == last_value:
+            return True
+        description = self.entity_description
+        if not (description.deadband or description.deadband_relative):
+            return False
+        try:
+            delta = abs(float(value) - float(last_value))
+            threshold = max(
+                description.deadband,
+                description.deadband_relative * abs(float(last_value)),
+            )
+        except (TypeError, ValueError):
+            return False
+        # Always publish a return to zero, e.g. when the battery goes idle.
+        return delta < threshold and (value != 0 or last_value == 0)
 
     @property
-    def device_info(self):
-        """Return device information for the battery group."""
-        return {
-            "identifiers": {(DOMAIN, self._entry_id, "battery")},
-            "name": "1Komma5Grad Battery",
-            "manufacturer": "1Komma5Grad",
-            "model": "Battery",
-        }
+    def system_data(self):
+        """Return the coordinator data of the sensor's system."""
+        return (self.coordinator.data or {}).get(self.system_id)
 
     @property
-    def state(self):
-        """Return battery charging power.
-
-        If the battery power value is positive (charging), return that value; otherwise, return 0.
-        """
-        summary = self.coordinator.data.get("summaryCards", {})
-        battery = summary.get("battery", {})
-        power = battery.get("power")
-        if isinstance(power, dict) and "value" in power:
-            try:
-                value = float(power["value"])
-            except (TypeError, ValueError):
-                return None
-        else:
-            try:
-                value = float(power)
-            except (TypeError, ValueError):
-                return None
-
-        if value < 0:
-            return value * -1
-        return 0
+    def restored_at(self):
+        """Return when the restored data of the sensor's system was fetched."""
+        return self.coordinator.restored_at.get(self.system_id)
 
     @property
-    def unit_of_measurement(self):
-        """Always return the configured unit, regardless of API data."""
-        return "W"
-
-
-class BatteryOutSensor(CoordinatorEntity, SensorEntity):
-    """Sensor for Battery Out (discharging) – reports the power in Watts when battery is discharging."""
-
-    def __init__(self, coordinator, entry_id):
-        """Initialize the Battery Out sensor."""
-        super().__init__(coordinator)
-        conf = SENSOR_CONFIG.get("battery_out", {})
-        self._entry_id = entry_id
-        self._attr_name = conf.get("name")
-        self._attr_unique_id = f"{entry_id}_battery_out"
-        self._attr_device_class = conf.get("device_class")
-        self._attr_state_class = conf.get("state_class")
-        self._attr_unit_of_measurement = conf.get("unit")
+    def available(self) -> bool:
+        """Return False while the coordinator holds no data for the system."""
+        return super().available and self.system_data is not None
 
     @property
-    def device_info(self):
-        """Return device information for the battery group."""
-        # Use the same device identifiers as BatteryInSensor so they appear under one device.
-        return {
-            "identifiers": {(DOMAIN, self._entry_id, "battery")},
-            "name": "1Komma5Grad Battery",
-            "manufacturer": "1Komma5Grad",
-            "model": "Battery",
-        }
+    def native_value(self):
+        """Return the value extracted from the system's data."""
+        data = self.system_data
+        if data is None:
+            return None
+        return self.entity_description.value_fn(data)
 
     @property
-    def state(self):
-        """Return battery discharging power.
+    def extra_state_attributes(self):
+        """Return the staleness attributes of restored data."""
+        restored_at = self.restored_at
+        if restored_at is None:
+            return None
+        return {"restored": True, "data_fetched_at": restored_at.isoformat()}
 
-        If the battery power value is negative (discharging), return its absolute value; otherwise, return 0.
-        """
-        summary = self.coordinator.data.get("summaryCards", {})
-        battery = summary.get("battery", {})
-        power = battery.get("power")
-        if isinstance(power, dict) and "value" in power:
-            try:
-                value = float(power["value"])
-            except (TypeError, ValueError):
-                return None
-        else:
-            try:
-                value = float(power)
-            except (TypeError, ValueError):
-                return None
-
-        if value > 0:
-            return value
-        return 0
+
+class EnergyTotalSensor(OneKomma5GradSensor):
+    """Sensor reporting an energy total integrated from live power readings."""
+
+    def __init__(self, coordinator, system, description, energy):
+        """Initialize the sensor with the integrator holding its total."""
+        super().__init__(coordinator, system, description)
+        self._energy = energy
 
     @property
-    def unit_of_measurement(self):
-        """Always return the configured unit, regardless of API data."""
-        return "W"
+    def native_value(self):
+        """Return the accumulated energy in kWh."""
+        return round(self._energy.totals[self.entity_description.key], 3)
 
 
-class BatteryChargeSensor(CoordinatorEntity, SensorEntity):
-    """Sensor for current battery charge as a percentage."""
+class CostSensor(OneKomma5GradSensor):
+    """Sensor reporting grid cost or feed-in revenue in EUR.
 
-    def __init__(self, coordinator, entry_id):
-        super().__init__(coordinator)
-        conf = SENSOR_CONFIG.get("battery_charge", {})
-        self._entry_id = entry_id
-        self._attr_name = conf.get("name")
-        self._attr_unique_id = f"{entry_id}_battery_charge"
-        self._attr_device_class = conf.get("device_class")
-        self._attr_state_class = conf.get("state_class")
-        self._attr_unit_of_measurement = conf.get("unit")
+    The cost is integrated from live power readings and the market price.
+    Daily sensors restart at local midnight, reported as their last reset.
+    """
 
-    @property
-    def device_info(self):
-        """Return device info so that this sensor is grouped under the Battery device."""
-        return {
-            "identifiers": {(DOMAIN, self._entry_id, "battery")},
-            "name": "1Komma5Grad Battery",
-            "manufacturer": "1Komma5Grad",
-            "model": "Battery",
-        }
+    def __init__(self, coordinator, system, description, costs):
+        """Initialize the sensor with the integrator holding its total."""
+        super().__init__(coordinator, system, description)
+        self._costs = costs
 
     @property
-    def state(self):
-        """Return the battery charge percentage.
-
-        Assumes API data is in:
-          coordinator.data["summaryCards"]["battery"]["stateOfCharge"]
-        and is given as a fraction (e.g. 0.7).
-        """
-        summary = self.coordinator.data.get("summaryCards", {})
-        battery = summary.get("battery", {})
-        soc = battery.get("stateOfCharge")
-        try:
-            soc = float(soc)
-        except (TypeError, ValueError):
-            return None
-        # Convert fraction to percentage.
-        return round(soc * 100, 1)
+    def native_value(self):
+        """Return the accumulated amount in EUR."""
+        costs = self._costs
+        totals = costs.daily if self.entity_description.daily else costs.totals
+        return round(self.entity_description.value_fn(totals), 3)
 
     @property
-    def unit_of_measurement(self):
-        """Always return the configured unit, regardless of API data."""
-        return "%"
+    def last_reset(self):
+        """Return the start of the day for daily totals."""
+        if self.entity_description.daily:
+            return self._costs.day_start
+        return None
 
 
-class BatteryEnergySensor(CoordinatorEntity, SensorEntity):
-    """Sensor for current battery energy (kWh) calculated from the charge and battery capacity."""
+class MarketPriceSensor(OneKomma5GradSensor):
+    """Sensor that displays the current market price (ct/kWh) as a heartbeat device.
 
-    def __init__(self, coordinator, entry_id):
-        super().__init__(coordinator)
-        conf = SENSOR_CONFIG.get("battery_energy", {})
-        self._entry_id = entry_id
-        self._attr_name = conf.get("name")
-        self._attr_unique_id = f"{entry_id}_battery_energy"
-        self._attr_device_class = conf.get("device_class")
-        self._attr_state_class = conf.get("state_class")
-        self._attr_unit_of_measurement = conf.get("unit")
-        self._battery_capacity = conf.get("battery_capacity")
+    The coordinator only refetches the day-ahead series when needed, so the
+    sensor schedules its own state write at every price slot boundary.
+    """
 
-    @property
-    def device_info(self):
-        """Return device info so that this sensor is grouped under the Battery device."""
-        return {
-            "identifiers": {(DOMAIN, self._entry_id, "battery")},
-            "name": "1Komma5Grad Battery",
-            "manufacturer": "1Komma5Grad",
-            "model": "Battery",
-        }
+    def __init__(self, coordinator, system, description):
+        """Initialize the market price sensor."""
+        super().__init__(coordinator, system, description)
+        self._unsub_slot_change = None
+
+    async def async_added_to_hass(self) -> None:
+        """Schedule the first slot change once the entity is added."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._cancel_slot_change)
+        self._schedule_slot_change()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Reschedule the slot change for a newly fetched timeline."""
+        self._schedule_slot_change()
+        super()._handle_coordinator_update()
+
+    @callback
+    def _cancel_slot_change(self) -> None:
+        """Cancel a pending slot change timer."""
+        if self._unsub_slot_change is not None:
+            self._unsub_slot_change()
+            self._unsub_slot_change = None
+
+    @callback
+    def _schedule_slot_change(self) -> None:
+        """Schedule a state write at the next price slot boundary."""
+        self._cancel_slot_change()
+        timeline = self.system_data
+        if timeline is None:
+            return
+        next_change = timeline.next_change(time.time())
+        if next_change is None:
+            return
+        self._unsub_slot_change = async_track_point_in_utc_time(
+            self.hass,
+            self._handle_slot_change,
+            dt_util.utc_from_timestamp(next_change),
+        )
+
+    @callback
+    def _handle_slot_change(self, now) -> None:
+        """Write the price of the slot that just started."""
+        self._unsub_slot_change = None
+        self._schedule_slot_change()
+        self.async_write_ha_state()
 
     @property
-    def state(self):
-        """Calculate and return the current battery energy in kWh.
-
-        This is computed as:
+    def native_value(self):
+        """Return the current market price converted to EUR/kWh.
 
-            current_energy = state_of_charge * battery_capacity
-
-        Where:
-          - state_of_charge is assumed to be a fraction from
-            coordinator.data["summaryCards"]["battery"]["stateOfCharge"]
-          - battery_capacity is provided in sensor_conf.
+        Assumes the timeline holds values in ct/kWh.
         """
-        capacity = self._battery_capacity
-        if capacity is None:
-            _LOGGER.error("Battery capacity is not configured")
+        timeline = self.system_data
+        if timeline is None:
             return None
-
-        summary = self.coordinator.data.get("summaryCards", {})
-        battery = summary.get("battery", {})
-        soc = battery.get("stateOfCharge")
-        try:
-            soc = float(soc)
-        except (TypeError, ValueError):
+        raw_value = timeline.price_at(time.time())
+        if raw_value is None:
             return None
+        # Convert from ct/kWh to EUR/kWh by dividing by 100
+        return round(raw_value / 100, 3)
 
-        energy = soc * capacity
-        return round(energy, 2)
 
-    @property
-    def unit_of_measurement(self):
-        """Always return the configured unit, regardless of API data."""
-        return "kWh"
+class MarketPriceForecastSensor(MarketPriceSensor):
+    """Sensor reporting the next slot's price, with the remaining prices.
 
+    The remaining prices are exposed as one compact list, starting at
+    `start` and spaced `resolution` seconds apart, and are only rebuilt when
+    a slot passes or a new timeline is fetched. The list is not recorded.
+    """
 
-class SolarPanelSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a Solar Panel sensor for 1Komma5Grad."""
+    _unrecorded_attributes = frozenset({"start", "resolution", "prices"})
 
-    def __init__(self, coordinator, entry_id):
-        """Initialize the Solar Panel sensor."""
-        super().__init__(coordinator)
-        conf = SENSOR_CONFIG.get("solar_production", {})
-        self._entry_id = entry_id
-        self._attr_name = conf.get("name")
-        self._attr_unique_id = f"{entry_id}_solar_production"
-        self._attr_device_class = conf.get("device_class", "power")
-        self._attr_state_class = conf.get("state_class", "measurement")
-        self._attr_unit_of_measurement = conf.get("unit", "W")
+    def __init__(self, coordinator, system, description):
+        """Initialize the forecast sensor."""
+        super().__init__(coordinator, system, description)
+        self._forecast_timeline = None
+        self._forecast_index: int | None = None
+        self._forecast: dict[str, Any] = {}
 
-    @property
-    def device_info(self):
-        """Return device information for the solar panel group."""
-        return {
-            "identifiers": {(DOMAIN, self._entry_id, "solarpanel")},
-            "name": "1Komma5Grad Solar Panel",
-            "manufacturer": "1Komma5Grad",
-            "model": "Solar Panel",
-        }
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write every new timeline, even if the next slot's price is unchanged.
+
+        A newly published day extends the remaining prices without moving
+        the state, which the deadband would otherwise swallow.
+        """
+        if self.system_data is self._forecast_timeline:
+            super()._handle_coordinator_update()
+            return
+        self._schedule_slot_change()
+        self._written = (self.available, self.restored_at, self.native_value)
+        self._written_at = time.monotonic()
+        self.async_write_ha_state()
+
+    def _remaining(self) -> dict[str, Any]:
+        """Return the forecast attributes of the current slot."""
+        timeline = self.system_data
+        if timeline is None:
+            return {}
+        remaining = timeline.slot_range(time.time(), timeline.end)
+        if (
+            timeline is self._forecast_timeline
+            and remaining.start == self._forecast_index
+        ):
+            return self._forecast
+
+        prices = [round(timeline.prices[index] / 100, 4) for index in remaining]
+        forecast: dict[str, Any] = {}
+        if prices:
+            current = prices[0]
+            next_cheaper = next(
+                (
+                    timeline.timestamps[index]
+                    for index, price in zip(remaining, prices)
+                    if price < current
+                ),
+                None,
+            )
+            forecast = {
+                "start": dt_util.utc_from_timestamp(
+                    timeline.timestamps[remaining.start]
+                ).isoformat(),
+                "resolution": int(timeline.resolution),
+                "prices": prices,
+                "min": min(prices),
+                "max": max(prices),
+                "mean": round(sum(prices) / len(prices), 4),
+                "next_cheaper": (
+                    dt_util.utc_from_timestamp(next_cheaper).isoformat()
+                    if next_cheaper is not None
+                    else None
+                ),
+            }
+        self._forecast_timeline = timeline
+        self._forecast_index = remaining.start
+        self._forecast = forecast
+        return forecast
 
     @property
-    def state(self):
-        """Return the solar panel sensor state."""
-        live_data = self.coordinator.data.get("liveHeroView", {})
-        sensor_data = live_data.get("production", {})
-        if sensor_data and isinstance(sensor_data, dict) and "value" in sensor_data:
-            return sensor_data["value"]
-        return sensor_data
+    def native_value(self):
+        """Return the price of the next slot in EUR/kWh."""
+        prices = self._remaining().get("prices")
+        if not prices or len(prices) < 2:
+            return None
+        return round(prices[1], 3)
 
     @property
-    def unit_of_measurement(self):
-        """Return the configured unit."""
-        return "W"
+    def extra_state_attributes(self):
+        """Return the remaining prices next to the staleness attributes."""
+        restored = super().extra_state_attributes
+        if restored is None:
+            return self._remaining()
+        return {**self._remaining(), **restored}
 
 
-class GridFeedInSensor(CoordinatorEntity, SensorEntity):
-    """Sensor for Grid Feed-In from liveHeroView."""
+class ApiCircuitSensor(SensorEntity):
+    """Diagnostic sensor reporting the state of the API circuit breaker."""
 
-    def __init__(self, coordinator, entry_id):
-        super().__init__(coordinator)
-        conf = SENSOR_CONFIG.get("grid_feed_in", {})
-        self._entry_id = entry_id
-        self._attr_name = conf.get("name")
-        self._attr_unique_id = f"{entry_id}_grid_feed_in"
-        self._attr_device_class = conf.get("device_class")
-        self._attr_state_class = conf.get("state_class")
-        self._attr_unit_of_measurement = conf.get("unit")
+    _attr_should_poll = False
 
-    @property
-    def device_info(self):
-        """Return device information to group this sensor under the Grid device."""
-        return {
-            "identifiers": {(DOMAIN, self._entry_id, "grid")},
-            "name": "1Komma5Grad Grid",
-            "manufacturer": "1Komma5Grad",
-            "model": "Grid",
-        }
+    def __init__(self, circuit, system: SystemInfo, description) -> None:
+        """Initialize the sensor for the circuit of the entry's API client."""
+        self.entity_description = description
+        self._circuit = circuit
+        self._attr_unique_id = f"{system.unique_id_prefix}_{description.key}"
+        self._attr_device_info = system.devices[description.device]
 
-    @property
-    def state(self):
-        """Return the grid feed-in power value from liveHeroView."""
-        live_data = self.coordinator.data.get("liveHeroView", {})
-        sensor_data = live_data.get("gridFeedIn")
-        if sensor_data and isinstance(sensor_data, dict) and "value" in sensor_data:
-            return sensor_data["value"]
-        return sensor_data
+    async def async_added_to_hass(self) -> None:
+        """Write the state whenever the circuit changes."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._circuit.add_listener(self.async_write_ha_state))
 
     @property
-    def unit_of_measurement(self):
-        """Always return the configured unit, regardless of API data."""
-        return "W"
-
-
-class GridConsumptionSensor(CoordinatorEntity, SensorEntity):
-    """Sensor for Grid Consumption from liveHeroView."""
-
-    def __init__(self, coordinator, entry_id):
-        super().__init__(coordinator)
-        conf = SENSOR_CONFIG.get("grid_consumption", {})
-        self._entry_id = entry_id
-        self._attr_name = conf.get("name")
-        self._attr_unique_id = f"{entry_id}_grid_consumption"
-        self._attr_device_class = conf.get("device_class")
-        self._attr_state_class = conf.get("state_class")
-        self._attr_unit_of_measurement = conf.get("unit")
+    def native_value(self) -> str:
+        """Return the circuit state."""
+        return self._circuit.state
 
     @property
-    def device_info(self):
-        """Return device information to group this sensor under the same Grid device."""
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the failure counters and when requests resume."""
+        retry_in = self._circuit.retry_in
         return {
-            "identifiers": {(DOMAIN, self._entry_id, "grid")},
-            "name": "1Komma5Grad Grid",
-            "manufacturer": "1Komma5Grad",
-            "model": "Grid",
+            "consecutive_failures": self._circuit.failures,
+            "retries": self._circuit.retries,
+            "rejected_requests": self._circuit.rejected,
+            "last_error": self._circuit.last_error,
+            "retry_at": (
+                (dt_util.utcnow() + timedelta(seconds=retry_in)).isoformat()
+                if retry_in
+                else None
+            ),
         }
 
-    @property
-    def state(self):
-        """Return the grid consumption power value from liveHeroView."""
-        live_data = self.coordinator.data.get("liveHeroView", {})
-        sensor_data = live_data.get("gridConsumption")
-        if sensor_data and isinstance(sensor_data, dict) and "value" in sensor_data:
-            return sensor_data["value"]
-        return sensor_data
 
-    @property
-    def unit_of_measurement(self):
-        """Always return the configured unit, regardless of API data."""
-        return "W"
+class ApiLatencySensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor reporting the 95th percentile latency of an endpoint.
 
+    The state is refreshed with every live overview update. The other
+    percentiles and the endpoint's counters are attributes.
+    """
 
-class HouseConsumptionSensor(CoordinatorEntity, SensorEntity):
-    """Sensor that displays the current household consumption."""
+    _unrecorded_attributes = frozenset({"latency", "decode_time"})
 
-    def __init__(self, coordinator, entry_id):
+    def __init__(self, coordinator, api_client, system: SystemInfo, description):
+        """Initialize the sensor for the endpoint named like its key."""
         super().__init__(coordinator)
-        conf = SENSOR_CONFIG.get("house_consumption", {})
-        self._entry_id = entry_id
-        self._attr_name = conf.get("name")
-        self._attr_unique_id = f"{entry_id}_house_consumption"
-        self._attr_device_class = conf.get("device_class")
-        self._attr_state_class = conf.get("state_class")
-        self._attr_unit_of_measurement = conf.get("unit")
+        self.entity_description = description
+        self._api_client = api_client
+        self._endpoint = description.key.removesuffix("_latency")
+        self._attr_unique_id = f"{system.unique_id_prefix}_{description.key}"
+        self._attr_device_info = system.devices[description.device]
 
     @property
-    def device_info(self):
-        """Return device information to group this sensor under the House device."""
-        return {
-            "identifiers": {(DOMAIN, self._entry_id, "house")},
-            "name": "1Komma5Grad House",
-            "manufacturer": "1Komma5Grad",
-            "model": "House Consumption",
-        }
+    def available(self) -> bool:
+        """Return True, the metrics do not depend on the last update."""
+        return True
 
     @property
-    def state(self):
-        """Return the current household consumption from the API data.
-
-        Assumes data is located at summaryCards['household']['power'].
-        """
-        summary = self.coordinator.data.get("summaryCards", {})
-        household = summary.get("household", {})
-        power = household.get("power")
-        if power and isinstance(power, dict) and "value" in power:
-            try:
-                return float(power["value"])
-            except (TypeError, ValueError):
-                _LOGGER.error("Invalid household consumption value: %s", power)
-                return None
-        return None
+    def native_value(self) -> float | None:
+        """Return the 95th percentile latency in ms."""
+        metrics = self._api_client.metrics.get(self._endpoint)
+        if metrics is None:
+            return None
+        latency = metrics.latency.percentile(0.95)
+        return round(latency * 1000, 1) if latency is not None else None
 
     @property
-    def unit_of_measurement(self):
-        """Always return the configured unit, regardless of API data."""
-        return "W"
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the endpoint metrics."""
+        metrics = self._api_client.metrics.get(self._endpoint)
+        if metrics is None:
+            return None
+        return metrics.as_dict()
+
 
+class UpdateDurationSensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor reporting how long the last coordinator update took."""
 
-class MarketPriceSensor(CoordinatorEntity, SensorEntity):
-    """Sensor that displays the latest market price (ct/kWh) as a heartbeat device."""
+    _unrecorded_attributes = frozenset({"update_duration"})
 
-    def __init__(self, coordinator, entry_id):
+    def __init__(self, coordinator, system: SystemInfo, description):
+        """Initialize the sensor."""
         super().__init__(coordinator)
-        conf = SENSOR_CONFIG.get("market_price", {})
-        self._entry_id = entry_id
-        self._attr_name = conf.get("name")
-        self._attr_unique_id = f"{entry_id}_market_price"
-        self._attr_state_class = conf.get("state_class", "measurement")
-        self._attr_unit_of_measurement = conf.get("unit")
+        self.entity_description = description
+        self._attr_unique_id = f"{system.unique_id_prefix}_{description.key}"
+        self._attr_device_info = system.devices[description.device]
 
     @property
-    def device_info(self):
-        """Return device information to group this sensor as a heartbeat device."""
-        return {
-            "identifiers": {(DOMAIN, self._entry_id, "heartbeat")},
-            "name": "1Komma5Grad Heartbeat",
-            "manufacturer": "1Komma5Grad",
-            "model": "Heartbeat Device",
-        }
+    def available(self) -> bool:
+        """Return True, failed updates have a duration as well."""
+        return True
 
     @property
-    def state(self):
-        """Return the latest market price converted to EUR/kWh.
-
-        Assumes the coordinator returns a value in ct/kWh.
-        """
-        raw_value = self.coordinator.data
-        if raw_value is None:
-            return None
-        try:
-            # Convert from ct/kWh to EUR/kWh by dividing by 100
-            eur_value = float(raw_value) / 100
-            return round(eur_value, 3)
-        except (TypeError, ValueError):
-            _LOGGER.error("Invalid market price data: %s", raw_value)
-            return None
+    def native_value(self) -> float | None:
+        """Return the duration of the last update in ms."""
+        duration = self.coordinator.last_update_duration
+        return round(duration * 1000, 1) if duration is not None else None
 
     @property
-    def unit_of_measurement(self):
-        """Always return the configured unit, regardless of API data."""
-        return "EUR/kWh"
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the update counters and duration percentiles."""
+        return self.coordinator.metrics_as_dict()
@@ -0,0 +1,125 @@
+"""Services of the 1Komma5Grad integration."""
+
+from __future__ import annotations
+
+from datetime import datetime
+import math
+import time
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, SERVICE_FIND_CHEAPEST_WINDOW
+from .price import PriceTimeline
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_SYSTEM_ID = "system_id"
+ATTR_HOURS = "hours"
+ATTR_CONTIGUOUS = "contiguous"
+ATTR_DEADLINE = "deadline"
+
+FIND_CHEAPEST_WINDOW_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_SYSTEM_ID): cv.string,
+        vol.Required(ATTR_HOURS): vol.All(vol.Coerce(float), vol.Range(min=0.25)),
+        vol.Optional(ATTR_CONTIGUOUS, default=True): cv.boolean,
+        vol.Optional(ATTR_DEADLINE): cv.datetime,
+    }
+)
+
+
+def _get_timeline(
+    hass: HomeAssistant, entry_id: str | None, system_id: str | None
+) -> PriceTimeline:
+    """Return the cached price timeline of a system.
+
+    The entry and the system may be left out if there is only one.
+    """
+    entries = hass.data.get(DOMAIN, {})
+    if entry_id is None:
+        if len(entries) != 1:
+            raise ServiceValidationError(
+                f"Pass {ATTR_CONFIG_ENTRY_ID} to select one of "
+                f"{len(entries)} loaded entries"
+            )
+        entry_id = next(iter(entries))
+    if entry_id not in entries:
+        raise ServiceValidationError(f"Config entry {entry_id} is not loaded")
+    system_ids = entries[entry_id]["system_ids"]
+    if system_id is None:
+        if len(system_ids) != 1:
+            raise ServiceValidationError(
+                f"Pass {ATTR_SYSTEM_ID} to select one of {len(system_ids)} systems"
+            )
+        system_id = system_ids[0]
+    if system_id not in system_ids:
+        raise ServiceValidationError(f"System {system_id} is not monitored")
+    timelines = entries[entry_id]["market_price_coordinator"].data or {}
+    timeline = timelines.get(system_id)
+    if timeline is None:
+        raise ServiceValidationError("No market prices available yet")
+    return timeline
+
+
+def _slot(timeline: PriceTimeline, index: int) -> dict:
+    """Return one price slot in EUR/kWh, like the market price sensor."""
+    start = timeline.timestamps[index]
+    return {
+        "start": dt_util.utc_from_timestamp(start).isoformat(),
+        "end": dt_util.utc_from_timestamp(start + timeline.resolution).isoformat(),
+        "price": round(timeline.prices[index] / 100, 4),
+    }
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services."""
+
+    async def async_find_cheapest_window(call: ServiceCall) -> ServiceResponse:
+        """Find the cheapest slots of the cached day-ahead prices."""
+        timeline = _get_timeline(
+            hass, call.data.get(ATTR_CONFIG_ENTRY_ID), call.data.get(ATTR_SYSTEM_ID)
+        )
+        deadline: datetime | None = call.data.get(ATTR_DEADLINE)
+        if deadline is not None and deadline.tzinfo is None:
+            deadline = deadline.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+        end = deadline.timestamp() if deadline is not None else timeline.end
+        slots = math.ceil(call.data[ATTR_HOURS] * 3600 / timeline.resolution)
+
+        if call.data[ATTR_CONTIGUOUS]:
+            first = timeline.cheapest_window(time.time(), end, slots)
+            indices = range(first, first + slots) if first is not None else None
+        else:
+            indices = timeline.cheapest_slots(time.time(), end, slots)
+        if indices is None:
+            raise ServiceValidationError(
+                f"Fewer than {slots} price slots are known before the deadline"
+            )
+
+        result = [_slot(timeline, index) for index in indices]
+        return {
+            "start": result[0]["start"],
+            "end": result[-1]["end"],
+            "average_price": round(
+                sum(timeline.prices[index] for index in indices) / len(result) / 100,
+                4,
+            ),
+            "slots": result,
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_FIND_CHEAPEST_WINDOW,
+        async_find_cheapest_window,
+        schema=FIND_CHEAPEST_WINDOW_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
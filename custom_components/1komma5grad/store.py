@@ -0,0 +1,196 @@
+"""Persisted last-known data for the 1Komma5Grad integration."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DATA_SNAPSHOT_STORES,
+    DOMAIN,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_STORAGE_VERSION,
+)
+from .price import PriceTimeline
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class Snapshot:
+    """Last-known payloads loaded from disk, keyed by system id."""
+
+    live_overview: dict[str, dict] = field(default_factory=dict)
+    live_overview_updated_at: dict[str, datetime] = field(default_factory=dict)
+    timelines: dict[str, PriceTimeline] = field(default_factory=dict)
+    timelines_fetched_at: dict[str, datetime] = field(default_factory=dict)
+    energy: dict[str, dict] = field(default_factory=dict)
+    costs: dict[str, dict] = field(default_factory=dict)
+
+
+def _parse_datetime(value: str | None) -> datetime | None:
+    """Parse a stored ISO timestamp."""
+    return dt_util.parse_datetime(value) if value else None
+
+
+def _storage_key(entry_id: str) -> str:
+    """Return the storage key for a config entry."""
+    return f"{DOMAIN}.{entry_id}.snapshot"
+
+
+class SnapshotStore:
+    """Save the last live overview, prices, energy and cost totals of an entry.
+
+    Writes are delayed and coalesced, so frequent polling results in at most
+    one disk write per save delay, plus a final write on shutdown or unload.
+    Use `async_get_snapshot_store` so an entry's pending write is never left
+    to a previous instance.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the store."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, SNAPSHOT_STORAGE_VERSION, _storage_key(entry_id)
+        )
+        self._snapshot = Snapshot()
+        self._save_pending = False
+
+    async def async_load(self) -> Snapshot:
+        """Load the snapshot saved by a previous run."""
+        try:
+            stored = await self._store.async_load()
+        except Exception as err:
+            _LOGGER.warning("Error loading last-known data: %s", err)
+            stored = None
+        if not stored:
+            return self._snapshot
+
+        snapshot = Snapshot(
+            energy=stored.get("energy") or {},
+            costs=stored.get("costs") or {},
+        )
+        live_overview = stored.get("live_overview") or {}
+        updated_at = live_overview.get("updated_at")
+        for system_id, payload in (live_overview.get("data") or {}).items():
+            # Snapshots of older versions hold one time for all systems.
+            fetched_at = _parse_datetime(
+                updated_at.get(system_id)
+                if isinstance(updated_at, dict)
+                else updated_at
+            )
+            if fetched_at is not None:
+                snapshot.live_overview[system_id] = payload
+                snapshot.live_overview_updated_at[system_id] = fetched_at
+        for system_id, market_price in (stored.get("market_price") or {}).items():
+            if not isinstance(market_price, dict):
+                continue
+            timeline = PriceTimeline.from_dict(market_price.get("timeline"))
+            fetched_at = _parse_datetime(market_price.get("fetched_at"))
+            if timeline is not None and fetched_at is not None:
+                snapshot.timelines[system_id] = timeline
+                snapshot.timelines_fetched_at[system_id] = fetched_at
+        self._snapshot = snapshot
+        return snapshot
+
+    @callback
+    def async_update_live_overview(
+        self, data: dict[str, dict], updated_at: datetime
+    ) -> None:
+        """Remember the freshly fetched live overview of each system."""
+        self._snapshot.live_overview.update(data)
+        for system_id in data:
+            self._snapshot.live_overview_updated_at[system_id] = updated_at
+        self._async_schedule_save()
+
+    @callback
+    def async_update_timeline(
+        self, system_id: str, timeline: PriceTimeline | None, fetched_at: datetime
+    ) -> None:
+        """Remember a freshly fetched price timeline of a system."""
+        if timeline is None:
+            return
+        self._snapshot.timelines[system_id] = timeline
+        self._snapshot.timelines_fetched_at[system_id] = fetched_at
+        self._async_schedule_save()
+
+    @callback
+    def async_update_energy(self, energy: dict[str, dict]) -> None:
+        """Remember the current energy totals of each system."""
+        self._snapshot.energy.update(energy)
+        self._async_schedule_save()
+
+    @callback
+    def async_update_costs(self, costs: dict[str, dict]) -> None:
+        """Remember the current cost and revenue totals of each system."""
+        self._snapshot.costs.update(costs)
+        self._async_schedule_save()
+
+    async def async_flush(self) -> None:
+        """Write a pending save now instead of after the save delay."""
+        if self._save_pending:
+            await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Cancel a pending save and remove the stored snapshot."""
+        self._save_pending = False
+        self._snapshot = Snapshot()
+        await self._store.async_remove()
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        """Schedule a delayed write unless one is already pending."""
+        if self._save_pending:
+            return
+        self._save_pending = True
+        self._store.async_delay_save(self._data_to_save, SNAPSHOT_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to write, read at write time."""
+        self._save_pending = False
+        snapshot = self._snapshot
+        data: dict[str, Any] = {"saved_at": dt_util.utcnow().isoformat()}
+        if snapshot.live_overview:
+            data["live_overview"] = {
+                "data": snapshot.live_overview,
+                "updated_at": {
+                    system_id: updated_at.isoformat()
+                    for system_id, updated_at in snapshot.live_overview_updated_at.items()
+                },
+            }
+        if snapshot.timelines:
+            data["market_price"] = {
+                system_id: {
+                    "timeline": timeline.as_dict(),
+                    "fetched_at": snapshot.timelines_fetched_at[system_id].isoformat(),
+                }
+                for system_id, timeline in snapshot.timelines.items()
+            }
+        if snapshot.energy:
+            data["energy"] = snapshot.energy
+        if snapshot.costs:
+            data["costs"] = snapshot.costs
+        return data
+
+
+@callback
+def async_get_snapshot_store(hass: HomeAssistant, entry_id: str) -> SnapshotStore:
+    """Return the snapshot store of a config entry."""
+    stores: dict[str, SnapshotStore] = hass.data.setdefault(DATA_SNAPSHOT_STORES, {})
+    if (snapshot_store := stores.get(entry_id)) is None:
+        snapshot_store = stores[entry_id] = SnapshotStore(hass, entry_id)
+    return snapshot_store
+
+
+async def async_remove_snapshot(hass: HomeAssistant, entry_id: str) -> None:
+    """Remove the stored snapshot of a deleted config entry."""
+    snapshot_store = hass.data.get(DATA_SNAPSHOT_STORES, {}).pop(entry_id, None)
+    if snapshot_store is None:
+        snapshot_store = SnapshotStore(hass, entry_id)
+    await snapshot_store.async_remove()
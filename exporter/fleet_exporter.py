@@ -0,0 +1,298 @@
+"""Poll a fleet of 1Komma5Grad systems without Home Assistant.
+
+Reuses the integration's API client, token handling and payload parsing, polls
+every system of the account (or the given ones) on its own jittered schedule
+with bounded concurrency, and serves the latest values in the Prometheus text
+format or writes every poll as a JSON line.
+
+The token file holds the `access_token` and `refresh_token` of the account, as
+stored in the Home Assistant config entry, and is rewritten when the tokens
+are refreshed. Only aiohttp (and optionally orjson) is required:
+
+    python exporter/fleet_exporter.py --token-file tokens.json --port 9724
+    python exporter/fleet_exporter.py --token-file tokens.json --jsonl -
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import datetime
+import importlib
+import json
+import logging
+from pathlib import Path
+import random
+import sys
+import time
+import types
+
+from aiohttp import ClientSession, TCPConnector, web
+
+INTEGRATION_DIR = (
+    Path(__file__).resolve().parents[1] / "custom_components" / "1komma5grad"
+)
+PACKAGE = "onekomma5grad"
+
+_LOGGER = logging.getLogger("fleet_exporter")
+
+# Prometheus unit suffixes of the sensor units.
+UNIT_SUFFIXES = {
+    "W": "watts",
+    "%": "percent",
+    "kWh": "kilowatt_hours",
+    "EUR/kWh": "eur_per_kilowatt_hour",
+}
+
+
+def load_integration() -> types.SimpleNamespace:
+    """Import the integration modules that do not need Home Assistant.
+
+    The package `__init__` sets up the Home Assistant integration, so the
+    modules are imported into a namespace package of their own instead.
+    """
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [str(INTEGRATION_DIR)]
+    sys.modules[PACKAGE] = package
+    return types.SimpleNamespace(
+        **{
+            name: importlib.import_module(f"{PACKAGE}.{name}")
+            for name in ("api", "auth", "const", "models", "price")
+        }
+    )
+
+
+class FleetExporter:
+    """Poll many systems and keep the latest values of each."""
+
+    def __init__(
+        self,
+        integration: types.SimpleNamespace,
+        api_client,
+        system_ids: list[str],
+        interval: float,
+        jitter: float,
+        concurrency: int,
+        jsonl=None,
+    ) -> None:
+        """Initialize the exporter."""
+        self.integration = integration
+        self.api_client = api_client
+        self.system_ids = system_ids
+        self.interval = interval
+        self.jitter = jitter
+        self.jsonl = jsonl
+        self._semaphore = asyncio.Semaphore(concurrency)
+        sensor_config = integration.const.SENSOR_CONFIG
+        self._battery_capacity = sensor_config["battery_energy"].get("battery_capacity")
+        self._fields = [
+            key
+            for key in sensor_config
+            if key not in ("market_price", "market_price_forecast")
+        ]
+        self._price_caches = {
+            system_id: integration.price.PriceTimelineCache()
+            for system_id in system_ids
+        }
+        self.values: dict[str, dict[str, float]] = {}
+        self.updated_at: dict[str, float] = {}
+        self.errors: dict[str, int] = dict.fromkeys(system_ids, 0)
+
+    async def async_run(self) -> None:
+        """Poll every system until cancelled."""
+        await asyncio.gather(
+            *(self._async_poll_forever(system_id) for system_id in self.system_ids)
+        )
+
+    async def _async_poll_forever(self, system_id: str) -> None:
+        """Poll one system, spreading the systems over the interval."""
+        await asyncio.sleep(random.uniform(0, self.interval))
+        while True:
+            async with self._semaphore:
+                await self._async_poll(system_id)
+            await asyncio.sleep(
+                self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            )
+
+    async def _async_poll(self, system_id: str) -> None:
+        """Fetch and parse the live overview and market price of a system.
+
+        A failed request or a malformed payload counts as an error of the
+        system and leaves its last values in place.
+        """
+        try:
+            payload = await self.api_client.async_get_live_overview(system_id)
+            overview = self.integration.models.LiveOverview.from_payload(
+                payload, self._battery_capacity
+            )
+            values = {
+                key: float(value)
+                for key in self._fields
+                if (value := getattr(overview, key)) is not None
+            }
+        except Exception as err:  # noqa: BLE001
+            self.errors[system_id] += 1
+            _LOGGER.warning("Error polling %s: %s", system_id, err)
+            return
+
+        price = await self._async_market_price(system_id)
+        if price is not None:
+            values["market_price"] = round(price / 100, 3)
+
+        now = time.time()
+        self.values[system_id] = values
+        self.updated_at[system_id] = now
+        if self.jsonl is not None:
+            self.jsonl.write(
+                json.dumps({"system_id": system_id, "time": now, **values}) + "\n"
+            )
+            self.jsonl.flush()
+
+    async def _async_market_price(self, system_id: str) -> float | None:
+        """Return the current price in ct/kWh, refetching the series if stale."""
+        price_cache = self._price_caches[system_id]
+        now = datetime.now().astimezone()
+        if price_cache.is_stale(now):
+            try:
+                timeline = await self.api_client.async_get_market_price(system_id)
+            except Exception as err:  # noqa: BLE001
+                _LOGGER.debug("Error fetching market prices of %s: %s", system_id, err)
+            else:
+                price_cache.update(timeline, now)
+        if price_cache.timeline is None:
+            return None
+        return price_cache.timeline.price_at(now.timestamp())
+
+    def render_prometheus(self) -> str:
+        """Return the latest values in the Prometheus text format."""
+        sensor_config = self.integration.const.SENSOR_CONFIG
+        lines = []
+        for key in [*self._fields, "market_price"]:
+            conf = sensor_config[key]
+            metric = f"onekomma5grad_{key}"
+            if suffix := UNIT_SUFFIXES.get(conf.get("unit")):
+                metric = f"{metric}_{suffix}"
+            lines.append(f"# HELP {metric} {conf['name']}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.extend(
+                f'{metric}{{system_id="{system_id}"}} {values[key]}'
+                for system_id, values in self.values.items()
+                if key in values
+            )
+        lines.append("# HELP onekomma5grad_last_update_timestamp_seconds Last poll")
+        lines.append("# TYPE onekomma5grad_last_update_timestamp_seconds gauge")
+        lines.extend(
+            f'onekomma5grad_last_update_timestamp_seconds{{system_id="{system_id}"}} '
+            f"{updated_at}"
+            for system_id, updated_at in self.updated_at.items()
+        )
+        lines.append("# HELP onekomma5grad_poll_errors_total Failed polls")
+        lines.append("# TYPE onekomma5grad_poll_errors_total counter")
+        lines.extend(
+            f'onekomma5grad_poll_errors_total{{system_id="{system_id}"}} {errors}'
+            for system_id, errors in self.errors.items()
+        )
+        return "\n".join(lines) + "\n"
+
+    async def async_handle_metrics(self, request: web.Request) -> web.Response:
+        """Serve the metrics endpoint."""
+        return web.Response(
+            text=self.render_prometheus(), content_type="text/plain", charset="utf-8"
+        )
+
+
+async def async_main(args: argparse.Namespace) -> None:
+    """Run the exporter."""
+    integration = load_integration()
+    if args.base_url:
+        integration.api.API_BASE_URL = args.base_url
+        integration.api.OAUTH2_TOKEN = f"{args.base_url}/oauth/token"
+
+    token_file = Path(args.token_file)
+    token_data = json.loads(token_file.read_text())
+
+    def save_tokens(new_token_data: dict) -> None:
+        """Keep the rotated refresh token for the next start."""
+        token_file.write_text(json.dumps({**token_data, **new_token_data}, indent=2))
+
+    async with ClientSession(connector=TCPConnector(limit=args.concurrency)) as session:
+        api_client = integration.api.OneKomma5GradApi(
+            session, token_data["access_token"]
+        )
+        api_client.token_manager = integration.auth.TokenManager(
+            token_data, api_client.async_token_refresh, save_tokens
+        )
+
+        system_ids = args.system
+        if not system_ids:
+            systems = await api_client.async_get_systems()
+            system_ids = [system["id"] for system in systems.get("data", [])]
+        _LOGGER.info("Polling %s systems", len(system_ids))
+
+        jsonl = None
+        if args.jsonl == "-":
+            jsonl = sys.stdout
+        elif args.jsonl:
+            jsonl = open(args.jsonl, "a", encoding="utf-8")  # noqa: SIM115
+
+        exporter = FleetExporter(
+            integration,
+            api_client,
+            system_ids,
+            args.interval,
+            args.jitter,
+            args.concurrency,
+            jsonl,
+        )
+        runner = None
+        if args.port:
+            app = web.Application()
+            app.router.add_get("/metrics", exporter.async_handle_metrics)
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, args.host, args.port).start()
+            _LOGGER.info(
+                "Serving metrics on http://%s:%s/metrics", args.host, args.port
+            )
+        try:
+            await exporter.async_run()
+        finally:
+            if runner is not None:
+                await runner.cleanup()
+            if jsonl is not None and jsonl is not sys.stdout:
+                jsonl.close()
+
+
+def main() -> None:
+    """Parse arguments and run the exporter."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--token-file", required=True, help="JSON file with tokens")
+    parser.add_argument(
+        "--system",
+        action="append",
+        help="system id to poll, may be repeated (default: all systems)",
+    )
+    parser.add_argument(
+        "--interval", type=float, default=60, help="poll interval in seconds"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.1, help="relative interval jitter"
+    )
+    parser.add_argument("--concurrency", type=int, default=16, help="parallel requests")
+    parser.add_argument("--host", default="0.0.0.0", help="metrics listen address")
+    parser.add_argument("--port", type=int, help="serve Prometheus metrics")
+    parser.add_argument("--jsonl", help="append polls as JSON lines ('-' = stdout)")
+    parser.add_argument("--base-url", help="API base URL, e.g. of a fake API")
+    args = parser.parse_args()
+    if not args.port and not args.jsonl:
+        parser.error("pass --port and/or --jsonl")
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    try:
+        asyncio.run(async_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Tests for the 1Komma5Grad integration."""
+
+from __future__ import annotations
+
+import base64
+import importlib
+import json
+import time
+import types
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+DOMAIN = "1komma5grad"
+SYSTEM_IDS = ("system-0", "system-1")
+
+
+def integration_module(name: str) -> types.ModuleType:
+    """Import a module of the integration, whose package name is not an identifier."""
+    return importlib.import_module(f"custom_components.{DOMAIN}.{name}")
+
+
+def access_token(account: str = "account-0", lifetime: int = 86400) -> str:
+    """Return an unsigned JWT of an account that expires after `lifetime` seconds."""
+
+    def encode(part: dict) -> str:
+        raw = json.dumps(part).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    now = int(time.time())
+    payload = encode({"sub": account, "iat": now, "exp": now + lifetime})
+    return f"{encode({'alg': 'none'})}.{payload}."
+
+
+def make_entry(
+    *system_ids: str, account: str = "account-0", options: dict | None = None
+) -> MockConfigEntry:
+    """Return a config entry of an account monitoring the given systems."""
+    return MockConfigEntry(
+        domain=DOMAIN,
+        title="1Komma5Grad Account",
+        data={
+            "access_token": access_token(account),
+            "refresh_token": f"refresh-{account}",
+            "system_id": system_ids[0],
+            "system_ids": list(system_ids),
+            "auth_implementation": DOMAIN,
+        },
+        options=options or {},
+    )
@@ -0,0 +1,75 @@
+"""Fixtures for the 1Komma5Grad tests."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from homeassistant.core import HomeAssistant
+import pytest
+from pytest_homeassistant_custom_component.test_util.aiohttp import (
+    AiohttpClientMocker,
+)
+
+from . import SYSTEM_IDS, integration_module
+
+const = integration_module("const")
+
+
+def live_overview(production: float = 1000.0) -> dict:
+    """Return a live overview response."""
+    return {
+        "summaryCards": {
+            "battery": {"power": {"value": 0.0}, "stateOfCharge": 0.5},
+            "household": {"power": {"value": 500.0}},
+        },
+        "liveHeroView": {
+            "production": {"value": production},
+            "gridFeedIn": {"value": production - 500.0},
+            "gridConsumption": {"value": 0.0},
+        },
+    }
+
+
+def market_price() -> dict:
+    """Return a market price chart with hourly prices from the current hour."""
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return {
+        "energyMarket": {
+            "data": {
+                (start + timedelta(hours=hour)).strftime("%Y-%m-%dT%H:%MZ"): {
+                    "price": 20.0 + hour
+                }
+                for hour in range(48)
+            }
+        }
+    }
+
+
+@pytest.fixture
+def mock_api(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    enable_custom_integrations: None,
+) -> AiohttpClientMocker:
+    """Answer the API requests of the test systems."""
+    # application_credentials is only used by the config flow.
+    hass.config.components.add("application_credentials")
+    aioclient_mock.get(
+        f"{const.API_BASE_URL}/api/v2/systems",
+        json={
+            "data": [
+                {"id": system_id, "systemName": f"Home {index}"}
+                for index, system_id in enumerate(SYSTEM_IDS)
+            ]
+        },
+    )
+    for system_id in SYSTEM_IDS:
+        aioclient_mock.get(
+            f"{const.API_BASE_URL}/api/v3/systems/{system_id}/live-overview",
+            json=live_overview(),
+        )
+        aioclient_mock.get(
+            f"{const.API_BASE_URL}/api/v1/systems/{system_id}/charts/market-prices",
+            json=market_price(),
+        )
+    return aioclient_mock
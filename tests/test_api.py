@@ -0,0 +1,333 @@
+"""Tests for the API client."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+from http import HTTPStatus
+
+from aiohttp import ClientResponseError
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+import pytest
+from pytest_homeassistant_custom_component.test_util.aiohttp import (
+    AiohttpClientMocker,
+    AiohttpClientMockResponse,
+)
+
+from . import access_token, integration_module
+from .conftest import live_overview
+
+api = integration_module("api")
+auth = integration_module("auth")
+const = integration_module("const")
+resilience = integration_module("resilience")
+
+LIVE_OVERVIEW_URL = f"{const.API_BASE_URL}/api/v3/systems/system-0/live-overview"
+
+
+@pytest.fixture
+def client(hass: HomeAssistant):
+    """Return an API client without a token manager."""
+    return api.OneKomma5GradApi(async_get_clientsession(hass), access_token())
+
+
+def replies(*responses: tuple):
+    """Return a side effect answering with each `(status, json, headers)` in turn."""
+    remaining = list(responses)
+
+    async def side_effect(method, url, data):
+        status, json, headers = (*remaining.pop(0), None, None)[:3]
+        return AiohttpClientMockResponse(
+            method, url, status=status, json=json, headers=headers
+        )
+
+    return side_effect
+
+
+async def slow_reply(method, url, data):
+    """Answer with a live overview after a short delay."""
+    await asyncio.sleep(0.01)
+    return AiohttpClientMockResponse(method, url, json=live_overview())
+
+
+def test_project() -> None:
+    """A projection keeps the named fields, of every item of lists and `*` maps."""
+    data = {
+        "keep": {"value": 1, "unit": "W"},
+        "nested": {"inner": [{"a": 1, "b": 2}, {"a": 3}], "drop": 0},
+        "map": {"x": {"price": 1, "tax": 2}, "y": {"tax": 3}},
+        "drop": "me",
+    }
+    projection = {
+        "keep": True,
+        "nested": {"inner": {"a": True}},
+        "map": {"*": {"price": True}},
+        "missing": True,
+    }
+    assert api.project(data, projection) == {
+        "keep": {"value": 1, "unit": "W"},
+        "nested": {"inner": [{"a": 1}, {"a": 3}]},
+        "map": {"x": {"price": 1}, "y": {}},
+    }
+    # Values of another shape than projected are kept as they are.
+    assert api.project({"keep": None, "nested": 1}, projection) == {
+        "keep": None,
+        "nested": 1,
+    }
+
+
+async def test_response_trimmed_before_caching(
+    aioclient_mock: AiohttpClientMocker, client
+) -> None:
+    """Responses are trimmed to the projected fields as soon as they are decoded."""
+    full = live_overview()
+    full["summaryCards"]["battery"]["power"]["unit"] = "W"
+    full["weather"] = {"temperature": 20}
+    aioclient_mock.get(LIVE_OVERVIEW_URL, json=full)
+
+    data = await client.async_get_live_overview("system-0")
+
+    assert "weather" not in data
+    assert data["summaryCards"]["battery"]["power"] == {"value": 0.0, "unit": "W"}
+    assert data == api.project(full, const.API_PROJECTIONS["live_overview"])
+    (_, cached), *_ = client._cache.values()
+    assert cached.data is data
+
+
+async def test_transient_failures_are_retried(
+    aioclient_mock: AiohttpClientMocker, client, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Server errors and rate limiting are retried, honoring Retry-After."""
+    monkeypatch.setattr(api, "backoff_delay", lambda attempt: 0.0)
+    aioclient_mock.get(
+        LIVE_OVERVIEW_URL,
+        side_effect=replies(
+            (HTTPStatus.SERVICE_UNAVAILABLE,),
+            (HTTPStatus.TOO_MANY_REQUESTS, None, {"Retry-After": "0"}),
+            (HTTPStatus.OK, live_overview()),
+        ),
+    )
+
+    data = await client.async_get_live_overview("system-0")
+
+    assert data["liveHeroView"]["production"] == {"value": 1000.0}
+    assert aioclient_mock.call_count == 3
+    assert client.circuit.retries == 2
+    # The call succeeded, so the circuit counts no failure.
+    assert client.circuit.failures == 0
+
+
+async def test_client_errors_and_posts_are_not_retried(
+    aioclient_mock: AiohttpClientMocker, client
+) -> None:
+    """Client errors are not retried and do not count against the circuit."""
+    aioclient_mock.get(LIVE_OVERVIEW_URL, status=HTTPStatus.NOT_FOUND)
+    aioclient_mock.post(
+        f"{const.API_BASE_URL}/api/v1/command", status=HTTPStatus.BAD_GATEWAY
+    )
+
+    with pytest.raises(ClientResponseError):
+        await client.async_get_live_overview("system-0")
+    assert aioclient_mock.call_count == 1
+    assert client.circuit.failures == 0
+
+    with pytest.raises(ClientResponseError):
+        await client.async_post_data(f"{const.API_BASE_URL}/api/v1/command", {})
+    assert aioclient_mock.call_count == 2
+    assert client.circuit.failures == 1
+
+
+async def test_long_retry_after_opens_circuit(
+    aioclient_mock: AiohttpClientMocker, client
+) -> None:
+    """A Retry-After longer than the client waits for opens the circuit."""
+    aioclient_mock.get(
+        LIVE_OVERVIEW_URL,
+        status=HTTPStatus.TOO_MANY_REQUESTS,
+        headers={"Retry-After": "3600"},
+    )
+
+    with pytest.raises(ClientResponseError):
+        await client.async_get_live_overview("system-0")
+    assert aioclient_mock.call_count == 1
+    assert client.circuit.state == resilience.STATE_OPEN
+
+    with pytest.raises(resilience.CircuitOpenError):
+        await client.async_get_live_overview("system-0")
+    assert aioclient_mock.call_count == 1
+
+
+async def test_concurrent_requests_share_one(
+    aioclient_mock: AiohttpClientMocker, client
+) -> None:
+    """Concurrent callers wait for one request, later ones read the cache."""
+    aioclient_mock.get(LIVE_OVERVIEW_URL, side_effect=slow_reply)
+
+    first, second, third = await asyncio.gather(
+        *(client.async_get_live_overview("system-0") for _ in range(3))
+    )
+    assert first is second is third
+    assert aioclient_mock.call_count == 1
+    assert client.metrics["live_overview"].shared == 2
+
+    assert await client.async_get_live_overview("system-0") is first
+    assert aioclient_mock.call_count == 1
+    assert client.metrics["live_overview"].cache_hits == 1
+
+
+async def test_cancelled_caller_does_not_cancel_others(
+    aioclient_mock: AiohttpClientMocker, client
+) -> None:
+    """A caller giving up leaves the shared request to the other callers."""
+    aioclient_mock.get(LIVE_OVERVIEW_URL, side_effect=slow_reply)
+    cancelled = asyncio.create_task(client.async_get_live_overview("system-0"))
+    waiting = asyncio.create_task(client.async_get_live_overview("system-0"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    assert (await waiting)["liveHeroView"]["production"] == {"value": 1000.0}
+    assert cancelled.cancelled()
+    assert aioclient_mock.call_count == 1
+
+
+async def test_expired_responses_are_evicted(
+    aioclient_mock: AiohttpClientMocker, client, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Responses are refetched after their TTL and dropped from the cache."""
+    monkeypatch.setitem(api.API_CACHE_TTL, "live_overview", timedelta(seconds=0.02))
+    aioclient_mock.get(LIVE_OVERVIEW_URL, json=live_overview())
+    aioclient_mock.get(
+        LIVE_OVERVIEW_URL.replace("system-0", "system-1"), json=live_overview()
+    )
+
+    await client.async_get_live_overview("system-0")
+    await asyncio.sleep(0.03)
+    await client.async_get_live_overview("system-1")
+    # Storing the second response dropped the expired first one.
+    assert [key[0] for key in client._cache] == [
+        LIVE_OVERVIEW_URL.replace("system-0", "system-1")
+    ]
+
+    await client.async_get_live_overview("system-0")
+    assert aioclient_mock.call_count == 3
+
+
+async def test_failures_are_not_cached(
+    aioclient_mock: AiohttpClientMocker, client
+) -> None:
+    """A failed request is sent again by the next caller."""
+    aioclient_mock.get(
+        LIVE_OVERVIEW_URL,
+        side_effect=replies((HTTPStatus.NOT_FOUND,), (HTTPStatus.OK, live_overview())),
+    )
+
+    with pytest.raises(ClientResponseError):
+        await client.async_get_live_overview("system-0")
+    await client.async_get_live_overview("system-0")
+    assert aioclient_mock.call_count == 2
+    assert not client._in_flight
+
+
+def delayed_replies(*delays: float):
+    """Return a side effect answering each request after the next delay."""
+    remaining = list(delays)
+
+    async def side_effect(method, url, data):
+        await asyncio.sleep(remaining.pop(0))
+        return AiohttpClientMockResponse(method, url, json=live_overview())
+
+    return side_effect
+
+
+async def test_retries_stop_at_deadline(
+    aioclient_mock: AiohttpClientMocker, client, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A retry that would end after the call's deadline is not sent."""
+    monkeypatch.setitem(api.API_TIMEOUT, "live_overview", timedelta(seconds=0.1))
+    aioclient_mock.get(
+        LIVE_OVERVIEW_URL,
+        side_effect=replies(
+            (HTTPStatus.SERVICE_UNAVAILABLE, None, {"Retry-After": "0.2"}),
+            (HTTPStatus.OK, live_overview()),
+        ),
+    )
+
+    with pytest.raises(ClientResponseError):
+        await client.async_get_live_overview("system-0")
+    assert aioclient_mock.call_count == 1
+    assert client.circuit.retries == 0
+
+
+@pytest.fixture
+def hedging(client, monkeypatch: pytest.MonkeyPatch):
+    """Give the client enough fast live overview samples to start hedging."""
+    monkeypatch.setattr(api, "API_HEDGE_MIN_DELAY", timedelta(milliseconds=10))
+    latency = client._metrics("live_overview").latency
+    for _ in range(const.API_HEDGE_MIN_SAMPLES):
+        latency.add(0.001)
+
+
+async def test_slow_request_is_hedged(
+    aioclient_mock: AiohttpClientMocker, client, hedging
+) -> None:
+    """A request slower than usual gets a second one, the first answer wins."""
+    aioclient_mock.get(LIVE_OVERVIEW_URL, side_effect=delayed_replies(5.0, 0.0))
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    await client.async_get_live_overview("system-0")
+
+    assert loop.time() - start < 1.0
+    assert aioclient_mock.call_count == 2
+    metrics = client.metrics["live_overview"]
+    assert metrics.hedged == 1
+    assert metrics.hedge_wins == 1
+
+
+async def test_not_hedged_unless_circuit_closed(
+    aioclient_mock: AiohttpClientMocker, client, hedging
+) -> None:
+    """A recovering API does not get a second request."""
+    aioclient_mock.get(LIVE_OVERVIEW_URL, side_effect=delayed_replies(0.05))
+    client.circuit.state = resilience.STATE_HALF_OPEN
+
+    await client.async_get_live_overview("system-0")
+
+    assert aioclient_mock.call_count == 1
+    assert client.metrics["live_overview"].hedged == 0
+    assert client.circuit.state == resilience.STATE_CLOSED
+
+
+async def test_rejected_token_is_refreshed_and_retried(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """A 401 refreshes the token once and retries with the new one."""
+    refreshed = access_token(lifetime=7200)
+    refreshes = []
+
+    async def refresh(refresh_token: str) -> dict:
+        refreshes.append(refresh_token)
+        return {"access_token": refreshed, "expires_in": 7200}
+
+    old_token = access_token()
+    client = api.OneKomma5GradApi(async_get_clientsession(hass), old_token)
+    client.token_manager = auth.TokenManager(
+        {"access_token": old_token, "refresh_token": "refresh"}, refresh
+    )
+    aioclient_mock.get(
+        LIVE_OVERVIEW_URL,
+        side_effect=replies(
+            (HTTPStatus.UNAUTHORIZED,), (HTTPStatus.OK, live_overview())
+        ),
+    )
+
+    await client.async_get_live_overview("system-0")
+
+    assert refreshes == ["refresh"]
+    assert [call[3]["Authorization"] for call in aioclient_mock.mock_calls] == [
+        f"Bearer {old_token}",
+        f"Bearer {refreshed}",
+    ]
+    assert client.access_token == refreshed
+    assert client.circuit.failures == 0
@@ -0,0 +1,81 @@
+"""Tests for the access token manager."""
+
+from __future__ import annotations
+
+import asyncio
+
+from . import access_token, integration_module
+
+auth = integration_module("auth")
+
+
+class Refresher:
+    """Stand-in token endpoint counting its refreshes."""
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.refreshes = 0
+        self.saved: list[dict] = []
+
+    async def refresh(self, refresh_token: str) -> dict:
+        """Return new tokens after a short delay."""
+        self.refreshes += 1
+        await asyncio.sleep(0.01)
+        return {
+            "access_token": access_token(lifetime=3600 + self.refreshes),
+            "refresh_token": f"refresh-{self.refreshes}",
+            "expires_in": 3600,
+        }
+
+
+def manager(refresher: Refresher, lifetime: int) -> auth.TokenManager:
+    """Return a token manager whose access token expires after `lifetime` seconds."""
+    return auth.TokenManager(
+        {"access_token": access_token(lifetime=lifetime), "refresh_token": "refresh"},
+        refresher.refresh,
+        refresher.saved.append,
+    )
+
+
+def test_account_id() -> None:
+    """The account is the subject of the access token."""
+    assert auth.account_id({"access_token": access_token("account-1")}) == "account-1"
+    assert auth.account_id({"access_token": "not a jwt"}) is None
+
+
+async def test_valid_token_is_not_refreshed() -> None:
+    """A token outside the refresh margin is used as it is."""
+    refresher = Refresher()
+    tokens = manager(refresher, lifetime=3600)
+    assert await tokens.async_get_access_token() == tokens.access_token
+    assert refresher.refreshes == 0
+
+
+async def test_expiring_token_is_refreshed_once() -> None:
+    """Concurrent callers share one refresh of an expiring token."""
+    refresher = Refresher()
+    tokens = manager(refresher, lifetime=10)
+    old_token = tokens.access_token
+
+    results = await asyncio.gather(*(tokens.async_get_access_token() for _ in range(5)))
+
+    assert refresher.refreshes == 1
+    assert set(results) == {tokens.access_token}
+    assert tokens.access_token != old_token
+    assert tokens.refresh_token == "refresh-1"
+    # The refreshed tokens are saved with their expiry.
+    (saved,) = refresher.saved
+    assert saved["refresh_token"] == "refresh-1"
+    assert saved["expires_at"] == tokens.expires_at
+
+
+async def test_rejected_token_is_refreshed_once() -> None:
+    """Callers whose token was already replaced get the new one."""
+    refresher = Refresher()
+    tokens = manager(refresher, lifetime=3600)
+    rejected = tokens.access_token
+
+    results = await asyncio.gather(*(tokens.async_refresh(rejected) for _ in range(3)))
+
+    assert refresher.refreshes == 1
+    assert set(results) == {tokens.access_token}
@@ -0,0 +1,81 @@
+"""Tests for the adaptive live overview poll interval."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from . import integration_module
+
+coordinator = integration_module("coordinator")
+models = integration_module("models")
+
+MIN = timedelta(seconds=30)
+MAX = timedelta(seconds=300)
+
+
+def overview(production: float = 0, battery: float = 0, grid: float = 0):
+    """Return a live overview with the given power flows."""
+    return models.LiveOverview(
+        solar_production=production,
+        battery_power=battery,
+        grid_consumption=grid,
+        house_consumption=grid + production + battery,
+    )
+
+
+def test_idle_backs_off_to_maximum() -> None:
+    """Without production or battery flow the interval doubles up to the maximum."""
+    poll_interval = coordinator.AdaptivePollInterval(MIN, MAX)
+    intervals = [poll_interval.update(overview(grid=400)) for _ in range(5)]
+    assert intervals == [
+        timedelta(seconds=60),
+        timedelta(seconds=120),
+        timedelta(seconds=240),
+        MAX,
+        MAX,
+    ]
+
+
+def test_steady_backs_off_to_quarter_of_maximum() -> None:
+    """Steady active flows back off slowly, to at most a quarter of the maximum."""
+    poll_interval = coordinator.AdaptivePollInterval(MIN, MAX)
+    intervals = [poll_interval.update(overview(production=3000)) for _ in range(4)]
+    assert intervals == [
+        timedelta(seconds=45),
+        timedelta(seconds=67.5),
+        MAX / 4,
+        MAX / 4,
+    ]
+
+
+def test_change_returns_to_minimum() -> None:
+    """A change beyond the activity threshold polls at the minimum again."""
+    poll_interval = coordinator.AdaptivePollInterval(MIN, MAX)
+    for _ in range(3):
+        poll_interval.update(overview(production=3000))
+    assert poll_interval.interval > MIN
+
+    # Small fluctuations count as steady.
+    small = coordinator.POLL_ACTIVITY_THRESHOLD / 2
+    assert poll_interval.update(overview(production=3000 + small)) > MIN
+    assert poll_interval.update(overview(production=2000)) == MIN
+
+
+def test_change_while_idle_keeps_backing_off() -> None:
+    """Grid changes of an idle system, e.g. appliances at night, do not speed up."""
+    poll_interval = coordinator.AdaptivePollInterval(MIN, MAX)
+    poll_interval.update(overview(grid=100))
+    assert poll_interval.update(overview(grid=2000)) == 2 * 2 * MIN
+
+
+def test_missing_values_count_as_zero() -> None:
+    """A payload without power values is treated as idle."""
+    poll_interval = coordinator.AdaptivePollInterval(MIN, MAX)
+    assert poll_interval.update(models.LiveOverview()) == 2 * MIN
+
+
+def test_maximum_below_minimum() -> None:
+    """A maximum below the minimum polls at the minimum."""
+    poll_interval = coordinator.AdaptivePollInterval(MIN, MIN / 2)
+    assert poll_interval.update(overview()) == MIN
+    assert poll_interval.update(overview(production=3000)) == MIN
@@ -0,0 +1,151 @@
+"""Tests for the energy and cost integrators."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from homeassistant.util import dt as dt_util
+import pytest
+
+from . import integration_module
+
+energy = integration_module("energy")
+models = integration_module("models")
+
+START = datetime(2025, 6, 1, 12, tzinfo=timezone.utc)
+MAX_GAP = timedelta(minutes=10)
+SOURCES = {"grid_consumption": "grid_consumption"}
+
+
+class FlatTimeline:
+    """Stand-in price timeline in ct/kWh, with a new price from `change_at`."""
+
+    def __init__(self, before: float, after: float | None = None, change_at=None):
+        """Initialize the prices."""
+        self.before = before
+        self.after = before if after is None else after
+        self.change_at = change_at.timestamp() if change_at else None
+
+    def price_at(self, ts: float) -> float | None:
+        """Return the price at `ts`."""
+        if self.change_at is not None and ts >= self.change_at:
+            return self.after
+        return self.before
+
+
+def grid(power: float | None):
+    """Return a live overview with the given grid consumption."""
+    return models.LiveOverview(grid_consumption=power)
+
+
+def test_trapezoid() -> None:
+    """Each interval adds the mean of its two readings."""
+    integrator = energy.EnergyIntegrator(SOURCES, MAX_GAP)
+    integrator.update(grid(1000), START)
+    assert integrator.totals["grid_consumption"] == 0
+    integrator.update(grid(3000), START + timedelta(minutes=6))
+    integrator.update(grid(3000), START + timedelta(minutes=9))
+    # 2 kW for 0.1 h, then 3 kW for 0.05 h.
+    assert integrator.totals["grid_consumption"] == pytest.approx(0.35)
+
+
+def test_gap_adds_nothing() -> None:
+    """An interval longer than the maximum gap is skipped, not extrapolated."""
+    integrator = energy.EnergyIntegrator(SOURCES, MAX_GAP)
+    integrator.update(grid(1000), START)
+    integrator.update(grid(1000), START + MAX_GAP + timedelta(seconds=1))
+    assert integrator.totals["grid_consumption"] == 0
+    integrator.update(grid(1000), START + MAX_GAP + timedelta(minutes=6, seconds=1))
+    assert integrator.totals["grid_consumption"] == pytest.approx(0.1)
+
+
+def test_missing_and_negative_readings() -> None:
+    """Missing readings add nothing and negative noise never decreases a total."""
+    integrator = energy.EnergyIntegrator(SOURCES, MAX_GAP)
+    integrator.update(grid(None), START)
+    integrator.update(grid(1000), START + timedelta(minutes=6))
+    assert integrator.totals["grid_consumption"] == 0
+    integrator.update(grid(-3000), START + timedelta(minutes=12))
+    assert integrator.totals["grid_consumption"] == 0
+    # Readings going back in time are ignored.
+    integrator.update(grid(1000), START)
+    assert integrator.totals["grid_consumption"] == 0
+
+
+def test_restore_continues_integration() -> None:
+    """A restored integrator continues from the saved reading."""
+    integrator = energy.EnergyIntegrator(SOURCES, MAX_GAP)
+    integrator.update(grid(1000), START)
+    integrator.update(grid(1000), START + timedelta(minutes=6))
+
+    restored = energy.EnergyIntegrator(SOURCES, MAX_GAP)
+    restored.restore(integrator.as_dict())
+    assert restored.totals == integrator.totals
+    restored.update(grid(1000), START + timedelta(minutes=12))
+    assert restored.totals["grid_consumption"] == pytest.approx(0.2)
+
+    # Unknown totals and invalid values are ignored.
+    restored.restore({"totals": {"grid_consumption": "invalid", "other": 1}})
+    assert restored.totals == {"grid_consumption": pytest.approx(0.2)}
+
+
+def test_cost_priced_at_interval_middle() -> None:
+    """Energy is priced in EUR at the ct/kWh price in the middle of the interval."""
+    integrator = energy.CostIntegrator(SOURCES, MAX_GAP)
+    change_at = START + timedelta(minutes=2)
+    timeline = FlatTimeline(30, 10, change_at)
+    integrator.update(grid(2000), START, timeline)
+    integrator.update(grid(2000), START + timedelta(minutes=6), timeline)
+    # 0.2 kWh, the middle of the interval is after the change.
+    assert integrator.totals["grid_consumption"] == pytest.approx(0.02)
+    assert integrator.daily["grid_consumption"] == pytest.approx(0.02)
+
+
+def test_cost_without_price_adds_nothing() -> None:
+    """Intervals without a known price add no cost."""
+    integrator = energy.CostIntegrator(SOURCES, MAX_GAP)
+    integrator.update(grid(2000), START)
+    integrator.update(grid(2000), START + timedelta(minutes=6))
+    integrator.update(grid(2000), START + timedelta(minutes=12), FlatTimeline(None))
+    assert integrator.totals["grid_consumption"] == 0
+
+
+@pytest.fixture
+def utc():
+    """Use UTC as local time."""
+    time_zone = dt_util.DEFAULT_TIME_ZONE
+    dt_util.set_default_time_zone(timezone.utc)
+    yield
+    dt_util.set_default_time_zone(time_zone)
+
+
+def test_cost_split_at_midnight(utc) -> None:
+    """An interval spanning midnight only adds its later part to the new day."""
+    integrator = energy.CostIntegrator(SOURCES, MAX_GAP)
+    midnight = datetime(2025, 6, 2, tzinfo=timezone.utc)
+    timeline = FlatTimeline(10, 20, midnight)
+    integrator.update(grid(1000), midnight - timedelta(minutes=6), timeline)
+    integrator.update(grid(1000), midnight - timedelta(minutes=3), timeline)
+    assert integrator.daily["grid_consumption"] == pytest.approx(0.005)
+
+    integrator.update(grid(1000), midnight + timedelta(minutes=6), timeline)
+    assert integrator.day_start == midnight
+    # 0.05 kWh at 10 ct before midnight, 0.1 kWh at 20 ct after it.
+    assert integrator.daily["grid_consumption"] == pytest.approx(0.02)
+    assert integrator.totals["grid_consumption"] == pytest.approx(0.03)
+
+
+def test_cost_restore_keeps_daily_totals() -> None:
+    """Daily totals survive a restart on the same day."""
+    integrator = energy.CostIntegrator(SOURCES, MAX_GAP)
+    timeline = FlatTimeline(10)
+    integrator.update(grid(1000), START, timeline)
+    integrator.update(grid(1000), START + timedelta(minutes=6), timeline)
+
+    restored = energy.CostIntegrator(SOURCES, MAX_GAP)
+    restored.restore(integrator.as_dict())
+    restored.update(grid(1000), START + timedelta(minutes=12), timeline)
+    assert restored.daily["grid_consumption"] == pytest.approx(0.02)
+    restored.update(grid(1000), START + timedelta(days=1), timeline)
+    assert restored.daily["grid_consumption"] == 0
+    assert restored.totals["grid_consumption"] == pytest.approx(0.02)
@@ -0,0 +1,150 @@
+"""Tests for the energy history backfill."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+import pytest
+from pytest_homeassistant_custom_component.test_util.aiohttp import (
+    AiohttpClientMocker,
+)
+
+from . import access_token, integration_module, make_entry
+
+api = integration_module("api")
+const = integration_module("const")
+history = integration_module("history")
+registry = integration_module("registry")
+resilience = integration_module("resilience")
+
+NOW = datetime(2025, 6, 1, 12, 30, tzinfo=timezone.utc)
+END = NOW.replace(minute=0)
+START = END - timedelta(hours=3)
+STORAGE_KEY = "1komma5grad.system_0.history"
+
+
+def chart_series(hours: int, power: float = 1000.0) -> dict:
+    """Return a power series with hourly readings for `hours` hours from START."""
+    return {
+        "data": {
+            (START + timedelta(hours=index)).isoformat(): {"value": power}
+            for index in range(hours)
+        }
+    }
+
+
+class ChartApi:
+    """Stand-in API client answering chart requests with fixed series."""
+
+    def __init__(self, hours: dict[str, int]) -> None:
+        """Initialize with the hours of data of each series."""
+        self.hours = hours
+        self.requests: list[str] = []
+
+    async def async_get_chart(
+        self, system_id, chart, start, end, resolution, circuit=None
+    ) -> dict:
+        """Return the series of a chart."""
+        self.requests.append(chart)
+        return {
+            conf["series"]: chart_series(self.hours.get(key, 3))
+            for key, conf in const.HISTORY_CONFIG.items()
+            if conf["chart"] == chart
+        }
+
+
+@pytest.fixture
+def statistics(hass: HomeAssistant, monkeypatch: pytest.MonkeyPatch) -> dict:
+    """Record the statistics added by the backfill, by statistic id."""
+    hass.config.components.add("recorder")
+    added: dict[str, list] = {}
+
+    def add_external_statistics(hass, metadata, statistics) -> None:
+        added.setdefault(metadata["statistic_id"], []).extend(
+            (row["start"], row["state"], row["sum"]) for row in statistics
+        )
+
+    monkeypatch.setattr(
+        history, "async_add_external_statistics", add_external_statistics
+    )
+    return added
+
+
+async def test_lagging_series_imported_later(
+    hass: HomeAssistant, hass_storage: dict, statistics: dict, freezer
+) -> None:
+    """A series published later keeps its own watermark and is fetched again."""
+    freezer.move_to(NOW)
+    # Stored by an older version, with one watermark for all statistics.
+    hass_storage[STORAGE_KEY] = {
+        "version": 1,
+        "key": STORAGE_KEY,
+        "data": {"watermark": START.isoformat(), "sums": {}},
+    }
+    client = ChartApi({"battery_out": 1})
+    backfill = history.HistoryBackfill(hass, client, "system-0")
+
+    await backfill.async_run()
+
+    battery_out = backfill.statistic_id("battery_out")
+    solar = backfill.statistic_id("solar_production")
+    assert len(statistics[solar]) == 3
+    assert statistics[battery_out] == [(START, pytest.approx(1.0), pytest.approx(1.0))]
+    watermarks = hass_storage[STORAGE_KEY]["data"]["watermarks"]
+    assert watermarks["solar_production"] == END.isoformat()
+    assert watermarks["battery_out"] == (START + timedelta(hours=1)).isoformat()
+
+    # The missing hours are published, only their chart is fetched again.
+    client.hours["battery_out"] = 3
+    client.requests.clear()
+    await backfill.async_run()
+
+    assert client.requests == ["battery"]
+    assert len(statistics[solar]) == 3
+    assert [row[2] for row in statistics[battery_out]] == [
+        pytest.approx(1.0),
+        pytest.approx(2.0),
+        pytest.approx(3.0),
+    ]
+    assert len(statistics[backfill.statistic_id("battery_in")]) == 3
+
+
+async def test_failures_use_own_circuit(
+    hass: HomeAssistant,
+    hass_storage: dict,
+    aioclient_mock: AiohttpClientMocker,
+    statistics: dict,
+) -> None:
+    """Failing history requests open the backfill's circuit, not the client's."""
+    aioclient_mock.get(
+        f"{const.API_BASE_URL}/api/v1/systems/system-0/charts/production",
+        status=429,
+        headers={"Retry-After": "3600"},
+    )
+    client = api.OneKomma5GradApi(async_get_clientsession(hass), access_token())
+    backfill = history.HistoryBackfill(hass, client, "system-0")
+
+    await backfill.async_run()
+
+    assert backfill.circuit.state == resilience.STATE_OPEN
+    assert client.circuit.state == resilience.STATE_CLOSED
+    assert client.circuit.failures == 0
+    assert not statistics
+    assert STORAGE_KEY not in hass_storage
+
+
+async def test_not_imported_until_available(
+    hass: HomeAssistant, mock_api: AiohttpClientMocker, statistics: dict
+) -> None:
+    """Entries that enabled the import do not run it while it is unavailable."""
+    entry = make_entry("system-0", options={const.CONF_ENERGY_HISTORY: True})
+    entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    shared = registry.async_get_registry(hass)
+    assert not shared.entry_ids(("history", "system-0"))
+    assert not statistics
@@ -0,0 +1,142 @@
+"""Tests for setting up config entries and sharing their pollers."""
+
+from __future__ import annotations
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.test_util.aiohttp import (
+    AiohttpClientMocker,
+)
+
+from . import DOMAIN, integration_module, make_entry
+
+const = integration_module("const")
+
+
+def live_overview_requests(mock_api: AiohttpClientMocker) -> list[str]:
+    """Return the systems whose live overview was requested, in order."""
+    return [
+        url.path.split("/")[-2]
+        for _, url, _, _ in mock_api.mock_calls
+        if url.path.endswith("/live-overview")
+    ]
+
+
+def expire_cache(hass: HomeAssistant, entry) -> None:
+    """Drop the cached responses of an entry's API client."""
+    hass.data[DOMAIN][entry.entry_id]["api"]._cache.clear()
+
+
+async def async_setup(hass: HomeAssistant, *entries) -> None:
+    """Add and set up config entries."""
+    for entry in entries:
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_entries_of_account_share_one_poller(
+    hass: HomeAssistant, mock_api: AiohttpClientMocker
+) -> None:
+    """Entries monitoring overlapping systems poll each system once per cycle."""
+    first = make_entry("system-0")
+    second = make_entry("system-0", "system-1")
+    await async_setup(hass, first, second)
+    runtime_data = hass.data[DOMAIN]
+    poller = runtime_data[first.entry_id]["poller"]
+    assert runtime_data[second.entry_id]["poller"] is poller
+    assert poller.system_ids == ["system-0", "system-1"]
+    assert (
+        runtime_data[first.entry_id]["energy"]["system-0"]
+        is (runtime_data[second.entry_id]["energy"]["system-0"])
+    )
+
+    mock_api.mock_calls.clear()
+    expire_cache(hass, first)
+    await poller.coordinator.async_refresh()
+    assert sorted(live_overview_requests(mock_api)) == ["system-0", "system-1"]
+    assert set(poller.coordinator.data) == {"system-0", "system-1"}
+
+
+async def test_unload_stops_polling_unmonitored_systems(
+    hass: HomeAssistant, mock_api: AiohttpClientMocker
+) -> None:
+    """Systems only an unloaded entry monitored are no longer polled."""
+    first = make_entry("system-0")
+    second = make_entry("system-0", "system-1")
+    await async_setup(hass, first, second)
+    poller = hass.data[DOMAIN][second.entry_id]["poller"]
+
+    assert await hass.config_entries.async_unload(second.entry_id)
+    assert poller.system_ids == ["system-0"]
+    mock_api.mock_calls.clear()
+    expire_cache(hass, first)
+    await poller.coordinator.async_refresh()
+    assert live_overview_requests(mock_api) == ["system-0"]
+
+    # The first entry keeps its sensors after the other one unloaded.
+    assert hass.states.get("sensor.1k5_solar_production").state == "1000.0"
+    assert await hass.config_entries.async_unload(first.entry_id)
+    assert not hass.data[const.DATA_SHARED]._shared
+
+
+async def test_poll_settings_and_accounts_are_polled_separately(
+    hass: HomeAssistant, mock_api: AiohttpClientMocker
+) -> None:
+    """Entries with other poll settings or of other accounts get their own poller."""
+    entries = [
+        make_entry("system-0"),
+        make_entry("system-0", options={const.CONF_MIN_POLL_INTERVAL: 60}),
+        make_entry("system-0", account="account-1"),
+    ]
+    await async_setup(hass, *entries)
+    pollers = {id(hass.data[DOMAIN][entry.entry_id]["poller"]) for entry in entries}
+    assert len(pollers) == 3
+    assert all(entry.state is ConfigEntryState.LOADED for entry in entries)
+
+
+async def test_not_ready_without_data(
+    hass: HomeAssistant, mock_api: AiohttpClientMocker
+) -> None:
+    """An entry none of whose systems can be fetched is retried later."""
+    mock_api.clear_requests()
+    entry = make_entry("system-0")
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    assert entry.state is ConfigEntryState.SETUP_RETRY
+    assert not hass.data[const.DATA_SHARED]._shared
+
+
+async def test_combined_updates_fetch_prices_of_added_systems(
+    hass: HomeAssistant, mock_api: AiohttpClientMocker
+) -> None:
+    """With combined updates, systems added by an entry get prices in its first cycle."""
+    options = {const.CONF_COMBINED_UPDATES: True}
+    first = make_entry("system-0", options=options)
+    await async_setup(hass, first)
+    poller = hass.data[DOMAIN][first.entry_id]["poller"]
+    assert poller.market_price_coordinator.update_interval is None
+    assert set(poller.market_price_coordinator.data) == {"system-0"}
+
+    second = make_entry("system-1", options=options)
+    await async_setup(hass, second)
+    assert hass.data[DOMAIN][second.entry_id]["poller"] is poller
+    assert set(poller.market_price_coordinator.data) == {"system-0", "system-1"}
+
+
+async def test_combined_cycle_uses_one_timestamp(
+    hass: HomeAssistant, mock_api: AiohttpClientMocker
+) -> None:
+    """Live overview, prices and snapshot of a combined cycle share its timestamp."""
+    entry = make_entry("system-0", options={const.CONF_COMBINED_UPDATES: True})
+    await async_setup(hass, entry)
+    runtime_data = hass.data[DOMAIN][entry.entry_id]
+    fetched_at = runtime_data["coordinator"].fetched_at
+    assert fetched_at is not None
+    assert runtime_data["market_price_coordinator"].fetched_at == fetched_at
+    assert runtime_data["coordinator"].metrics_as_dict()["fetched_at"] == (
+        fetched_at.isoformat()
+    )
+    snapshot = runtime_data["snapshot_store"]._snapshot
+    assert snapshot.live_overview_updated_at["system-0"] == fetched_at
+    assert snapshot.timelines_fetched_at["system-0"] == fetched_at
@@ -0,0 +1,153 @@
+"""Tests for the market price timeline and its solvers."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from . import integration_module
+
+price = integration_module("price")
+
+START = datetime(2025, 6, 1, 12, tzinfo=timezone.utc)
+T0 = START.timestamp()
+HOUR = 3600.0
+PRICES = [30.0, 20.0, 10.0, 25.0, 5.0, 40.0]
+
+
+def chart(prices: list[float], start: datetime = START) -> dict:
+    """Return a `charts/market-prices` response with hourly prices."""
+    return {
+        "energyMarket": {
+            "data": {
+                (start + timedelta(hours=hour)).strftime("%Y-%m-%dT%H:%MZ"): {
+                    "price": value
+                }
+                for hour, value in enumerate(prices)
+            }
+        }
+    }
+
+
+def timeline(prices: list[float] = PRICES):
+    """Return a timeline of hourly prices starting at START."""
+    return price.PriceTimeline.from_chart(chart(prices))
+
+
+def test_from_chart_sorts_and_skips_invalid() -> None:
+    """Entries are sorted by time, unusable ones are left out."""
+    data = {
+        "2025-06-01T13:00Z": {"price": 2},
+        "2025-06-01T12:00Z": {"price": "1.5"},
+        "2025-06-01T14:00Z": {"price": None},
+        "not a time": {"price": 3},
+        "2025-06-01T15:00Z": "invalid",
+    }
+    result = price.PriceTimeline.from_chart({"energyMarket": {"data": data}})
+    assert list(result.prices) == [1.5, 2.0]
+    assert list(result.timestamps) == [T0, T0 + HOUR]
+    assert result.resolution == HOUR
+    assert price.PriceTimeline.from_chart({}) is None
+    assert price.PriceTimeline.from_chart({"energyMarket": {"data": {}}}) is None
+
+
+def test_round_trip() -> None:
+    """A timeline saved with as_dict is restored unchanged."""
+    original = timeline()
+    restored = price.PriceTimeline.from_dict(original.as_dict())
+    assert list(restored.timestamps) == list(original.timestamps)
+    assert list(restored.prices) == list(original.prices)
+    assert restored.resolution == original.resolution
+    assert price.PriceTimeline.from_dict(None) is None
+
+
+def test_price_at_slot_boundaries() -> None:
+    """Each slot covers its start up to, not including, the next one."""
+    result = timeline()
+    assert result.price_at(T0 - 1) is None
+    assert result.price_at(T0) == 30.0
+    assert result.price_at(T0 + HOUR - 1) == 30.0
+    assert result.price_at(T0 + HOUR) == 20.0
+    assert result.price_at(result.end - 1) == 40.0
+    assert result.price_at(result.end) is None
+
+
+def test_next_change() -> None:
+    """The next change is the next slot start, or the end of the series."""
+    result = timeline()
+    assert result.next_change(T0 - HOUR) == T0
+    assert result.next_change(T0 + 10) == T0 + HOUR
+    assert result.next_change(result.end - 10) == result.end
+    assert result.next_change(result.end) is None
+
+
+def test_slot_range() -> None:
+    """Slots are taken from the one containing start, or the next whole one."""
+    result = timeline()
+    assert result.slot_range(T0 + 1800, T0 + 4 * HOUR) == range(0, 4)
+    assert result.slot_range(T0 + 1800, T0 + 4 * HOUR, whole=True) == range(1, 4)
+    assert result.slot_range(T0 + HOUR, T0 + 4 * HOUR, whole=True) == range(1, 4)
+    # A slot ending after `end` is not included.
+    assert result.slot_range(T0, T0 + 2.5 * HOUR) == range(0, 2)
+    # Nothing is left once the series has ended.
+    assert len(result.slot_range(result.end, result.end + HOUR)) == 0
+    assert len(result.slot_range(result.end, result.end + HOUR, whole=True)) == 0
+
+
+def test_cheapest_window() -> None:
+    """The window with the lowest total price is found."""
+    result = timeline()
+    # Windows of two: 50, 30, 35, 30, 45. The first of the cheapest wins.
+    assert result.cheapest_window(T0, result.end, 2) == 1
+    assert result.cheapest_window(T0, result.end, 1) == 4
+    assert result.cheapest_window(T0, result.end, len(PRICES)) == 0
+    assert result.cheapest_window(T0, result.end, len(PRICES) + 1) is None
+    assert result.cheapest_window(T0, result.end, 0) is None
+    # Until the end of slot 3, the single cheapest slot is 2.
+    assert result.cheapest_window(T0, T0 + 4 * HOUR, 1) == 2
+
+
+def test_cheapest_window_skips_started_slots() -> None:
+    """A slot that already started is not offered."""
+    result = timeline()
+    assert result.cheapest_window(T0 + 2 * HOUR + 1, result.end, 1) == 4
+    assert result.cheapest_window(T0 + 4 * HOUR + 1, result.end, 1) == 5
+    assert result.cheapest_window(T0 + 5 * HOUR + 1, result.end, 1) is None
+    assert result.cheapest_window(result.end + HOUR, result.end + 2 * HOUR, 1) is None
+
+
+def test_cheapest_slots() -> None:
+    """The cheapest slots are returned in time order."""
+    result = timeline()
+    assert result.cheapest_slots(T0, result.end, 3) == (1, 2, 4)
+    assert result.cheapest_slots(T0 + 2 * HOUR + 1, result.end, 2) == (3, 4)
+    assert result.cheapest_slots(T0 + 4 * HOUR, result.end, 3) is None
+
+
+def test_solutions_are_reused() -> None:
+    """Repeated questions are answered from the solution cache."""
+    result = timeline()
+    first = result.cheapest_slots(T0 + 1, result.end, 3)
+    # Both start at the second slot, the first one already started.
+    assert result.cheapest_slots(T0 + HOUR, result.end, 3) is first
+
+
+def test_cache_is_stale_without_tomorrow() -> None:
+    """After the auction, a timeline without the next day is refetched."""
+    cache = price.PriceTimelineCache()
+    now = datetime(2025, 6, 1, 10, tzinfo=timezone.utc)
+    assert cache.is_stale(now)
+    today = price.PriceTimeline.from_chart(chart([20.0] * 24, now.replace(hour=0)))
+    cache.update(today, now)
+    assert not cache.is_stale(now)
+    assert cache.covers(now)
+
+    after_auction = now.replace(hour=price.MARKET_PRICE_AUCTION_HOUR)
+    assert cache.is_stale(after_auction)
+    cache.update(None, after_auction)
+    assert cache.timeline is today
+    assert not cache.is_stale(after_auction)
+    assert cache.is_stale(after_auction + price.MARKET_PRICE_RETRY_INTERVAL)
+
+    both_days = price.PriceTimeline.from_chart(chart([20.0] * 48, now.replace(hour=0)))
+    cache.update(both_days, after_auction)
+    assert not cache.is_stale(after_auction + timedelta(hours=2))
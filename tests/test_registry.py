@@ -0,0 +1,67 @@
+"""Tests for the registry of objects shared by config entries."""
+
+from __future__ import annotations
+
+import asyncio
+
+from . import integration_module
+
+registry = integration_module("registry")
+
+
+async def test_released_after_last_entry() -> None:
+    """An object is released once, when the last entry using it releases it."""
+    shared = registry.SharedRegistry()
+    released = []
+
+    async def async_release() -> None:
+        released.append(True)
+
+    assert shared.acquire("key", "first") is None
+    shared.add("key", "first", "value", async_release)
+    assert shared.acquire("key", "second") == "value"
+    assert shared.entry_ids("key") == {"first", "second"}
+
+    await shared.async_release("key", "first")
+    assert not released
+    assert shared.acquire("key", "third") == "value"
+    await shared.async_release("key", "second")
+    await shared.async_release("key", "third")
+    assert released == [True]
+    assert shared.entry_ids("key") == set()
+    assert shared.acquire("key", "first") is None
+
+    # Releasing again, or an unknown key, does nothing.
+    await shared.async_release("key", "third")
+    await shared.async_release("other", "first")
+    assert released == [True]
+
+
+async def test_lock_serializes_creation() -> None:
+    """Entries set up concurrently create the object only once."""
+    shared = registry.SharedRegistry()
+    created = []
+
+    async def async_setup(entry_id: str) -> str:
+        async with shared.lock("key"):
+            if (value := shared.acquire("key", entry_id)) is None:
+                await asyncio.sleep(0)
+                value = f"created by {entry_id}"
+                created.append(value)
+                shared.add("key", entry_id, value)
+        return value
+
+    values = await asyncio.gather(*(async_setup(f"entry-{i}") for i in range(3)))
+    assert created == ["created by entry-0"]
+    assert values == created * 3
+    assert shared.entry_ids("key") == {"entry-0", "entry-1", "entry-2"}
+
+
+async def test_lock_dropped_with_object() -> None:
+    """The lock of a key is dropped once its object is released."""
+    shared = registry.SharedRegistry()
+    lock = shared.lock("key")
+    assert shared.lock("key") is lock
+    shared.add("key", "first", "value")
+    await shared.async_release("key", "first")
+    assert shared.lock("key") is not lock
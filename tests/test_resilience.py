@@ -0,0 +1,144 @@
+"""Tests for the API circuit breaker."""
+
+from __future__ import annotations
+
+from aiohttp import ClientConnectionError
+import pytest
+
+from . import integration_module
+
+const = integration_module("const")
+resilience = integration_module("resilience")
+
+RECOVERY = const.CIRCUIT_RECOVERY_TIME.total_seconds()
+
+
+class RetryAfterError(Exception):
+    """Error response asking to retry after some seconds."""
+
+    def __init__(self, seconds: float) -> None:
+        """Initialize the error with its `Retry-After` header."""
+        super().__init__("429")
+        self.headers = {"Retry-After": str(seconds)}
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    """Drive `time.monotonic` of the circuit breaker by hand."""
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    return now
+
+
+def open_circuit(circuit) -> None:
+    """Fail enough requests in a row to open the circuit."""
+    for _ in range(const.CIRCUIT_FAILURE_THRESHOLD):
+        circuit.before_call()
+        circuit.record_failure(ClientConnectionError("down"))
+
+
+def test_opens_after_threshold(clock: list[float]) -> None:
+    """The circuit stays closed below the threshold and opens at it."""
+    circuit = resilience.CircuitBreaker()
+    for _ in range(const.CIRCUIT_FAILURE_THRESHOLD - 1):
+        circuit.before_call()
+        circuit.record_failure(ClientConnectionError("down"))
+    assert circuit.state == resilience.STATE_CLOSED
+
+    circuit.before_call()
+    circuit.record_failure(ClientConnectionError("down"))
+    assert circuit.state == resilience.STATE_OPEN
+    assert circuit.retry_in == RECOVERY
+    with pytest.raises(resilience.CircuitOpenError):
+        circuit.before_call()
+    assert circuit.rejected == 1
+
+
+def test_success_resets_failures(clock: list[float]) -> None:
+    """Failures only open the circuit when they happen in a row."""
+    circuit = resilience.CircuitBreaker()
+    for _ in range(const.CIRCUIT_FAILURE_THRESHOLD - 1):
+        circuit.record_failure(ClientConnectionError("down"))
+    circuit.record_success()
+    circuit.record_failure(ClientConnectionError("down"))
+    assert circuit.state == resilience.STATE_CLOSED
+    assert circuit.failures == 1
+
+
+def test_half_open_lets_one_probe_through(clock: list[float]) -> None:
+    """After the recovery time a single probe is sent, and success closes."""
+    circuit = resilience.CircuitBreaker()
+    open_circuit(circuit)
+    clock[0] += RECOVERY
+
+    circuit.before_call()
+    assert circuit.state == resilience.STATE_HALF_OPEN
+    with pytest.raises(resilience.CircuitOpenError):
+        circuit.before_call()
+
+    circuit.record_success()
+    assert circuit.state == resilience.STATE_CLOSED
+    assert circuit.failures == 0
+    circuit.before_call()
+
+
+def test_failed_probe_doubles_recovery_time(clock: list[float]) -> None:
+    """Each failed probe reopens the circuit for twice as long, up to the maximum."""
+    circuit = resilience.CircuitBreaker()
+    open_circuit(circuit)
+    recovery = RECOVERY
+    for _ in range(10):
+        clock[0] += recovery
+        circuit.before_call()
+        circuit.record_failure(ClientConnectionError("still down"))
+        recovery = min(recovery * 2, const.CIRCUIT_MAX_RECOVERY_TIME.total_seconds())
+        assert circuit.state == resilience.STATE_OPEN
+        assert circuit.retry_in == recovery
+    assert recovery == const.CIRCUIT_MAX_RECOVERY_TIME.total_seconds()
+
+    # A successful probe starts over from the initial recovery time.
+    clock[0] += recovery
+    circuit.before_call()
+    circuit.record_success()
+    open_circuit(circuit)
+    assert circuit.retry_in == RECOVERY
+
+
+def test_cancelled_probe_is_released(clock: list[float]) -> None:
+    """A probe that never completed lets the next request probe instead."""
+    circuit = resilience.CircuitBreaker()
+    open_circuit(circuit)
+    clock[0] += RECOVERY
+    circuit.before_call()
+    circuit.release()
+    circuit.before_call()
+    assert circuit.state == resilience.STATE_HALF_OPEN
+
+
+def test_long_retry_after_opens_immediately(clock: list[float]) -> None:
+    """A Retry-After longer than the client waits opens the circuit for that long."""
+    circuit = resilience.CircuitBreaker()
+    requested = const.API_RETRY_MAX_DELAY.total_seconds() + 60
+    circuit.record_failure(RetryAfterError(requested))
+    assert circuit.state == resilience.STATE_OPEN
+    assert circuit.retry_in == requested
+
+
+def test_short_retry_after_counts_as_failure(clock: list[float]) -> None:
+    """A Retry-After the client waits for does not open the circuit by itself."""
+    circuit = resilience.CircuitBreaker()
+    circuit.record_failure(RetryAfterError(1))
+    assert circuit.state == resilience.STATE_CLOSED
+
+
+def test_listeners_are_notified(clock: list[float]) -> None:
+    """Listeners hear about state changes until they unsubscribe."""
+    circuit = resilience.CircuitBreaker()
+    calls = []
+    remove = circuit.add_listener(lambda: calls.append(circuit.state))
+    open_circuit(circuit)
+    assert calls[-1] == resilience.STATE_OPEN
+    remove()
+    clock[0] += RECOVERY
+    circuit.before_call()
+    assert calls[-1] == resilience.STATE_OPEN
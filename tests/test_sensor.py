@@ -0,0 +1,179 @@
+"""Tests for the live overview and market price sensors."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+import types
+
+import pytest
+
+from . import integration_module
+
+const = integration_module("const")
+models = integration_module("models")
+price = integration_module("price")
+sensor = integration_module("sensor")
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    """Drive `time.monotonic` of the sensors by hand."""
+    now = [1000.0]
+    monkeypatch.setattr(sensor.time, "monotonic", lambda: now[0])
+    return now
+
+
+def make_sensor(key: str):
+    """Return the sensor of `key` on a stand-in coordinator, counting state writes."""
+    coordinator = types.SimpleNamespace(
+        data=None, restored_at={}, last_update_success=True
+    )
+    entry = types.SimpleNamespace(entry_id="test", data={"system_id": "system-0"})
+    system = sensor._system_info(entry, "system-0", "system-0")
+    description = next(
+        description
+        for description in sensor.LIVE_OVERVIEW_SENSORS
+        if description.key == key
+    )
+    entity = sensor.OneKomma5GradSensor(coordinator, system, description)
+    entity.writes = []
+    entity.async_write_ha_state = lambda: entity.writes.append(entity.native_value)
+    return entity
+
+
+def publish(entity, **values) -> None:
+    """Publish a coordinator update with the given live overview values."""
+    entity.coordinator.data = {"system-0": models.LiveOverview(**values)}
+    entity._handle_coordinator_update()
+
+
+@pytest.mark.parametrize(
+    ("value", "last_value", "within"),
+    [
+        (1000, 1000, True),
+        # Absolute deadband of 5 W for small values.
+        (104, 100, True),
+        (105, 100, False),
+        (96, 100, True),
+        # Relative deadband of 1 % for large values.
+        (5049, 5000, True),
+        (5050, 5000, False),
+        (4951, 5000, True),
+        # A return to zero is always published, leaving it is not special.
+        (0, 3, False),
+        (3, 0, True),
+        (0, 0, True),
+        # Values that are not numbers are compared for equality only.
+        (None, 100, False),
+        ("unknown", "unknown", True),
+    ],
+)
+def test_within_deadband(value, last_value, within: bool) -> None:
+    """Small moves stay within the deadband, meaningful ones do not."""
+    entity = make_sensor("solar_production")
+    assert entity._within_deadband(value, last_value) is within
+
+
+def test_no_deadband_compares_for_equality() -> None:
+    """Sensors without a deadband write every change."""
+    entity = make_sensor("solar_production")
+    entity.entity_description = sensor.OneKomma5GradSensorEntityDescription(
+        key="solar_production", device="solarpanel"
+    )
+    assert entity._within_deadband(100, 100)
+    assert not entity._within_deadband(100.1, 100)
+
+
+def test_updates_within_deadband_are_not_written(clock: list[float]) -> None:
+    """Only updates leaving the deadband of the last written value are written."""
+    entity = make_sensor("solar_production")
+    for production in (1000, 1004, 1009, 1004, 1010, 1015):
+        publish(entity, solar_production=production)
+    # The deadband of 1000 is 10 W, that of 1010 is 10.1 W.
+    assert entity.writes == [1000, 1010]
+
+
+def test_silence_is_bounded(clock: list[float]) -> None:
+    """An unchanged value is written again after the maximum silence."""
+    entity = make_sensor("solar_production")
+    publish(entity, solar_production=1000)
+    clock[0] += const.DEADBAND_MAX_SILENCE.total_seconds() - 1
+    publish(entity, solar_production=1001)
+    clock[0] += 1
+    publish(entity, solar_production=1001)
+    assert entity.writes == [1000, 1001]
+
+
+def test_availability_change_is_written(clock: list[float]) -> None:
+    """Losing the system's data is written even though the value is unknown."""
+    entity = make_sensor("solar_production")
+    publish(entity, solar_production=1000)
+    entity.coordinator.data = {}
+    entity._handle_coordinator_update()
+    publish(entity, solar_production=1000)
+    assert len(entity.writes) == 3
+
+
+def test_restored_attributes_are_per_system(clock: list[float]) -> None:
+    """Each sensor shows when the restored data of its own system was fetched."""
+    entity = make_sensor("solar_production")
+    fetched_at = datetime(2025, 6, 1, 12, tzinfo=timezone.utc)
+    entity.coordinator.restored_at = {
+        "system-0": fetched_at,
+        "system-1": fetched_at + timedelta(hours=1),
+    }
+    publish(entity, solar_production=1000)
+    assert entity.extra_state_attributes == {
+        "restored": True,
+        "data_fetched_at": fetched_at.isoformat(),
+    }
+
+    # Another system going live does not rewrite the state.
+    entity.coordinator.restored_at = {"system-0": fetched_at}
+    publish(entity, solar_production=1000)
+    entity.coordinator.restored_at = {}
+    publish(entity, solar_production=1000)
+    assert entity.writes == [1000, 1000]
+    assert entity.extra_state_attributes is None
+
+
+def market_price_timeline(slots: int):
+    """Return a timeline of hourly prices of 20 ct/kWh from the current hour."""
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return price.PriceTimeline.from_chart(
+        {
+            "energyMarket": {
+                "data": {
+                    (start + timedelta(hours=hour)).isoformat(): {"price": 20.0}
+                    for hour in range(slots)
+                }
+            }
+        }
+    )
+
+
+def test_extended_forecast_is_written(clock: list[float]) -> None:
+    """A new timeline is written even if the next slot's price is unchanged."""
+    coordinator = types.SimpleNamespace(
+        data=None, restored_at={}, last_update_success=True
+    )
+    entry = types.SimpleNamespace(entry_id="test", data={"system_id": "system-0"})
+    system = sensor._system_info(entry, "system-0", "system-0")
+    entity = sensor.MarketPriceForecastSensor(
+        coordinator, system, sensor.MARKET_PRICE_FORECAST_SENSOR
+    )
+    entity._schedule_slot_change = lambda: None
+    entity.writes = []
+    entity.async_write_ha_state = lambda: entity.writes.append(
+        len(entity.extra_state_attributes["prices"])
+    )
+
+    coordinator.data = {"system-0": market_price_timeline(10)}
+    entity._handle_coordinator_update()
+    # The same timeline again is within the deadband.
+    entity._handle_coordinator_update()
+    coordinator.data = {"system-0": market_price_timeline(34)}
+    entity._handle_coordinator_update()
+
+    assert entity.native_value == 0.2
+    assert entity.writes == [10, 34]
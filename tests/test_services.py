@@ -0,0 +1,99 @@
+"""Tests for the integration services."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+import pytest
+
+from . import DOMAIN, integration_module, make_entry
+
+const = integration_module("const")
+price = integration_module("price")
+
+NOW = datetime(2025, 6, 1, 12, 30, tzinfo=timezone.utc)
+HOUR = NOW.replace(minute=0)
+PRICES = [30.0, 20.0, 10.0, 25.0, 5.0, 40.0]
+
+
+@pytest.fixture
+async def entry(hass: HomeAssistant, mock_api, freezer):
+    """Set up an entry of two systems, the second with a known price curve."""
+    freezer.move_to(NOW)
+    entry = make_entry("system-0", "system-1")
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]["market_price_coordinator"]
+    coordinator.data["system-1"] = price.PriceTimeline.from_chart(
+        {
+            "energyMarket": {
+                "data": {
+                    (HOUR + timedelta(hours=hour)).isoformat(): {"price": value}
+                    for hour, value in enumerate(PRICES)
+                }
+            }
+        }
+    )
+    return entry
+
+
+async def find_cheapest_window(hass: HomeAssistant, **data) -> dict:
+    """Call the service and return its response."""
+    return await hass.services.async_call(
+        DOMAIN,
+        const.SERVICE_FIND_CHEAPEST_WINDOW,
+        data,
+        blocking=True,
+        return_response=True,
+    )
+
+
+def hour(offset: int) -> str:
+    """Return the start of the slot `offset` hours after the current one."""
+    return (HOUR + timedelta(hours=offset)).isoformat()
+
+
+async def test_cheapest_window(hass: HomeAssistant, entry) -> None:
+    """The cheapest window starts at the next full slot."""
+    result = await find_cheapest_window(hass, system_id="system-1", hours=2)
+    assert result["start"] == hour(1)
+    assert result["end"] == hour(3)
+    assert result["average_price"] == 0.15
+    assert [slot["price"] for slot in result["slots"]] == [0.2, 0.1]
+
+
+async def test_cheapest_slots(hass: HomeAssistant, entry) -> None:
+    """Slots that need not be contiguous are returned in time order."""
+    result = await find_cheapest_window(
+        hass, system_id="system-1", hours=2, contiguous=False
+    )
+    assert [slot["start"] for slot in result["slots"]] == [hour(2), hour(4)]
+    assert result["average_price"] == 0.075
+
+
+async def test_deadline(hass: HomeAssistant, entry) -> None:
+    """The window ends by the deadline."""
+    result = await find_cheapest_window(
+        hass, system_id="system-1", hours=1, deadline=HOUR + timedelta(hours=4)
+    )
+    assert result["start"] == hour(2)
+
+    with pytest.raises(ServiceValidationError):
+        await find_cheapest_window(
+            hass, system_id="system-1", hours=4, deadline=HOUR + timedelta(hours=4)
+        )
+
+
+async def test_system_must_be_selected(hass: HomeAssistant, entry) -> None:
+    """An entry of several systems needs the system to be named."""
+    with pytest.raises(ServiceValidationError):
+        await find_cheapest_window(hass, hours=1)
+    with pytest.raises(ServiceValidationError):
+        await find_cheapest_window(hass, system_id="system-2", hours=1)
+    result = await find_cheapest_window(
+        hass, config_entry_id=entry.entry_id, system_id="system-0", hours=1
+    )
+    assert len(result["slots"]) == 1
@@ -0,0 +1,83 @@
+"""Tests for the snapshot store."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from . import integration_module
+
+const = integration_module("const")
+store = integration_module("store")
+
+ENTRY_ID = "entry"
+KEY = f"{const.DOMAIN}.{ENTRY_ID}.snapshot"
+FIRST = datetime(2025, 6, 1, 12, tzinfo=timezone.utc)
+SECOND = datetime(2025, 6, 1, 12, 5, tzinfo=timezone.utc)
+
+
+def stored(live_overview: dict) -> dict:
+    """Return the storage file of a snapshot holding `live_overview`."""
+    return {
+        "version": const.SNAPSHOT_STORAGE_VERSION,
+        "minor_version": 1,
+        "key": KEY,
+        "data": {"saved_at": SECOND.isoformat(), "live_overview": live_overview},
+    }
+
+
+async def test_each_system_keeps_its_update_time(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """Systems updated at different times are restored with their own time."""
+    snapshot_store = store.SnapshotStore(hass, ENTRY_ID)
+    snapshot_store.async_update_live_overview({"system-0": {"a": 1}}, FIRST)
+    snapshot_store.async_update_live_overview({"system-1": {"b": 2}}, SECOND)
+    await snapshot_store.async_flush()
+
+    snapshot = await store.SnapshotStore(hass, ENTRY_ID).async_load()
+    assert snapshot.live_overview == {"system-0": {"a": 1}, "system-1": {"b": 2}}
+    assert snapshot.live_overview_updated_at == {
+        "system-0": FIRST,
+        "system-1": SECOND,
+    }
+
+
+async def test_load_single_update_time(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """Snapshots with one update time for all systems apply it to each."""
+    hass_storage[KEY] = stored(
+        {"data": {"system-0": {"a": 1}}, "updated_at": FIRST.isoformat()}
+    )
+    snapshot = await store.SnapshotStore(hass, ENTRY_ID).async_load()
+    assert snapshot.live_overview_updated_at == {"system-0": FIRST}
+
+
+async def test_load_skips_payloads_without_time(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """A payload whose update time is unknown is not restored."""
+    hass_storage[KEY] = stored(
+        {
+            "data": {"system-0": {"a": 1}, "system-1": {"b": 2}},
+            "updated_at": {"system-1": SECOND.isoformat()},
+        }
+    )
+    snapshot = await store.SnapshotStore(hass, ENTRY_ID).async_load()
+    assert snapshot.live_overview == {"system-1": {"b": 2}}
+
+
+async def test_remove(hass: HomeAssistant, hass_storage: dict[str, Any]) -> None:
+    """Removing the snapshot drops a pending save and the stored data."""
+    hass_storage[KEY] = stored(
+        {"data": {"system-0": {"a": 1}}, "updated_at": {"system-0": FIRST.isoformat()}}
+    )
+    snapshot_store = store.async_get_snapshot_store(hass, ENTRY_ID)
+    snapshot_store.async_update_live_overview({"system-0": {"a": 2}}, SECOND)
+    await store.async_remove_snapshot(hass, ENTRY_ID)
+    await snapshot_store.async_flush()
+    assert KEY not in hass_storage
+    assert store.async_get_snapshot_store(hass, ENTRY_ID) is not snapshot_store